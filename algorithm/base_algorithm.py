@@ -64,6 +64,33 @@ class BaseAlgorithm(ABC):
             'output': self.output.copy()
         }
     
+    def get_flat_params(self) -> dict:
+        """
+        获取扁平化的全量参数
+        
+        将config、input、output合并为一个字典（一次C层面的字典合并），
+        同名参数按 config < input < output 的顺序覆盖。
+        
+        Returns:
+            {参数名: 参数值} 字典
+        """
+        return {**self.config, **self.input, **self.output}
+    
+    def get_params_into(self, out: dict, keys):
+        """
+        将扁平化的全量参数直接写入目标字典（与 get_flat_params() 内容一致）
+        
+        按 config、input、output 的顺序依次写入，不创建合并字典，
+        键映射和写入都在C层面完成。
+        
+        Args:
+            out: 目标字典
+            keys: 参数名到目标键的映射（如 参数名 -> "实例名.参数名"）
+        """
+        key_of = keys.__getitem__
+        for group in (self.config, self.input, self.output):
+            out.update(zip(map(key_of, group), group.values()))
+    
     def get_storable_params(self) -> dict:
         """
         获取需要存储到历史数据库的参数（运行时变化的参数）
@@ -2,6 +2,7 @@
 PID控制算法
 """
 from algorithm.base_algorithm import BaseAlgorithm
+from algorithm.pid_kernel import pid_step
 from utils.logger import get_logger
 
 logger = get_logger()
@@ -142,64 +143,12 @@ class PID(BaseAlgorithm):
             logger.error(f"Invalid sample_time={sample_time}, using previous value")
             sample_time = self.EPSILON  # 使用最小值避免除零
         
-        # 计算误差
-        error = sv - pv
-        
-        # 比例项
-        p_term = kp * error
-        
-        # 积分项（使用矩形积分）
-        if ti > self.EPSILON:
-            # 计算积分增量
-            integral_increment = error * sample_time
-            
-            # 更新积分值
-            self.integral += integral_increment
-            
-            # 限制积分项的最大值（防止积分饱和）
-            if self.max_integral != float('inf'):
-                max_integral_value = self.max_integral
-                self.integral = max(-max_integral_value, min(max_integral_value, self.integral))
-            
-            # 计算积分项
-            i_term = (kp / ti) * self.integral
-        else:
-            i_term = 0.0
-            integral_increment = 0.0
-        
-        # 微分项
-        if self._first_run:
-            # 首次执行时，last_error=0，避免微分项突变
-            d_term = 0.0
-            self._first_run = False
-        else:
-            # 计算误差变化率
-            error_diff = error - self.last_error
-            if sample_time > self.EPSILON:
-                d_term = (kp * td) * error_diff / sample_time
-            else:
-                d_term = 0.0
-        
-        # 计算未限幅的输出
-        mv_unlimited = p_term + i_term + d_term
-        
-        # 限制输出范围
-        mv = max(l, min(h, mv_unlimited))
-        
-        # 积分抗饱和（Anti-Windup）：如果输出达到限幅，且误差与输出方向一致，则停止积分累积
-        if ti > self.EPSILON:
-            if mv >= h and error > 0:
-                # 输出达到上限，且误差为正（需要增大输出），停止积分累积
-                self.integral -= integral_increment
-                i_term = (kp / ti) * self.integral
-                # 重新计算输出（考虑修正后的积分项）
-                mv = max(l, min(h, p_term + i_term + d_term))
-            elif mv <= l and error < 0:
-                # 输出达到下限，且误差为负（需要减小输出），停止积分累积
-                self.integral -= integral_increment
-                i_term = (kp / ti) * self.integral
-                # 重新计算输出（考虑修正后的积分项）
-                mv = max(l, min(h, p_term + i_term + d_term))
+        # 单步计算委托给标量内核（安装numba时为JIT编译版本）
+        mv, self.integral, error = pid_step(
+            pv, sv, kp, ti, td, sample_time, h, l,
+            self.integral, self.last_error, self._first_run, self.max_integral
+        )
+        self._first_run = False
         
         # 更新输出
         self.output['mv'] = mv
@@ -0,0 +1,94 @@
+"""
+PID计算内核
+将PID单步计算提取为只接收标量的纯函数，安装了numba时使用JIT编译，
+否则以普通Python函数运行，两者计算逻辑完全一致
+"""
+import math
+
+try:
+    from numba import njit
+except ImportError:  # numba为可选依赖
+    njit = None
+
+# 数值精度阈值（与PID.EPSILON一致）
+EPSILON = 1e-9
+
+
+def _pid_step(pv, sv, kp, ti, td, sample_time, h, l,
+              integral, last_error, first_run, max_integral):
+    """
+    执行一次PID计算（位置式，矩形积分，带积分限幅和抗饱和）
+    
+    Args:
+        pv: 过程变量
+        sv: 设定值
+        kp: 比例系数
+        ti: 积分时间（秒）
+        td: 微分时间（秒）
+        sample_time: 采样周期（秒），调用方需保证为正数
+        h: 输出上限
+        l: 输出下限
+        integral: 当前积分值
+        last_error: 上一次的误差
+        first_run: 是否为首次执行（首次执行时微分项为0）
+        max_integral: 积分值的最大绝对值，math.inf表示不限制
+    
+    Returns:
+        (mv, integral, error) 输出值、更新后的积分值、本次误差
+    """
+    # 计算误差
+    error = sv - pv
+    
+    # 比例项
+    p_term = kp * error
+    
+    # 积分项（使用矩形积分）
+    if ti > EPSILON:
+        integral_increment = error * sample_time
+        integral += integral_increment
+        # 限制积分项的最大值（防止积分饱和）
+        if max_integral != math.inf:
+            integral = max(-max_integral, min(max_integral, integral))
+        i_term = (kp / ti) * integral
+    else:
+        i_term = 0.0
+        integral_increment = 0.0
+    
+    # 微分项（首次执行时为0，避免微分项突变）
+    if first_run:
+        d_term = 0.0
+    elif sample_time > EPSILON:
+        d_term = (kp * td) * (error - last_error) / sample_time
+    else:
+        d_term = 0.0
+    
+    # 限制输出范围
+    mv = max(l, min(h, p_term + i_term + d_term))
+    
+    # 积分抗饱和（Anti-Windup）：输出达到限幅且误差与输出方向一致时，撤销本次积分累积
+    if ti > EPSILON:
+        if (mv >= h and error > 0) or (mv <= l and error < 0):
+            integral -= integral_increment
+            i_term = (kp / ti) * integral
+            mv = max(l, min(h, p_term + i_term + d_term))
+    
+    return mv, integral, error
+
+
+if njit is not None:
+    pid_step = njit(cache=True)(_pid_step)
+    NUMBA_AVAILABLE = True
+else:
+    pid_step = _pid_step
+    NUMBA_AVAILABLE = False
+
+
+def warmup():
+    """
+    预热PID内核
+    
+    使用numba时首次调用会触发编译，在初始化阶段调用一次，
+    避免第一个运行周期承担编译耗时。未安装numba时不做任何事。
+    """
+    if NUMBA_AVAILABLE:
+        pid_step(0.0, 0.0, 1.0, 1.0, 0.0, 1.0, 100.0, 0.0, 0.0, 0.0, True, math.inf)
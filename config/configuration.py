@@ -3,15 +3,69 @@
 提供组态文件的加载、管理、差异分析和更新功能
 """
 import os
+import copy
+import hashlib
 import yaml
 import json
 import redis
-from typing import Dict, List, Any, Optional, Tuple
+from collections import OrderedDict
+from typing import Dict, List, Any, Optional, Tuple, Mapping
 from utils.logger import get_logger
+from utils.yaml_cache import load_yaml
+from utils.json_codec import orjson
 
 logger = get_logger()
 
 
+def _encode_message(message: Dict[str, Any]) -> bytes:
+    """
+    将配置更新消息编码为UTF-8 JSON字节串
+    
+    优先使用orjson（C实现，直接输出字节），未安装或遇到orjson不支持的
+    内容（如非字符串键）时回退到标准库json。两者输出的都是JSON，订阅方无需区分。
+    
+    Args:
+        message: 配置更新消息
+    
+    Returns:
+        UTF-8编码的JSON字节串
+    """
+    if orjson is not None:
+        try:
+            return orjson.dumps(message)
+        except TypeError:
+            pass
+    return json.dumps(message, ensure_ascii=False).encode('utf-8')
+
+
+def _config_digest(config: Mapping[str, Any]) -> Optional[bytes]:
+    """
+    计算组态配置的内容摘要（键排序后序列化再哈希）
+    
+    只在安装了orjson时计算：orjson遇到非字符串键会报错，不会像标准库json那样
+    把键转换为字符串，内容不同的配置不会得到相同的摘要。
+    
+    Args:
+        config: 组态配置
+    
+    Returns:
+        16字节摘要，未安装orjson或配置中有无法序列化的内容时返回None
+    """
+    if orjson is None:
+        return None
+    try:
+        data = orjson.dumps(config, option=orjson.OPT_SORT_KEYS,
+                            default=lambda o: dict(o) if isinstance(o, Mapping) else _unhashable(o))
+    except TypeError:
+        return None
+    return hashlib.blake2b(data, digest_size=16).digest()
+
+
+def _unhashable(obj: Any):
+    """_config_digest 遇到无法序列化的值时放弃计算摘要"""
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
 class ConfigurationManager:
     """
     组态管理器
@@ -24,6 +78,9 @@ class ConfigurationManager:
     5. 更新组态到PLC
     """
     
+    # 差异分析结果最多缓存的配置对数量
+    DIFF_CACHE_SIZE = 32
+    
     def __init__(self, config_dir: str = "config", local_dir: str = "plc/local", 
                  redis_config: dict = None):
         """
@@ -46,6 +103,9 @@ class ConfigurationManager:
         self.redis_config = redis_config or {}
         self._redis_client = None
         
+        # 差异分析结果缓存：{(配置1摘要, 配置2摘要): 差异}，按最近使用顺序排列
+        self._diff_cache: "OrderedDict[Tuple[bytes, bytes], Dict[str, Any]]" = OrderedDict()
+        
         logger.info(f"ConfigurationManager initialized: config_dir={config_dir}, local_dir={local_dir}")
     
     def load_config_file(self, config_file: str) -> Dict[str, Any]:
@@ -73,8 +133,7 @@ class ConfigurationManager:
             raise FileNotFoundError(f"Config file not found: {config_file}")
         
         try:
-            with open(config_file, 'r', encoding='utf-8') as f:
-                config = yaml.safe_load(f)
+            config = load_yaml(config_file)
             
             if config is None:
                 config = {}
@@ -150,9 +209,9 @@ class ConfigurationManager:
         try:
             config = {
                 'cycle_time': plc_configuration.get_cycle_time(),
-                'models': plc_configuration.get_models(),
-                'algorithms': plc_configuration.get_algorithms(),
-                'connections': plc_configuration.get_connections()
+                'models': plc_configuration.get_models(mutable=True),
+                'algorithms': plc_configuration.get_algorithms(mutable=True),
+                'connections': plc_configuration.get_connections(mutable=True)
             }
             
             # 如果有execution_order，也获取
@@ -189,6 +248,41 @@ class ConfigurationManager:
             - added_connections: 新增的连接关系
             - removed_connections: 删除的连接关系
             - cycle_time_changed: cycle_time是否改变
+        
+        两个配置的内容与最近分析过的某一对相同时直接复用缓存的结果
+        （按内容摘要匹配，返回副本，调用方修改不会污染缓存）。
+        """
+        digest1 = _config_digest(config1)
+        digest2 = _config_digest(config2) if digest1 is not None else None
+        key = (digest1, digest2) if digest2 is not None else None
+        
+        if key is not None:
+            cached = self._diff_cache.get(key)
+            if cached is not None:
+                self._diff_cache.move_to_end(key)
+                logger.debug("Config diff reused from cache")
+                return copy.deepcopy(cached)
+        
+        diff = self._compute_config_diff(config1, config2)
+        
+        if key is not None:
+            self._diff_cache[key] = copy.deepcopy(diff)
+            while len(self._diff_cache) > self.DIFF_CACHE_SIZE:
+                self._diff_cache.popitem(last=False)
+        
+        logger.info("Config diff analyzed")
+        return diff
+    
+    def _compute_config_diff(self, config1: Dict[str, Any], config2: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        逐项比较两个组态配置，生成差异（analyze_config_diff 的实际计算）
+        
+        Args:
+            config1: 第一个配置（通常是文件配置）
+            config2: 第二个配置（通常是PLC运行配置）
+        
+        Returns:
+            差异分析结果字典，格式见 analyze_config_diff
         """
         diff = {
             'added_models': {},
@@ -269,7 +363,6 @@ class ConfigurationManager:
             if conn not in connections1:
                 diff['removed_connections'].append(conn)
         
-        logger.info("Config diff analyzed")
         return diff
     
     def _normalize_connections(self, connections: List[Dict[str, str]]) -> List[Dict[str, str]]:
@@ -391,8 +484,7 @@ class ConfigurationManager:
                 
                 # 发送到Redis频道
                 channel = "plc:config:update"
-                message_json = json.dumps(update_message, ensure_ascii=False)
-                redis_client.publish(channel, message_json.encode('utf-8'))
+                redis_client.publish(channel, _encode_message(update_message))
                 
                 logger.info(f"Configuration update message sent to Redis channel '{channel}'")
                 logger.info(f"Changes: added_models={len(diff['added_models'])}, "
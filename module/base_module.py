@@ -49,6 +49,18 @@ class BaseModule(ABC):
         """
         return {k: v for k, v in self.__dict__.items() if not k.startswith('_')}
     
+    def get_params_into(self, out: dict, keys):
+        """
+        将模型的所有参数直接写入目标字典（与 get_params() 内容一致）
+        
+        不创建中间参数字典，参数名经 keys 映射后写入 out。
+        
+        Args:
+            out: 目标字典
+            keys: 参数名到目标键的映射（如 参数名 -> "实例名.参数名"）
+        """
+        out.update((keys[k], v) for k, v in self.__dict__.items() if not k.startswith('_'))
+    
     def get_storable_params(self):
         """
         获取需要存储到历史数据库的参数（运行时变化的参数）
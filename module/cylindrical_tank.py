@@ -3,6 +3,7 @@
 基于托里拆利定律实现液位动态计算
 """
 import math
+import numpy as np
 from module.base_module import BaseModule
 from utils.logger import get_logger
 
@@ -122,6 +123,43 @@ class CylindricalTank(BaseModule):
         
         return self.level
     
+    @classmethod
+    def execute_batch(cls, tanks: list, step: float):
+        """
+        批量执行多个水箱模型计算（向量化）
+        
+        将各实例的状态收集为NumPy数组（SoA），按与 execute() 相同的公式和
+        运算顺序一次性计算，再写回各实例属性。调用方需保证这些实例之间
+        没有连接关系（同一执行阶段内）。
+        
+        Args:
+            tanks: 水箱实例列表
+            step: 步进时间
+        """
+        valve_opening = np.array([t.valve_opening for t in tanks], dtype=np.float64)
+        level = np.array([t.level for t in tanks], dtype=np.float64)
+        height = np.array([t.height for t in tanks], dtype=np.float64)
+        inlet_area = np.array([t.inlet_area for t in tanks], dtype=np.float64)
+        inlet_velocity = np.array([t.inlet_velocity for t in tanks], dtype=np.float64)
+        outlet_area = np.array([t.outlet_area for t in tanks], dtype=np.float64)
+        base_area = np.array([t.base_area for t in tanks], dtype=np.float64)
+        
+        valve_opening_ratio = np.maximum(0.0, np.minimum(100.0, valve_opening)) / 100.0
+        inlet_flow = inlet_area * inlet_velocity * valve_opening_ratio
+        
+        # 托里拆利定律，液位为0时出水流量为0
+        outlet_flow = np.where(
+            level > 0,
+            outlet_area * np.sqrt(2 * cls.GRAVITY * np.maximum(level, 0.0)),
+            0.0
+        )
+        
+        level_change = (inlet_flow - outlet_flow) * step / base_area
+        level = np.maximum(0.0, np.minimum(height, level + level_change))
+        
+        for tank, new_level in zip(tanks, level.tolist()):
+            tank.level = new_level
+    
     def get_storable_params(self):
         """
         获取需要存储到历史数据库的参数
@@ -2,6 +2,7 @@
 阀门模型
 实现阀门开度的线性行程过程
 """
+import numpy as np
 from module.base_module import BaseModule
 from utils.logger import get_logger
 
@@ -127,6 +128,51 @@ class Valve(BaseModule):
         
         return self.current_opening
     
+    @classmethod
+    def execute_batch(cls, valves: list, step: float):
+        """
+        批量执行多个阀门模型计算（向量化）
+        
+        将各实例的状态收集为NumPy数组（SoA），按与 execute() 相同的公式
+        一次性计算，再写回各实例属性。调用方需保证这些实例之间没有连接关系
+        （同一执行阶段内）。
+        
+        Args:
+            valves: 阀门实例列表
+            step: 步进时间
+        
+        Raises:
+            ValueError: 如果step不合法
+        """
+        if step <= 0:
+            raise ValueError(f"step must be positive, got {step}")
+        
+        min_opening = np.array([v.min_opening for v in valves], dtype=np.float64)
+        max_opening = np.array([v.max_opening for v in valves], dtype=np.float64)
+        full_travel_time = np.array([v.full_travel_time for v in valves], dtype=np.float64)
+        current = np.array([v.current_opening for v in valves], dtype=np.float64)
+        target = np.array([v.target_opening for v in valves], dtype=np.float64)
+        
+        # 限制目标开度范围
+        target = np.maximum(min_opening, np.minimum(max_opening, target))
+        opening_diff = target - current
+        
+        # 按满行程时间计算本次步进的最大开度变化
+        max_change = (max_opening - min_opening) / full_travel_time * step
+        change = np.where(
+            opening_diff > 0,
+            np.minimum(max_change, opening_diff),
+            np.maximum(-max_change, opening_diff)
+        )
+        moved = np.maximum(min_opening, np.minimum(max_opening, current + change))
+        
+        # 开度差小于精度阈值时直接设置为目标值
+        current = np.where(np.abs(opening_diff) < cls.PRECISION, target, moved)
+        
+        for valve, new_target, new_current in zip(valves, target.tolist(), current.tolist()):
+            valve.target_opening = new_target
+            valve.current_opening = new_current
+    
     def get_storable_params(self) -> dict:
         """
         获取需要存储到历史数据库的参数
@@ -67,10 +67,16 @@ class Clock:
         """
         return self.current_time
     
-    def sleep_to_next_cycle(self):
+    def sleep_to_next_cycle(self, stop_event=None):
         """
         睡眠到下一个周期（用于实时运行）
+        
+        Args:
+            stop_event: 停止事件（threading.Event），提供时在等待期间被设置会立即返回
         """
         # 正常模式：等待一个周期时间
         if self.cycle_time > 0:
-            time.sleep(self.cycle_time)
+            if stop_event is not None:
+                stop_event.wait(self.cycle_time)
+            else:
+                time.sleep(self.cycle_time)
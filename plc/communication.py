@@ -12,6 +12,7 @@ from asyncua import Server, ua
 from asyncua.common.methods import uamethod
 from plc.plc_configuration import Configuration
 from utils.logger import get_logger
+from utils.redis_pool import get_pool
 
 logger = get_logger()
 
@@ -49,14 +50,8 @@ class Communication:
         self.server_url = server_url
         self.opcua_config = opcua_config or {}
         
-        # 初始化Redis连接
-        self.redis_client = redis.Redis(
-            host=redis_config.get('host', 'localhost'),
-            port=redis_config.get('port', 6379),
-            password=redis_config.get('password'),
-            db=redis_config.get('db', 0),
-            decode_responses=True
-        )
+        # 初始化Redis连接（与同一进程内的其他模块共用连接池）
+        self.redis_client = redis.Redis(connection_pool=get_pool(redis_config))
         
         # 测试Redis连接
         try:
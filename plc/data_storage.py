@@ -8,17 +8,21 @@ import json
 import sqlite3
 import redis
 from datetime import datetime
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Tuple
 from sqlalchemy import create_engine, Column, Float, String, DateTime, Integer
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from plc.plc_configuration import Configuration
 from utils.logger import get_logger
+from utils.redis_pool import get_pool
 
 logger = get_logger()
 
 Base = declarative_base()
 
+# 参数名解析缓存的未命中标记（None表示参数名无法解析）
+_UNPARSED = object()
+
 
 class DataRecord(Base):
     """数据记录表"""
@@ -47,6 +51,16 @@ class DataStorage:
     # Redis键前缀
     REDIS_KEY_PREFIX = "plc:data:"
     
+    # 历史数据流的条目字段名（与Runner一致）：完整数据帧、差量帧
+    HISTORY_STREAM_FIELD = "d"
+    HISTORY_STREAM_DELTA_FIELD = "p"
+    # 条目序号、差量帧的基准完整数据帧序号（与Runner一致）
+    HISTORY_STREAM_SEQ_FIELD = "s"
+    HISTORY_STREAM_BASE_FIELD = "b"
+    
+    # 每次从历史数据流读取的最大条目数
+    HISTORY_READ_BATCH = 1000
+    
     def __init__(self, configuration: Configuration, redis_config: dict,
                  db_path: str = "plc_data.db", enable_storage_loop: bool = False):
         """
@@ -64,14 +78,8 @@ class DataStorage:
         self.db_path = db_path
         self.enable_storage_loop = enable_storage_loop
         
-        # 初始化Redis连接
-        self.redis_client = redis.Redis(
-            host=redis_config.get('host', 'localhost'),
-            port=redis_config.get('port', 6379),
-            password=redis_config.get('password'),
-            db=redis_config.get('db', 0),
-            decode_responses=True
-        )
+        # 初始化Redis连接（与同一进程内的其他模块共用连接池）
+        self.redis_client = redis.Redis(connection_pool=get_pool(redis_config))
         
         # 测试Redis连接
         try:
@@ -122,12 +130,23 @@ class DataStorage:
         # 记录上次存储的模拟时间（用于确保按模拟时间间隔存储）
         self._last_stored_sim_time: Optional[float] = None
         
-        # 记录已处理的Redis历史数据索引（用于避免重复处理）
-        self._processed_history_count = 0
+        # 记录已处理的Redis历史数据流条目ID（用于避免重复处理）
+        self._last_history_id = "0-0"
+        
+        # 由历史数据流完整数据帧和差量帧重建的当前参数（收到第一个完整数据帧前为None）
+        self._history_params: Optional[Dict[str, Any]] = None
+        # 重建结果对应的完整数据帧序号、最后叠加的条目序号（用于发现被裁剪或丢失的条目）
+        self._history_base_seq: Optional[int] = None
+        self._history_seq: Optional[int] = None
         
         # 批量提交计数器（用于减少磁盘I/O）
         self._flush_count = 0
         
+        # 参数名解析缓存：参数名 -> (实例名, 参数类型)，无法解析的参数名为None
+        # 组态版本变化时清空（实例类型可能变化）
+        self._param_meta: Dict[str, Optional[Tuple[str, str]]] = {}
+        self._param_meta_version = self.config.version
+        
         logger.info(f"DataStorage initialized with db_path={db_path}")
     
     def _create_indexes(self):
@@ -199,36 +218,32 @@ class DataStorage:
             try:
                 records = []
                 
+                # 组态在其他模块中被修改过（例如Runner应用在线配置），解析缓存已过期
+                config_version = self.config.version
+                if config_version != self._param_meta_version:
+                    self._param_meta.clear()
+                    self._param_meta_version = config_version
+                param_meta = self._param_meta
+                
                 for param_name, param_value in params.items():
-                    # 解析参数名：instance_name.param_name
-                    parts = param_name.split('.', 1)
-                    if len(parts) != 2:
+                    # 只存储数值类型
+                    if not isinstance(param_value, (int, float)):
                         continue
                     
-                    instance_name = parts[0]
-                    param = parts[1]
-                    
-                    # 判断是模型还是算法
-                    models_config = self.config.get_models()
-                    algorithms_config = self.config.get_algorithms()
-                    
-                    if instance_name in models_config:
-                        param_type = 'model'
-                    elif instance_name in algorithms_config:
-                        param_type = 'algorithm'
-                    else:
-                        param_type = 'unknown'
+                    meta = param_meta.get(param_name, _UNPARSED)
+                    if meta is _UNPARSED:
+                        meta = param_meta[param_name] = self._parse_param_name(param_name)
+                    if meta is None:
+                        continue
                     
-                    # 只存储数值类型
-                    if isinstance(param_value, (int, float)):
-                        record = DataRecord(
-                            timestamp=timestamp,
-                            param_name=param_name,
-                            param_value=float(param_value),
-                            instance_name=instance_name,
-                            param_type=param_type
-                        )
-                        records.append(record)
+                    instance_name, param_type = meta
+                    records.append(DataRecord(
+                        timestamp=timestamp,
+                        param_name=param_name,
+                        param_value=float(param_value),
+                        instance_name=instance_name,
+                        param_type=param_type
+                    ))
                 
                 # 批量插入（优化：减少commit频率以降低磁盘I/O）
                 if records:
@@ -248,35 +263,122 @@ class DataStorage:
                 self.session.rollback()
                 self._flush_count = 0
     
+    def _parse_param_name(self, param_name: str) -> Optional[Tuple[str, str]]:
+        """
+        解析参数名，得到实例名和参数类型
+        
+        Args:
+            param_name: 参数名，格式为"实例名.参数名"
+        
+        Returns:
+            (实例名, 参数类型)，参数类型为'model'、'algorithm'或'unknown'；
+            参数名格式不正确时返回None
+        """
+        # 解析参数名：instance_name.param_name
+        parts = param_name.split('.', 1)
+        if len(parts) != 2:
+            return None
+        
+        instance_name = parts[0]
+        
+        # 判断是模型还是算法
+        if instance_name in self.config.get_models():
+            return instance_name, 'model'
+        if instance_name in self.config.get_algorithms():
+            return instance_name, 'algorithm'
+        return instance_name, 'unknown'
+    
+    def _decode_history_entry(self, fields: Dict[str, str]) -> Optional[Dict[str, Any]]:
+        """
+        解码历史数据流条目，并重建完整参数
+        
+        完整数据帧替换当前参数，差量帧叠加到当前参数上。
+        在收到第一个完整数据帧之前的差量帧无法重建，直接跳过。
+        
+        历史数据流以 MAXLEN ~ 裁剪，读取落后超过约 Runner.HISTORY_STREAM_MAXLEN 条时，
+        基准完整数据帧和部分差量帧可能已被裁剪。每个条目带递增序号（字段s），差量帧另带
+        基准完整数据帧的序号（字段b）；差量帧的基准与重建结果不一致，或序号不紧接上一个条目时，
+        丢弃重建结果，跳过差量帧直到下一个完整数据帧，避免把差量叠加到过期的基准上。
+        
+        Args:
+            fields: 流条目字段
+        
+        Returns:
+            数据字典（params为重建后的完整参数），无法重建时返回None
+        """
+        full_json = fields.get(self.HISTORY_STREAM_FIELD)
+        if full_json is not None:
+            data = json.loads(full_json)
+            self._history_params = dict(data.get('params', {}))
+            self._history_base_seq = self._history_seq = self._entry_seq(fields, self.HISTORY_STREAM_SEQ_FIELD)
+            data['params'] = self._history_params
+            return data
+        
+        delta_json = fields.get(self.HISTORY_STREAM_DELTA_FIELD)
+        if delta_json is None or self._history_params is None:
+            return None
+        
+        seq = self._entry_seq(fields, self.HISTORY_STREAM_SEQ_FIELD)
+        base_seq = self._entry_seq(fields, self.HISTORY_STREAM_BASE_FIELD)
+        if (seq is None or self._history_seq is None
+                or base_seq != self._history_base_seq or seq != self._history_seq + 1):
+            logger.warning(
+                f"History stream gap detected (entry {seq}, base {base_seq}, "
+                f"last {self._history_seq}, base {self._history_base_seq}), "
+                f"waiting for next keyframe"
+            )
+            self._history_params = None
+            self._history_base_seq = self._history_seq = None
+            return None
+        
+        data = json.loads(delta_json)
+        self._history_params.update(data.get('params', {}))
+        self._history_seq = seq
+        data['params'] = self._history_params
+        return data
+    
+    @staticmethod
+    def _entry_seq(fields: Dict[str, str], field: str) -> Optional[int]:
+        """
+        读取流条目中的序号字段
+        
+        Args:
+            fields: 流条目字段
+            field: 序号字段名
+        
+        Returns:
+            序号，字段缺失或无法解析时返回None
+        """
+        try:
+            return int(fields[field])
+        except (KeyError, TypeError, ValueError):
+            return None
+    
     def _storage_loop(self):
         """
         存储循环（从Redis读取数据并存储到SQLite）
         
-        在时间加速模式下，从Redis历史列表批量读取数据，
+        在时间加速模式下，从Redis历史数据流批量读取数据，
         按照模拟时间间隔决定是否存储，确保每个存储周期（模拟时间）的数据都被记录
         """
         while self._running:
             try:
                 cycle_start_time = time.time()
                 
-                # 从Redis历史列表读取未处理的数据
-                history_key = f"{self.REDIS_KEY_PREFIX}history"
-                history_length = self.redis_client.llen(history_key)
+                # 从Redis历史数据流读取上次处理位置之后的数据（按时间顺序，从旧到新）
+                history_key = f"{self.REDIS_KEY_PREFIX}stream"
+                response = self.redis_client.xread(
+                    {history_key: self._last_history_id},
+                    count=self.HISTORY_READ_BATCH
+                )
+                entries = response[0][1] if response else []
                 
-                if history_length > self._processed_history_count:
-                    # 有新的历史数据，批量读取
-                    new_data_count = history_length - self._processed_history_count
-                    # 读取所有未处理的数据（从新到旧）
-                    new_data_list = self.redis_client.lrange(
-                        history_key, 
-                        self._processed_history_count, 
-                        history_length - 1
-                    )
-                    
-                    # 按时间顺序处理（从旧到新）
-                    for json_data in reversed(new_data_list):
+                if entries:
+                    for entry_id, fields in entries:
                         try:
-                            data = json.loads(json_data)
+                            data = self._decode_history_entry(fields)
+                            if data is None:
+                                continue
                             params = data.get('params', {})
                             timestamp_str = data.get('timestamp')
                             
@@ -308,12 +410,12 @@ class DataStorage:
                         except Exception as e:
                             logger.error(f"Failed to process history data: {e}", exc_info=True)
                     
-                    # 更新已处理的数据计数
-                    self._processed_history_count = history_length
+                    # 更新已处理的数据位置
+                    self._last_history_id = entries[-1][0]
                 
                 else:
-                    # 没有新的history数据，尝试从current键读取（用于正常速度模式或history列表为空的情况）
-                    # 注意：在正常速度模式下，history列表也会被更新，但可能更新较慢
+                    # 没有新的history数据，尝试从current键读取（用于正常速度模式或历史数据流为空的情况）
+                    # 注意：在正常速度模式下，历史数据流也会被更新，但可能更新较慢
                     # 这里作为备用方案，确保数据能够被存储
                     redis_key = f"{self.REDIS_KEY_PREFIX}current"
                     json_data = self.redis_client.get(redis_key)
@@ -377,6 +479,7 @@ class DataStorage:
             end_time: 结束时间（可选）
             limit: 返回记录数限制，默认1000
             sample_interval: 采样间隔（秒），如果提供，会按时间间隔采样，减少返回数据量
+                            （按sample_interval秒对齐分桶，每个桶取最早时间戳的记录）
         
         Returns:
             历史数据记录列表
@@ -385,52 +488,29 @@ class DataStorage:
             import time as time_module
             query_start_time = time_module.time()
             
-            query = self.session.query(DataRecord)
-            
-            # 应用过滤条件
+            # 过滤条件（记录查询和采样子查询共用）
+            conditions = []
             if param_name:
-                query = query.filter(DataRecord.param_name == param_name)
+                conditions.append(DataRecord.param_name == param_name)
             if instance_name:
-                query = query.filter(DataRecord.instance_name == instance_name)
+                conditions.append(DataRecord.instance_name == instance_name)
             if start_time:
-                query = query.filter(DataRecord.timestamp >= start_time)
+                conditions.append(DataRecord.timestamp >= start_time)
             if end_time:
-                query = query.filter(DataRecord.timestamp <= end_time)
+                conditions.append(DataRecord.timestamp <= end_time)
             
-            # 如果指定了采样间隔，先获取所有记录的时间戳，然后采样
+            query = self.session.query(DataRecord).filter(*conditions)
+            
+            # 如果指定了采样间隔，在数据库中按时间分桶采样：每个sample_interval秒的时间桶
+            # 取最早的时间戳，只返回这些时间戳的记录（时间戳不再全部取回Python中逐个比较）
             if sample_interval and sample_interval > 0:
-                # 先获取所有符合条件的时间戳（去重）
-                time_query = self.session.query(DataRecord.timestamp).distinct()
-                if param_name:
-                    time_query = time_query.filter(DataRecord.param_name == param_name)
-                if instance_name:
-                    time_query = time_query.filter(DataRecord.instance_name == instance_name)
-                if start_time:
-                    time_query = time_query.filter(DataRecord.timestamp >= start_time)
-                if end_time:
-                    time_query = time_query.filter(DataRecord.timestamp <= end_time)
-                time_query = time_query.order_by(DataRecord.timestamp)
-                
-                all_timestamps = [row[0] for row in time_query.all()]
+                from sqlalchemy import cast, func, select
                 
-                # 采样时间戳
-                sampled_timestamps = []
-                last_sampled_time = None
-                for ts in all_timestamps:
-                    if last_sampled_time is None:
-                        sampled_timestamps.append(ts)
-                        last_sampled_time = ts
-                    else:
-                        time_diff = (ts - last_sampled_time).total_seconds()
-                        if time_diff >= sample_interval:
-                            sampled_timestamps.append(ts)
-                            last_sampled_time = ts
-                
-                # 只查询采样后的时间戳
-                if sampled_timestamps:
-                    query = query.filter(DataRecord.timestamp.in_(sampled_timestamps))
-                else:
-                    return []
+                # 时间戳先换算为整数毫秒（julianday为浮点天数，直接乘86400会在桶边界产生误差）
+                epoch_ms = func.round((func.julianday(DataRecord.timestamp) - 2440587.5) * 86400000.0)
+                bucket = cast(epoch_ms / (sample_interval * 1000.0), Integer)
+                sampled_timestamps = select(func.min(DataRecord.timestamp)).where(*conditions).group_by(bucket)
+                query = query.filter(DataRecord.timestamp.in_(sampled_timestamps))
             
             # 按时间倒序排列
             query = query.order_by(DataRecord.timestamp.desc())
@@ -459,6 +539,56 @@ class DataStorage:
             logger.error(f"Failed to query history: {e}", exc_info=True)
             return []
     
+    def query_history_diagnostic(self, param_name: str, start_time: datetime, end_time: datetime,
+                                 limit: int = 1000, sample_interval: float = None) -> Dict[str, Any]:
+        """
+        查询历史数据诊断信息（参数总记录数、时间范围内记录数和采样后的记录）
+        
+        两个计数由同一条聚合查询沿param_name索引一次扫描得到，
+        不再为统计时间范围内的记录数而取回全部未采样记录。
+        
+        Args:
+            param_name: 参数名称，如"pid1.pv"
+            start_time: 开始时间
+            end_time: 结束时间
+            limit: 采样后返回记录数限制，默认1000
+            sample_interval: 采样间隔（秒），同query_history
+        
+        Returns:
+            诊断信息字典：total_count（该参数总记录数）、range_count（时间范围内记录数，
+            不采样）、records（采样后的记录列表，格式同query_history）；
+            计数查询失败时两个计数为None
+        """
+        try:
+            from sqlalchemy import and_, case, func
+            
+            in_range = and_(DataRecord.timestamp >= start_time, DataRecord.timestamp <= end_time)
+            total_count, range_count = self.session.query(
+                func.count(DataRecord.id),
+                func.sum(case((in_range, 1), else_=0))
+            ).filter(
+                DataRecord.param_name == param_name
+            ).one()
+            range_count = range_count or 0  # 没有记录时SUM为NULL
+        except Exception as e:
+            logger.error(f"Failed to query history counts: {e}", exc_info=True)
+            total_count, range_count = None, None
+        
+        # 时间范围内没有记录时不再执行采样查询
+        records = [] if range_count == 0 else self.query_history(
+            param_name=param_name,
+            start_time=start_time,
+            end_time=end_time,
+            limit=limit,
+            sample_interval=sample_interval
+        )
+        
+        return {
+            'total_count': total_count,
+            'range_count': range_count,
+            'records': records
+        }
+    
     def get_statistics(self, param_name: str, start_time: datetime = None,
                       end_time: datetime = None) -> Dict[str, Any]:
         """
@@ -558,6 +688,9 @@ class DataStorage:
     
     def update_configuration(self):
         """更新配置（在线配置时调用）"""
+        with self._lock:
+            self._param_meta.clear()
+            self._param_meta_version = self.config.version
         logger.info("Configuration updated in DataStorage")
     
     def start(self):
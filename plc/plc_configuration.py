@@ -3,14 +3,152 @@ PLC组态模块
 支持在线和离线配置，管理物理模型实例、算法实例及其关联关系
 """
 import os
-import yaml
+import copy
+import hashlib
+import logging
 import threading
-from typing import Dict, List, Any, Optional, Tuple
+from collections import deque
+from contextlib import contextmanager
+from types import MappingProxyType
+from typing import Dict, List, Set, Any, Optional, Tuple, NamedTuple, Mapping, Sequence, FrozenSet
 from utils.logger import get_logger
 
 logger = get_logger()
 
 
+_yaml_module = None
+_SafeDumper = None
+
+
+def _yaml():
+    """
+    延迟导入yaml模块
+    
+    PyYAML导入较慢，只有真正写文件时才需要，
+    仅通过字典构建组态的代码路径不承担该开销（读取文件由 utils.yaml_cache 负责）。
+    首次导入时优先选用LibYAML的C实现（CSafeDumper），
+    不可用时回退到纯Python实现。
+    
+    Returns:
+        yaml模块
+    """
+    global _yaml_module, _SafeDumper
+    if _yaml_module is None:
+        import yaml
+        try:
+            from yaml import CSafeDumper as dumper
+        except ImportError:
+            from yaml import SafeDumper as dumper
+        _SafeDumper = dumper
+        _yaml_module = yaml
+    return _yaml_module
+
+
+def _dump_yaml(data: Any, stream=None) -> Optional[str]:
+    """使用SafeDumper（优先C实现）输出YAML；stream为None时返回字符串"""
+    return _yaml().dump(data, stream, Dumper=_SafeDumper, allow_unicode=True, default_flow_style=False)
+
+
+# 汇总日志中每类最多列出的实例名数量
+_LOG_SAMPLE_NAMES = 5
+
+
+def _sample_names(*groups) -> str:
+    """
+    生成汇总日志中的实例名示例
+    
+    Args:
+        *groups: 若干实例名集合（列表或以实例名为键的字典）
+    
+    Returns:
+        str: 形如 " [a, b, c, ...]" 的字符串，最多列出 _LOG_SAMPLE_NAMES 个实例名，
+             没有实例名时返回空字符串
+    """
+    names = [name for group in groups for name in group]
+    if not names:
+        return ""
+    sample = ", ".join(names[:_LOG_SAMPLE_NAMES])
+    if len(names) > _LOG_SAMPLE_NAMES:
+        sample += ", ..."
+    return f" [{sample}]"
+
+
+# 配置文件写入缓冲区大小
+_WRITE_BUFFER_SIZE = 64 * 1024
+
+
+def _load_yaml_cached(path: str) -> Any:
+    """
+    读取并解析YAML文件（通过 utils.yaml_cache 的LRU缓存，文件未变化时复用上次的解析结果）
+    
+    返回深拷贝，调用方修改不会污染缓存。
+    
+    Args:
+        path: YAML文件路径
+    
+    Returns:
+        解析后的数据
+    """
+    from utils.yaml_cache import load_yaml  # 与yaml一样只在读取文件时导入
+    return load_yaml(path)
+
+
+class _ConfigSnapshot(NamedTuple):
+    """
+    组态只读快照
+    
+    每次配置修改后整体重建，读取方直接引用，不加锁、不复制。
+    实例名到实例配置的映射和完整配置以 MappingProxyType 只读视图、连接以元组形式保存；
+    config 中的 models/algorithms/connections 同样是这些只读视图。
+    各实例的配置字典和连接字典是重建快照时的副本（未变化的实例复用上一个快照的副本），
+    与组态内部不共享：修改它们不会改变组态，但会影响其他读取方，因此仍不得修改，
+    参数修改必须通过 online_* 方法。
+    """
+    cycle_time: float
+    models: Mapping[str, Dict[str, Any]]
+    algorithms: Mapping[str, Dict[str, Any]]
+    connections: Tuple[Dict[str, str], ...]
+    all_instances: Tuple[str, ...]
+    config: Mapping[str, Any]
+    version: int
+    # 预解析的实例间连接 (from_obj, to_obj)，只包含两端都是已知实例的连接
+    instance_pairs: Tuple[Tuple[str, str], ...]
+    instance_set: FrozenSet[str]
+
+
+def _connection_endpoints(conn: Dict[str, str]) -> Optional[Tuple[str, str]]:
+    """
+    解析连接两端的实例名（忽略参数名）
+    
+    Args:
+        conn: 连接配置，新格式 {"from": "inst.param", "to": "inst.param"}，
+              或旧格式 {"from": inst, "from_param": ..., "to": inst, "to_param": ...}
+    
+    Returns:
+        (from_obj, to_obj)，格式不合法时返回None
+    """
+    # 兼容旧格式
+    if 'from_param' in conn:
+        return conn['from'], conn['to']
+    
+    # 新格式：从 "instance.param" 解析
+    from_parts = conn.get('from', '').split('.', 1)
+    to_parts = conn.get('to', '').split('.', 1)
+    if len(from_parts) != 2 or len(to_parts) != 2:
+        return None
+    return from_parts[0], to_parts[0]
+
+
+def _connection_key(conn: Dict[str, str]) -> Tuple[Optional[str], Optional[str], Optional[str], Optional[str]]:
+    """
+    连接的哈希键，用于O(1)判断连接是否已存在
+    
+    Returns:
+        (from, to, from_param, to_param)，新格式的参数名为None
+    """
+    return conn.get('from'), conn.get('to'), conn.get('from_param'), conn.get('to_param')
+
+
 class Configuration:
     """
     PLC组态类
@@ -38,7 +176,32 @@ class Configuration:
             config_dict: 配置字典（如果提供config_file则忽略此参数）
             local_dir: 本地配置目录（如果提供，从本地目录加载config.yaml）
         """
-        self._lock = threading.RLock()  # 用于在线配置的线程安全
+        # 写锁：所有修改配置的方法持有；读取走只读快照，无需加锁
+        # 使用可重入锁，batch_update 内部可以继续调用各 online_* 方法
+        self._lock = threading.RLock()
+        # 批量更新嵌套深度；批量期间只标记脏，退出时统一重建快照
+        self._batch_depth = 0
+        self._dirty = False
+        # 连接位置索引是否需要重建（批量期间删除连接后置位）
+        self._index_stale = False
+        # 已保存文件记录：{绝对路径: (内容摘要, (st_mtime_ns, st_size))}，用于跳过未变化的写入
+        self._saved_files: Dict[str, Tuple[str, Tuple[int, int]]] = {}
+        # 快照中各实例配置的副本缓存：{实例名: (组态内部的实例配置字典, 副本)}
+        # 在线修改实例时替换实例配置字典（写时复制），重建快照时只复制被替换的实例
+        self._model_copies: Dict[str, Tuple[Dict[str, Any], Dict[str, Any]]] = {}
+        self._algorithm_copies: Dict[str, Tuple[Dict[str, Any], Dict[str, Any]]] = {}
+        # 扁平化的快照参数 {instance.PARAM: value}，随在线配置增量维护
+        self._snapshot_flat: Dict[str, Any] = {}
+        # 配置版本号：每次修改配置时递增，用于缓存失效判断
+        self._config_version = 0
+        self._cached_order: Optional[Tuple[int, List[str]]] = None
+        self._cached_circuits: Optional[Tuple[int, Dict[str, List[str]]]] = None
+        self._cached_graphs: Optional[Tuple[int, Dict[str, List[str]], Dict[str, List[str]]]] = None
+        # 连接索引：实例名 -> 该实例作为源/目标的连接在 config['connections'] 中的位置
+        self._by_from: Dict[str, List[int]] = {}
+        self._by_to: Dict[str, List[int]] = {}
+        # 已存在连接的哈希键集合
+        self._connection_keys: Set[Tuple[Optional[str], Optional[str], Optional[str], Optional[str]]] = set()
         self.local_dir = local_dir or self.DEFAULT_LOCAL_DIR
         self.local_config_file = os.path.join(self.local_dir, "config.yaml")
         
@@ -50,8 +213,7 @@ class Configuration:
         
         if config_file:
             # 显式指定配置文件，直接加载
-            with open(config_file, 'r', encoding='utf-8') as f:
-                self.config = yaml.safe_load(f)
+            self.config = _load_yaml_cached(config_file)
             logger.info(f"Configuration loaded from file: {config_file}")
         elif config_dict:
             # 从字典创建
@@ -59,8 +221,7 @@ class Configuration:
             logger.info("Configuration created from dictionary")
         elif local_dir and os.path.exists(self.local_config_file):
             # 从本地目录加载
-            with open(self.local_config_file, 'r', encoding='utf-8') as f:
-                self.config = yaml.safe_load(f)
+            self.config = _load_yaml_cached(self.local_config_file)
             logger.info(f"Configuration loaded from local directory: {self.local_config_file}")
         else:
             # 默认空配置
@@ -72,8 +233,24 @@ class Configuration:
             }
             logger.info("Configuration initialized with default empty config")
         
+        self._snapshot: _ConfigSnapshot = None
+        self._rematerialize()
+        self._rebuild_snapshot_flat()
         logger.info("Configuration initialized")
     
+    @property
+    def version(self) -> int:
+        """
+        组态版本号
+        
+        每次配置修改后递增。共享同一个Configuration的模块可以记录自己见过的版本号，
+        版本号变化时再刷新由组态派生的缓存。
+        
+        Returns:
+            当前组态快照的版本号
+        """
+        return self._snapshot.version
+    
     def get_cycle_time(self) -> float:
         """
         获取系统运行周期
@@ -81,146 +258,338 @@ class Configuration:
         Returns:
             运行周期（秒）
         """
-        with self._lock:
-            return self.config.get('cycle_time', self.DEFAULT_CYCLE_TIME)
+        return self._snapshot.cycle_time
     
-    def get_models(self) -> Dict[str, Dict[str, Any]]:
+    def get_models(self, mutable: bool = False) -> Mapping[str, Dict[str, Any]]:
         """
         获取所有模型实例配置
         
+        默认返回只读快照中的只读视图（不复制）。各实例的配置字典是快照副本
+        （与组态不共享，但由所有读取方共用），不得修改，修改参数请使用 online_update_model。
+        
+        Args:
+            mutable: 为True时返回可修改的浅拷贝（例如需要序列化或修改时）
+        
         Returns:
             模型配置字典，key为模型名称，value为模型配置
         """
-        with self._lock:
-            return self.config.get('models', {}).copy()
+        models = self._snapshot.models
+        return dict(models) if mutable else models
     
-    def get_algorithms(self) -> Dict[str, Dict[str, Any]]:
+    def get_algorithms(self, mutable: bool = False) -> Mapping[str, Dict[str, Any]]:
         """
         获取所有算法实例配置
         
+        默认返回只读快照中的只读视图（不复制）。各实例的配置字典是快照副本
+        （与组态不共享，但由所有读取方共用），不得修改，修改参数请使用 online_update_algorithm。
+        
+        Args:
+            mutable: 为True时返回可修改的浅拷贝（例如需要序列化或修改时）
+        
         Returns:
             算法配置字典，key为算法名称，value为算法配置
         """
-        with self._lock:
-            return self.config.get('algorithms', {}).copy()
+        algorithms = self._snapshot.algorithms
+        return dict(algorithms) if mutable else algorithms
     
-    def get_connections(self) -> List[Dict[str, str]]:
+    def get_connections(self, mutable: bool = False) -> Sequence[Dict[str, str]]:
         """
         获取所有连接关系
         
+        默认返回只读快照中的元组（不复制）。
+        
+        Args:
+            mutable: 为True时返回可修改的列表拷贝
+        
         Returns:
             连接关系列表，每个连接包含from、to、from_param、to_param
         """
-        with self._lock:
-            return self.config.get('connections', []).copy()
+        connections = self._snapshot.connections
+        return list(connections) if mutable else connections
     
-    def get_all_config(self) -> dict:
+    def get_all_config(self, mutable: bool = False) -> Mapping[str, Any]:
         """
         获取完整配置
         
+        默认返回只读快照中的只读视图（不复制），返回类型为 Mapping 而不是 dict：
+        其中 models/algorithms 为只读视图、connections 为元组，各实例的配置字典是所有读取方共用的快照副本，不得修改。
+        需要 dict 的调用方（如序列化、修改）请传 mutable=True。
+        
+        Args:
+            mutable: 为True时返回可修改的浅拷贝（models/algorithms为dict、connections为list，
+                     各实例的配置字典仍是快照副本）
+        
         Returns:
-            完整配置字典
+            完整配置（只读视图，mutable为True时为dict）
         """
-        with self._lock:
-            return self.config.copy()
+        config = self._snapshot.config
+        if not mutable:
+            return config
+        return {
+            **config,
+            'models': dict(config['models']),
+            'algorithms': dict(config['algorithms']),
+            'connections': list(config['connections'])
+        }
     
-    def get_all_instances(self) -> List[str]:
+    def get_all_instances(self) -> Sequence[str]:
         """
         获取所有实例名称（模型+算法）
         
+        返回只读快照中的元组（不复制）。
+        
         Returns:
             所有实例名称列表
         """
+        return self._snapshot.all_instances
+    
+    @contextmanager
+    def batch_update(self):
+        """
+        批量更新上下文：只获取一次写锁，退出时只重建一次快照
+        
+        用法：
+            with config.batch_update():
+                config.online_add_model(...)
+                config.online_add_connection(...)
+        
+        批量期间读取方看到的仍是批量开始前的快照（快照中的实例配置是副本，
+        批量内的修改在退出前不可见）。
+        """
         with self._lock:
-            instances = []
-            instances.extend(self.config.get('models', {}).keys())
-            instances.extend(self.config.get('algorithms', {}).keys())
-            return instances
+            self._batch_depth += 1
+            try:
+                yield self
+            finally:
+                self._batch_depth -= 1
+                if self._batch_depth == 0 and self._dirty:
+                    # 连接索引是否需要重建由批量期间的修改记录在 _index_stale 中
+                    self._rematerialize(reindex=False)
+    
+    def _rematerialize(self, reindex: bool = True):
+        """
+        重建只读快照并递增配置版本号
+        
+        所有修改配置的方法都应在持有锁时、修改完成后调用。
+        快照整体替换（引用赋值是原子的），读取方无需加锁。
+        批量更新期间只标记为脏，由 batch_update 退出时统一重建。
+        
+        Args:
+            reindex: 连接位置索引是否已失效（调用方已增量维护索引时传False，不再全量重建）
+        """
+        if self._batch_depth:
+            self._dirty = True
+            if reindex:
+                self._index_stale = True
+            return
+        
+        config = self.config or {}
+        models, self._model_copies = self._copy_instances(config.get('models') or {}, self._model_copies)
+        algorithms, self._algorithm_copies = self._copy_instances(
+            config.get('algorithms') or {}, self._algorithm_copies
+        )
+        connections = tuple(dict(conn) for conn in config.get('connections') or ())
+        all_instances = tuple(models) + tuple(algorithms)
+        instance_set = frozenset(all_instances)
+        
+        # 写入时一次性解析连接字符串，读取路径（建图、索引）不再重复split
+        endpoints_list = [_connection_endpoints(conn) for conn in connections]
+        instance_pairs = tuple(
+            endpoints for endpoints in endpoints_list
+            if endpoints is not None
+            and endpoints[0] in instance_set and endpoints[1] in instance_set
+        )
+        
+        snapshot_models = MappingProxyType(models)
+        snapshot_algorithms = MappingProxyType(algorithms)
+        self._snapshot = _ConfigSnapshot(
+            cycle_time=config.get('cycle_time', self.DEFAULT_CYCLE_TIME),
+            models=snapshot_models,
+            algorithms=snapshot_algorithms,
+            connections=connections,
+            all_instances=all_instances,
+            # 完整配置引用上面的只读视图，其余顶层键（如 execution_order）同样复制
+            config=MappingProxyType({
+                **{key: copy.deepcopy(value) for key, value in config.items()
+                   if key not in ('models', 'algorithms', 'connections')},
+                'models': snapshot_models,
+                'algorithms': snapshot_algorithms,
+                'connections': connections
+            }),
+            version=self._config_version + 1,
+            instance_pairs=instance_pairs,
+            instance_set=instance_set
+        )
+        self._config_version += 1
+        self._dirty = False
+        if reindex or self._index_stale:
+            self._reindex_connections(endpoints_list)
+    
+    @staticmethod
+    def _copy_instances(instances: Dict[str, Dict[str, Any]],
+                        copies: Dict[str, Tuple[Dict[str, Any], Dict[str, Any]]]
+                        ) -> Tuple[Dict[str, Dict[str, Any]], Dict[str, Tuple[Dict[str, Any], Dict[str, Any]]]]:
+        """
+        为快照复制实例配置字典
+        
+        组态内部的实例配置字典未被替换时复用上一次的副本，只深拷贝新增或被替换的实例。
+        修改实例的方法必须替换实例配置字典而不是原地修改（写时复制）。
+        
+        Args:
+            instances: 组态内部的 {实例名: 实例配置}
+            copies: 上一次的副本缓存 {实例名: (实例配置, 副本)}
+        
+        Returns:
+            Tuple: ({实例名: 副本}, 新的副本缓存)
+        """
+        result: Dict[str, Dict[str, Any]] = {}
+        new_copies: Dict[str, Tuple[Dict[str, Any], Dict[str, Any]]] = {}
+        for name, instance in instances.items():
+            hit = copies.get(name)
+            if hit is None or hit[0] is not instance:
+                hit = (instance, copy.deepcopy(instance))
+            new_copies[name] = hit
+            result[name] = hit[1]
+        return result, new_copies
+    
+    def _reset_instance_copies(self):
+        """整体替换配置时清空副本缓存（新配置可能复用并原地修改过旧的实例配置字典）"""
+        self._model_copies = {}
+        self._algorithm_copies = {}
+    
+    def _reindex_connections(self, endpoints_list: Optional[List[Optional[Tuple[str, str]]]] = None):
+        """
+        重建按实例名索引的连接位置表和连接键集合
+        
+        删除实例时据此直接定位相关连接，添加连接时据此判重，无需逐条比较。
+        
+        Args:
+            endpoints_list: 与 config['connections'] 一一对应的已解析连接端点（可选，避免重复解析）
+        """
+        by_from: Dict[str, List[int]] = {}
+        by_to: Dict[str, List[int]] = {}
+        connections = (self.config or {}).get('connections') or []
+        self._connection_keys = {_connection_key(conn) for conn in connections}
+        if endpoints_list is None:
+            endpoints_list = [_connection_endpoints(conn) for conn in connections]
+        for i, endpoints in enumerate(endpoints_list):
+            if endpoints is None:
+                continue
+            from_obj, to_obj = endpoints
+            by_from.setdefault(from_obj, []).append(i)
+            by_to.setdefault(to_obj, []).append(i)
+        self._by_from = by_from
+        self._by_to = by_to
+        self._index_stale = False
+    
+    def _ensure_connection_index(self):
+        """批量更新期间连接被删除过时，先重建连接索引"""
+        if self._index_stale:
+            self._reindex_connections()
+    
+    def _remove_instance_connections(self, name: str):
+        """
+        删除与指定实例相关的所有连接（作为源或目标）
+        
+        Args:
+            name: 实例名称
+        """
+        self._ensure_connection_index()
+        victims = set(self._by_from.get(name, ())) | set(self._by_to.get(name, ()))
+        if victims and 'connections' in self.config:
+            self.config['connections'] = [
+                conn for i, conn in enumerate(self.config['connections'])
+                if i not in victims
+            ]
+            self._index_stale = True
+    
+    def _parsed_connections(self) -> Tuple[Tuple[Tuple[str, str], ...], FrozenSet[str]]:
+        """
+        获取已解析的实例间连接
+        
+        连接在快照重建时已一次性解析，只保留两端都是已知实例的连接，参数名被忽略。
+        
+        Returns:
+            Tuple: ((from_obj, to_obj), ...) 与实例名集合
+        """
+        snap = self._snapshot
+        return snap.instance_pairs, snap.instance_set
+    
+    def _parsed_graphs(self) -> Tuple[Dict[str, List[str]], Dict[str, List[str]]]:
+        """
+        一次遍历同时构建依赖图和连接图（按配置版本缓存）
+        
+        返回的图会被缓存复用，调用方不得修改。
+        
+        Returns:
+            Tuple[Dict[str, List[str]], Dict[str, List[str]]]: (依赖图, 连接图)
+        """
+        snap = self._snapshot
+        cached = self._cached_graphs
+        if cached is not None and cached[0] == snap.version:
+            return cached[1], cached[2]
+        
+        pairs, _ = self._parsed_connections()
+        dep_graph, conn_graph = self._graphs_from_pairs(snap.all_instances, pairs)
+        
+        self._cached_graphs = (snap.version, dep_graph, conn_graph)
+        return dep_graph, conn_graph
+    
+    @staticmethod
+    def _graphs_from_pairs(all_instances: Sequence[str], pairs: Sequence[Tuple[str, str]]
+                           ) -> Tuple[Dict[str, List[str]], Dict[str, List[str]]]:
+        """
+        由实例间连接一次遍历构建依赖图和连接图
+        
+        Args:
+            all_instances: 所有实例名（按声明顺序）
+            pairs: 两端都是已知实例的连接 (from_obj, to_obj)
+        
+        Returns:
+            Tuple[Dict[str, List[str]], Dict[str, List[str]]]: (依赖图, 连接图)
+        """
+        # 构建期间用 dict 作为有序集合去重（O(1) 判重且保持插入顺序），最后再转为列表
+        # 图的key按实例声明顺序排列，保证排序结果稳定
+        # 依赖图：graph[to_instance] = [from_instance1, from_instance2, ...]
+        dep_sets: Dict[str, Dict[str, None]] = {instance: {} for instance in all_instances}
+        # 无向图：graph[instance] = [connected_instance1, connected_instance2, ...]
+        conn_sets: Dict[str, Dict[str, None]] = {instance: {} for instance in all_instances}
+        
+        for from_obj, to_obj in pairs:
+            # to_obj 依赖于 from_obj（from_obj的输出连接到to_obj的输入）
+            dep_sets[to_obj][from_obj] = None
+            # 无向图：双向连接
+            conn_sets[from_obj][to_obj] = None
+            conn_sets[to_obj][from_obj] = None
+        
+        dep_graph = {instance: list(deps) for instance, deps in dep_sets.items()}
+        conn_graph = {instance: list(neighbors) for instance, neighbors in conn_sets.items()}
+        return dep_graph, conn_graph
     
     def _build_dependency_graph(self) -> Dict[str, List[str]]:
         """
         构建依赖图
         
         根据连接关系构建依赖图，A -> B 表示 A的输出连接到B的输入，所以B依赖于A。
+        返回的图会被缓存复用，调用方不得修改。
         
         Returns:
             Dict[str, List[str]]: 依赖图，key为实例名，value为依赖的实例列表
             例如：{"pid2": ["pid1"]} 表示 pid2 依赖于 pid1
         """
-        connections = self.get_connections()
-        all_instances = set(self.get_all_instances())
-        
-        # 构建依赖图：graph[to_instance] = [from_instance1, from_instance2, ...]
-        graph = {instance: [] for instance in all_instances}
-        
-        for conn in connections:
-            # 解析连接关系
-            from_str = conn.get('from', '')
-            to_str = conn.get('to', '')
-            
-            # 兼容旧格式
-            if 'from_param' in conn:
-                from_obj = conn['from']
-                to_obj = conn['to']
-            else:
-                # 新格式：从 "instance.param" 解析
-                from_parts = from_str.split('.', 1)
-                to_parts = to_str.split('.', 1)
-                if len(from_parts) != 2 or len(to_parts) != 2:
-                    continue
-                from_obj, from_param = from_parts
-                to_obj, to_param = to_parts
-            
-            # 只处理实例之间的连接（忽略参数名）
-            if from_obj in all_instances and to_obj in all_instances:
-                # to_obj 依赖于 from_obj（from_obj的输出连接到to_obj的输入）
-                if from_obj not in graph[to_obj]:
-                    graph[to_obj].append(from_obj)
-        
-        return graph
+        return self._parsed_graphs()[0]
     
     def _build_connection_graph(self) -> Dict[str, List[str]]:
         """
         构建连接图（无向图，用于回路分析）
         
         根据连接关系构建无向图，用于找到所有连通的实例组（回路）。
+        返回的图会被缓存复用，调用方不得修改。
         
         Returns:
             Dict[str, List[str]]: 连接图，key为实例名，value为连接的实例列表（双向）
         """
-        connections = self.get_connections()
-        all_instances = set(self.get_all_instances())
-        
-        # 构建无向图：graph[instance] = [connected_instance1, connected_instance2, ...]
-        graph = {instance: [] for instance in all_instances}
-        
-        for conn in connections:
-            # 解析连接关系
-            from_str = conn.get('from', '')
-            to_str = conn.get('to', '')
-            
-            # 兼容旧格式
-            if 'from_param' in conn:
-                from_obj = conn['from']
-                to_obj = conn['to']
-            else:
-                # 新格式：从 "instance.param" 解析
-                from_parts = from_str.split('.', 1)
-                to_parts = to_str.split('.', 1)
-                if len(from_parts) != 2 or len(to_parts) != 2:
-                    continue
-                from_obj, from_param = from_parts
-                to_obj, to_param = to_parts
-            
-            # 只处理实例之间的连接（忽略参数名）
-            if from_obj in all_instances and to_obj in all_instances:
-                # 无向图：双向连接
-                if to_obj not in graph[from_obj]:
-                    graph[from_obj].append(to_obj)
-                if from_obj not in graph[to_obj]:
-                    graph[to_obj].append(from_obj)
-        
-        return graph
+        return self._parsed_graphs()[1]
     
     def analyze_circuits(self) -> Dict[str, List[str]]:
         """
@@ -232,6 +601,11 @@ class Configuration:
             Dict[str, List[str]]: 回路字典，key为回路名（序号最靠前的实例名），value为回路中的实例列表
             例如：{"pid1": ["pid1", "valve1", "tank1"], "pid2": ["pid2", "valve2", "tank2"]}
         """
+        cached = self._cached_circuits
+        if cached is not None and cached[0] == self._config_version:
+            return {name: list(nodes) for name, nodes in cached[1].items()}
+        
+        version = self._config_version
         all_instances = self.get_all_instances()
         if not all_instances:
             return {}
@@ -239,32 +613,35 @@ class Configuration:
         # 构建连接图（无向图）
         graph = self._build_connection_graph()
         
-        # 使用DFS找到所有连通分量
+        # 实例序号索引，排序时 O(1) 查找
+        order_idx = {name: i for i, name in enumerate(all_instances)}
+        
+        # 使用DFS找到所有连通分量（显式栈，避免递归开销和递归深度限制）
         visited = set()
         circuits = {}
         
-        def dfs(node, circuit_nodes):
-            """深度优先搜索，找到所有连通的节点"""
-            visited.add(node)
-            circuit_nodes.append(node)
-            for neighbor in graph.get(node, []):
-                if neighbor not in visited:
-                    dfs(neighbor, circuit_nodes)
-        
         # 对每个未访问的节点进行DFS
         for instance in all_instances:
             if instance not in visited:
                 circuit_nodes = []
-                dfs(instance, circuit_nodes)
+                stack = [instance]
+                while stack:
+                    node = stack.pop()
+                    if node in visited:
+                        continue
+                    visited.add(node)
+                    circuit_nodes.append(node)
+                    stack.extend(graph.get(node, []))
                 
                 # 回路名使用回路中序号最靠前的实例名
                 # 按照实例在all_instances中的顺序排序，取第一个
-                circuit_nodes_sorted = sorted(circuit_nodes, key=lambda x: all_instances.index(x))
+                circuit_nodes_sorted = sorted(circuit_nodes, key=order_idx.__getitem__)
                 circuit_name = circuit_nodes_sorted[0]
                 
                 circuits[circuit_name] = circuit_nodes_sorted
         
-        return circuits
+        self._cached_circuits = (version, circuits)
+        return {name: list(nodes) for name, nodes in circuits.items()}
     
     def _topological_sort(self, graph: Dict[str, List[str]]) -> Tuple[List[str], List[str]]:
         """
@@ -282,33 +659,36 @@ class Configuration:
             如果无环，环列表为空；如果有环，返回环中的实例
         """
         # 计算入度：graph[B] = [A] 表示 B 依赖于 A，所以 B 的入度+1
-        in_degree = {node: 0 for node in graph}
-        for node in graph:
-            # node 依赖于 graph[node] 中的每个 dep
-            # 所以 node 的入度应该增加（有多少个节点指向 node）
-            for dep in graph[node]:
-                in_degree[node] = in_degree.get(node, 0) + 1
+        # 同时构建反向邻接表：dependents[A] = [B] 表示 B 依赖于 A
+        # node 依赖于 deps 中的每个 dep，所以 node 的入度就是依赖数量；
+        # 无依赖的节点（常见情况）无需进入内层循环
+        in_degree = {node: len(deps) for node, deps in graph.items()}
+        dependents: Dict[str, List[str]] = {node: [] for node in graph}
+        for node, deps in graph.items():
+            for dep in deps:
+                if dep in dependents:
+                    dependents[dep].append(node)
         
         # 找到所有入度为0的节点（没有依赖的节点）
-        queue = [node for node in graph if in_degree[node] == 0]
+        queue = deque(node for node in graph if in_degree[node] == 0)
         result = []
         
         while queue:
-            node = queue.pop(0)
+            node = queue.popleft()
             result.append(node)
             
-            # 减少依赖此节点的其他节点的入度
-            # 优化：直接遍历所有节点，找到依赖 node 的节点
-            for other_node in graph:
-                if node in graph[other_node]:
-                    in_degree[other_node] -= 1
-                    if in_degree[other_node] == 0:
-                        queue.append(other_node)
+            # 减少依赖此节点的其他节点的入度（只遍历真正的后继节点）
+            for succ in dependents[node]:
+                in_degree[succ] -= 1
+                if in_degree[succ] == 0:
+                    queue.append(succ)
         
         # 如果结果数量小于总节点数，说明存在环
-        if len(result) < len(graph):
-            # 找出环中的节点（未在结果中的节点）
-            cycle_nodes = [node for node in graph if node not in result]
+        total = len(graph)
+        if len(result) < total:
+            # 找出环中的节点（未在结果中的节点），用集合判断避免 O(V²) 的列表查找
+            sorted_set = set(result)
+            cycle_nodes = [node for node in graph if node not in sorted_set]
             return result, cycle_nodes
         else:
             return result, []
@@ -323,35 +703,42 @@ class Configuration:
         Returns:
             List[List[str]]: 环列表，每个环是一个节点列表
         """
+        # 三色标记：WHITE未访问，GRAY在当前DFS路径上，BLACK已完成
+        WHITE, GRAY, BLACK = 0, 1, 2
+        color = {}
         cycles = []
-        visited = set()
-        rec_stack = set()
-        path = []
-        
-        def dfs(node):
-            if node in rec_stack:
-                # 找到环
-                cycle_start = path.index(node)
-                cycle = path[cycle_start:] + [node]
-                cycles.append(cycle)
-                return
-            
-            if node in visited:
-                return
-            
-            visited.add(node)
-            rec_stack.add(node)
-            path.append(node)
+        
+        for root in graph:
+            if color.get(root, WHITE) != WHITE:
+                continue
             
-            for neighbor in graph.get(node, []):
-                dfs(neighbor)
+            # 显式栈：(节点, 邻居迭代器)，path 与栈同步记录当前DFS路径，
+            # path_pos 记录节点在 path 中的位置，找到环时 O(1) 定位环起点
+            color[root] = GRAY
+            path = [root]
+            path_pos = {root: 0}
+            stack = [(root, iter(graph.get(root, [])))]
             
-            rec_stack.remove(node)
-            path.pop()
-        
-        for node in graph:
-            if node not in visited:
-                dfs(node)
+            while stack:
+                node, neighbors = stack[-1]
+                for neighbor in neighbors:
+                    state = color.get(neighbor, WHITE)
+                    if state == GRAY:
+                        # 找到环
+                        cycle_start = path_pos[neighbor]
+                        cycles.append(path[cycle_start:] + [neighbor])
+                    elif state == WHITE:
+                        color[neighbor] = GRAY
+                        path_pos[neighbor] = len(path)
+                        path.append(neighbor)
+                        stack.append((neighbor, iter(graph.get(neighbor, []))))
+                        break
+                else:
+                    # 所有邻居处理完毕，回溯
+                    stack.pop()
+                    path.pop()
+                    del path_pos[node]
+                    color[node] = BLACK
         
         return cycles
     
@@ -369,22 +756,55 @@ class Configuration:
             ValueError: 如果存在环但配置中没有 execution_order
         """
         with self._lock:
+            # 批量更新期间快照尚未重建：直接按组态内部的当前配置计算，不读取也不写入缓存；
+            # 否则全部读取快照。两种情况都只使用同一个数据来源
+            in_batch = self._batch_depth > 0
+            if in_batch:
+                config = self.config or {}
+                all_instances = tuple(config.get('models') or {}) + tuple(config.get('algorithms') or {})
+                connections = config.get('connections') or ()
+            else:
+                cached = self._cached_order
+                if cached is not None and cached[0] == self._config_version:
+                    return list(cached[1])
+                config = self._snapshot.config
+                all_instances = self._snapshot.all_instances
+                connections = self._snapshot.connections
+            
             # 如果配置中已有 execution_order，直接返回
-            if 'execution_order' in self.config:
-                order = self.config['execution_order']
-                all_instances = set(self.get_all_instances())
+            if 'execution_order' in config:
+                order = list(config['execution_order'])
+                instance_set = set(all_instances)
                 # 验证执行顺序是否包含所有实例
-                if set(order) != all_instances:
-                    missing = all_instances - set(order)
-                    extra = set(order) - all_instances
+                if set(order) != instance_set:
+                    missing = instance_set - set(order)
+                    extra = set(order) - instance_set
                     if missing:
                         logger.warning(f"Execution order missing instances: {missing}")
                     if extra:
                         logger.warning(f"Execution order has extra instances: {extra}")
+                if not in_batch:
+                    self._cached_order = (self._config_version, list(order))
+                return order
+            
+            # 没有任何连接时所有实例互不依赖，按实例顺序执行
+            if not connections:
+                order = list(all_instances)
+                if not in_batch:
+                    self._cached_order = (self._config_version, list(order))
                 return order
             
             # 构建依赖图
-            graph = self._build_dependency_graph()
+            if in_batch:
+                instance_set = frozenset(all_instances)
+                pairs = [
+                    endpoints for endpoints in map(_connection_endpoints, connections)
+                    if endpoints is not None
+                    and endpoints[0] in instance_set and endpoints[1] in instance_set
+                ]
+                graph = self._graphs_from_pairs(all_instances, pairs)[0]
+            else:
+                graph = self._build_dependency_graph()
             
             # 拓扑排序
             sorted_order, cycle_nodes = self._topological_sort(graph)
@@ -400,15 +820,15 @@ class Configuration:
                 )
             
             # 如果没有环，但拓扑排序后的顺序不包含所有实例，补充缺失的实例
-            all_instances = set(self.get_all_instances())
-            sorted_set = set(sorted_order)
-            missing = all_instances - sorted_set
+            missing = set(all_instances) - set(sorted_order)
             
             if missing:
                 # 将缺失的实例追加到末尾（按名称排序）
                 sorted_order.extend(sorted(missing))
                 logger.debug(f"Added instances without dependencies to execution order: {missing}")
             
+            if not in_batch:
+                self._cached_order = (self._config_version, list(sorted_order))
             return sorted_order
     
     def get_execution_order(self) -> List[str]:
@@ -433,9 +853,12 @@ class Configuration:
         """
         with self._lock:
             self.config = new_config.copy()
+            self._reset_instance_copies()
+            self._rematerialize()
+            self._rebuild_snapshot_flat()
             logger.info("Offline configuration applied")
     
-    def online_add_model(self, name: str, model_type: str, params: dict):
+    def online_add_model(self, name: str, model_type: str, params: dict, quiet: bool = False):
         """
         在线配置：添加模型实例
         
@@ -443,56 +866,66 @@ class Configuration:
             name: 模型实例名称
             model_type: 模型类型（如'cylindrical_tank', 'valve'）
             params: 模型参数
+            quiet: 为True时不输出日志（高频调用时使用）
         """
         with self._lock:
             if 'models' not in self.config:
                 self.config['models'] = {}
+            old_config = self.config['models'].get(name)
+            if old_config:
+                self._flat_drop(name, old_config.get('params', {}), is_model=True)
             self.config['models'][name] = {
                 'type': model_type,
                 'params': params.copy()
             }
-            logger.info(f"Online add model: {name} ({model_type})")
+            self._flat_put(name, params, is_model=True)
+            self._rematerialize(reindex=False)
+            if not quiet:
+                logger.info("Online add model: %s (%s)", name, model_type)
     
-    def online_update_model(self, name: str, params: dict):
+    def online_update_model(self, name: str, params: dict, quiet: bool = False):
         """
         在线配置：更新模型实例参数
         
         Args:
             name: 模型实例名称
             params: 更新的参数（只更新提供的参数）
+            quiet: 为True时不输出日志（高频调用时使用）
         """
         with self._lock:
             if 'models' not in self.config:
                 self.config['models'] = {}
-            if name not in self.config['models']:
-                logger.warning(f"Model {name} not found, creating new one")
-                self.config['models'][name] = {'type': 'unknown', 'params': {}}
+            current = self.config['models'].get(name)
+            if current is None:
+                logger.warning("Model %s not found, creating new one", name)
+                current = {'type': 'unknown', 'params': {}}
             
-            if 'params' not in self.config['models'][name]:
-                self.config['models'][name]['params'] = {}
-            
-            self.config['models'][name]['params'].update(params)
-            logger.info(f"Online update model: {name}")
+            # 写时复制：替换实例配置字典，已发布快照中的副本可以继续复用到下一次重建
+            self.config['models'][name] = {**current, 'params': {**(current.get('params') or {}), **params}}
+            self._flat_put(name, params, is_model=True)
+            self._rematerialize(reindex=False)
+            if not quiet:
+                logger.debug("Online update model: %s", name)
     
-    def online_remove_model(self, name: str):
+    def online_remove_model(self, name: str, quiet: bool = False):
         """
         在线配置：删除模型实例
         
         Args:
             name: 模型实例名称
+            quiet: 为True时不输出日志（高频调用时使用）
         """
         with self._lock:
             if 'models' in self.config and name in self.config['models']:
-                del self.config['models'][name]
+                removed = self.config['models'].pop(name)
+                self._flat_drop(name, removed.get('params', {}), is_model=True)
                 # 删除相关的连接
-                if 'connections' in self.config:
-                    self.config['connections'] = [
-                        conn for conn in self.config['connections']
-                        if conn.get('from') != name and conn.get('to') != name
-                    ]
-                logger.info(f"Online remove model: {name}")
+                self._remove_instance_connections(name)
+                self._rematerialize()
+                if not quiet:
+                    logger.info("Online remove model: %s", name)
     
-    def online_add_algorithm(self, name: str, algo_type: str, params: dict):
+    def online_add_algorithm(self, name: str, algo_type: str, params: dict, quiet: bool = False):
         """
         在线配置：添加算法实例
         
@@ -500,58 +933,68 @@ class Configuration:
             name: 算法实例名称
             algo_type: 算法类型（如'PID'）
             params: 算法参数
+            quiet: 为True时不输出日志（高频调用时使用）
         """
         with self._lock:
             if 'algorithms' not in self.config:
                 self.config['algorithms'] = {}
+            old_config = self.config['algorithms'].get(name)
+            if old_config:
+                self._flat_drop(name, old_config.get('params', {}), is_model=False)
             self.config['algorithms'][name] = {
                 'type': algo_type,
                 'params': params.copy()
             }
-            logger.info(f"Online add algorithm: {name} ({algo_type})")
+            self._flat_put(name, params, is_model=False)
+            self._rematerialize(reindex=False)
+            if not quiet:
+                logger.info("Online add algorithm: %s (%s)", name, algo_type)
     
-    def online_update_algorithm(self, name: str, params: dict):
+    def online_update_algorithm(self, name: str, params: dict, quiet: bool = False):
         """
         在线配置：更新算法实例参数
         
         Args:
             name: 算法实例名称
             params: 更新的参数（只更新提供的参数）
+            quiet: 为True时不输出日志（高频调用时使用）
         """
         with self._lock:
             if 'algorithms' not in self.config:
                 self.config['algorithms'] = {}
-            if name not in self.config['algorithms']:
-                logger.warning(f"Algorithm {name} not found, creating new one")
-                self.config['algorithms'][name] = {'type': 'unknown', 'params': {}}
-            
-            if 'params' not in self.config['algorithms'][name]:
-                self.config['algorithms'][name]['params'] = {}
+            current = self.config['algorithms'].get(name)
+            if current is None:
+                logger.warning("Algorithm %s not found, creating new one", name)
+                current = {'type': 'unknown', 'params': {}}
             
-            self.config['algorithms'][name]['params'].update(params)
-            logger.info(f"Online update algorithm: {name}")
+            # 写时复制：替换实例配置字典，已发布快照中的副本可以继续复用到下一次重建
+            self.config['algorithms'][name] = {**current, 'params': {**(current.get('params') or {}), **params}}
+            self._flat_put(name, params, is_model=False)
+            self._rematerialize(reindex=False)
+            if not quiet:
+                logger.debug("Online update algorithm: %s", name)
     
-    def online_remove_algorithm(self, name: str):
+    def online_remove_algorithm(self, name: str, quiet: bool = False):
         """
         在线配置：删除算法实例
         
         Args:
             name: 算法实例名称
+            quiet: 为True时不输出日志（高频调用时使用）
         """
         with self._lock:
             if 'algorithms' in self.config and name in self.config['algorithms']:
-                del self.config['algorithms'][name]
+                removed = self.config['algorithms'].pop(name)
+                self._flat_drop(name, removed.get('params', {}), is_model=False)
                 # 删除相关的连接
-                if 'connections' in self.config:
-                    self.config['connections'] = [
-                        conn for conn in self.config['connections']
-                        if conn.get('from') != name and conn.get('to') != name
-                    ]
-                logger.info(f"Online remove algorithm: {name}")
+                self._remove_instance_connections(name)
+                self._rematerialize()
+                if not quiet:
+                    logger.info("Online remove algorithm: %s", name)
     
     def online_add_connection(self, from_obj: str = None, from_param: str = None,
                              to_obj: str = None, to_param: str = None,
-                             from_str: str = None, to_str: str = None):
+                             from_str: str = None, to_str: str = None, quiet: bool = False):
         """
         在线配置：添加连接关系
         
@@ -562,6 +1005,7 @@ class Configuration:
             to_param: 目标参数名称，旧格式兼容
             from_str: 源连接字符串，格式为 "instance.param"，新格式
             to_str: 目标连接字符串，格式为 "instance.param"，新格式
+            quiet: 为True时不输出日志（高频调用时使用）
         """
         with self._lock:
             if 'connections' not in self.config:
@@ -573,7 +1017,7 @@ class Configuration:
                     'from': from_str,
                     'to': to_str
                 }
-                connection_str = f"{from_str} -> {to_str}"
+                log_fmt, log_args = "%s -> %s", (from_str, to_str)
             elif from_obj and from_param and to_obj and to_param:
                 # 旧格式兼容
                 connection = {
@@ -582,18 +1026,29 @@ class Configuration:
                     'to': to_obj,
                     'to_param': to_param
                 }
-                connection_str = f"{from_obj}.{from_param} -> {to_obj}.{to_param}"
+                log_fmt, log_args = "%s.%s -> %s.%s", (from_obj, from_param, to_obj, to_param)
             else:
                 raise ValueError("Must provide either (from_str, to_str) or (from_obj, from_param, to_obj, to_param)")
             
             # 检查是否已存在
-            if connection not in self.config['connections']:
+            self._ensure_connection_index()
+            key = _connection_key(connection)
+            if key not in self._connection_keys:
                 self.config['connections'].append(connection)
-                logger.info(f"Online add connection: {connection_str}")
+                # 增量维护连接索引
+                self._connection_keys.add(key)
+                endpoints = _connection_endpoints(connection)
+                if endpoints is not None:
+                    position = len(self.config['connections']) - 1
+                    self._by_from.setdefault(endpoints[0], []).append(position)
+                    self._by_to.setdefault(endpoints[1], []).append(position)
+                self._rematerialize(reindex=False)
+                if not quiet:
+                    logger.info("Online add connection: " + log_fmt, *log_args)
     
     def online_remove_connection(self, from_obj: str = None, from_param: str = None,
                                 to_obj: str = None, to_param: str = None,
-                                from_str: str = None, to_str: str = None):
+                                from_str: str = None, to_str: str = None, quiet: bool = False):
         """
         在线配置：删除连接关系
         
@@ -604,6 +1059,7 @@ class Configuration:
             to_param: 目标参数名称，旧格式兼容
             from_str: 源连接字符串，格式为 "instance.param"，新格式
             to_str: 目标连接字符串，格式为 "instance.param"，新格式
+            quiet: 为True时不输出日志（高频调用时使用）
         """
         with self._lock:
             if 'connections' in self.config:
@@ -613,7 +1069,7 @@ class Configuration:
                         conn for conn in self.config['connections']
                         if not (conn.get('from') == from_str and conn.get('to') == to_str)
                     ]
-                    connection_str = f"{from_str} -> {to_str}"
+                    log_fmt, log_args = "%s -> %s", (from_str, to_str)
                 elif from_obj and from_param and to_obj and to_param:
                     # 旧格式兼容
                     self.config['connections'] = [
@@ -623,10 +1079,127 @@ class Configuration:
                                conn.get('to') == to_obj and
                                conn.get('to_param') == to_param)
                     ]
-                    connection_str = f"{from_obj}.{from_param} -> {to_obj}.{to_param}"
+                    log_fmt, log_args = "%s.%s -> %s.%s", (from_obj, from_param, to_obj, to_param)
                 else:
                     raise ValueError("Must provide either (from_str, to_str) or (from_obj, from_param, to_obj, to_param)")
-                logger.info(f"Online remove connection: {connection_str}")
+                self._rematerialize()
+                if not quiet:
+                    logger.info("Online remove connection: " + log_fmt, *log_args)
+    
+    def online_apply_diff(self, diff: dict, quiet: bool = False):
+        """
+        在线配置：一次应用一组配置差异
+        
+        在一个批量更新中依次删除模型和算法、添加模型和算法、更新模型和算法参数、
+        删除连接、添加连接，结束时只重建一次快照。
+        应用完成后只输出一条汇总日志，逐项明细在DEBUG级别输出。
+        
+        Args:
+            diff: 配置差异，包含 removed_models, removed_algorithms, added_models,
+                  added_algorithms, modified_models, modified_algorithms（值为 {'to': 新配置}）,
+                  removed_connections, added_connections（值为 {'from': ..., 'to': ...}）
+            quiet: 为True时不输出日志（高频调用时使用）
+        """
+        removed_models = list(diff.get('removed_models', []))
+        removed_algorithms = list(diff.get('removed_algorithms', []))
+        added_models = diff.get('added_models', {})
+        added_algorithms = diff.get('added_algorithms', {})
+        modified_models = diff.get('modified_models', {})
+        modified_algorithms = diff.get('modified_algorithms', {})
+        removed_connections = [(c.get('from', ''), c.get('to', ''))
+                               for c in diff.get('removed_connections', [])]
+        removed_connections = [c for c in removed_connections if c[0] and c[1]]
+        added_connections = [(c.get('from', ''), c.get('to', ''))
+                             for c in diff.get('added_connections', [])]
+        added_connections = [c for c in added_connections if c[0] and c[1]]
+        
+        with self.batch_update():
+            for name in removed_models:
+                self.online_remove_model(name, quiet=True)
+            
+            for name in removed_algorithms:
+                self.online_remove_algorithm(name, quiet=True)
+            
+            for name, model_config in added_models.items():
+                self.online_add_model(name, model_config.get('type', 'unknown'),
+                                      model_config.get('params', {}), quiet=True)
+            
+            for name, algo_config in added_algorithms.items():
+                self.online_add_algorithm(name, algo_config.get('type', 'unknown'),
+                                          algo_config.get('params', {}), quiet=True)
+            
+            for name, change in modified_models.items():
+                self.online_update_model(name, change.get('to', {}).get('params', {}), quiet=True)
+            
+            for name, change in modified_algorithms.items():
+                self.online_update_algorithm(name, change.get('to', {}).get('params', {}), quiet=True)
+            
+            for from_str, to_str in removed_connections:
+                self.online_remove_connection(from_str=from_str, to_str=to_str, quiet=True)
+            
+            for from_str, to_str in added_connections:
+                self.online_add_connection(from_str=from_str, to_str=to_str, quiet=True)
+        
+        if quiet:
+            return
+        
+        if logger.isEnabledFor(logging.DEBUG):
+            for name in removed_models:
+                logger.debug("Online remove model: %s", name)
+            for name in removed_algorithms:
+                logger.debug("Online remove algorithm: %s", name)
+            for name, model_config in added_models.items():
+                logger.debug("Online add model: %s (%s)", name, model_config.get('type', 'unknown'))
+            for name, algo_config in added_algorithms.items():
+                logger.debug("Online add algorithm: %s (%s)", name, algo_config.get('type', 'unknown'))
+            for name in modified_models:
+                logger.debug("Online update model: %s", name)
+            for name in modified_algorithms:
+                logger.debug("Online update algorithm: %s", name)
+            for from_str, to_str in removed_connections:
+                logger.debug("Online remove connection: %s -> %s", from_str, to_str)
+            for from_str, to_str in added_connections:
+                logger.debug("Online add connection: %s -> %s", from_str, to_str)
+        
+        logger.info("Online apply diff: models +%d -%d ~%d%s, algorithms +%d -%d ~%d%s, "
+                    "connections +%d -%d",
+                    len(added_models), len(removed_models), len(modified_models),
+                    _sample_names(added_models, removed_models, modified_models),
+                    len(added_algorithms), len(removed_algorithms), len(modified_algorithms),
+                    _sample_names(added_algorithms, removed_algorithms, modified_algorithms),
+                    len(added_connections), len(removed_connections))
+    
+    def _write_config_file(self, file_path: str) -> bool:
+        """
+        将当前配置写入YAML文件
+        
+        先序列化为字符串再一次性写入；如果内容与上次写入该文件时相同、
+        且文件未被外部修改，则跳过写入。
+        
+        Args:
+            file_path: 文件路径
+        
+        Returns:
+            bool: 是否实际写入了文件
+        """
+        text = _dump_yaml(self.config)
+        digest = hashlib.sha1(text.encode('utf-8')).hexdigest()
+        abspath = os.path.abspath(file_path)
+        
+        saved = self._saved_files.get(abspath)
+        if saved is not None and saved[0] == digest:
+            try:
+                st = os.stat(abspath)
+                if (st.st_mtime_ns, st.st_size) == saved[1]:
+                    return False
+            except FileNotFoundError:
+                pass
+        
+        with open(abspath, 'w', encoding='utf-8', buffering=_WRITE_BUFFER_SIZE) as f:
+            f.write(text)
+        st = os.stat(abspath)
+        self._saved_files[abspath] = (digest, (st.st_mtime_ns, st.st_size))
+        return True
     
     def save_to_file(self, file_path: str):
         """
@@ -638,12 +1211,13 @@ class Configuration:
         with self._lock:
             # 确保目录存在
             file_dir = os.path.dirname(file_path)
-            if file_dir and not os.path.exists(file_dir):
+            if file_dir:
                 os.makedirs(file_dir, exist_ok=True)
             
-            with open(file_path, 'w', encoding='utf-8') as f:
-                yaml.dump(self.config, f, allow_unicode=True, default_flow_style=False)
-            logger.info(f"Configuration saved to {file_path}")
+            if self._write_config_file(file_path):
+                logger.info(f"Configuration saved to {file_path}")
+            else:
+                logger.debug(f"Configuration unchanged, skip saving to {file_path}")
     
     def load_from_local(self, local_dir: str = None) -> bool:
         """
@@ -660,12 +1234,14 @@ class Configuration:
                 target_dir = local_dir or self.local_dir
                 config_file = os.path.join(target_dir, "config.yaml")
                 
-                if not os.path.exists(config_file):
+                try:
+                    self.config = _load_yaml_cached(config_file)
+                except FileNotFoundError:
                     logger.warning(f"Local config file not found: {config_file}")
                     return False
-                
-                with open(config_file, 'r', encoding='utf-8') as f:
-                    self.config = yaml.safe_load(f)
+                self._reset_instance_copies()
+                self._rematerialize()
+                self._rebuild_snapshot_flat()
                 
                 self.local_dir = target_dir
                 self.local_config_file = config_file
@@ -693,23 +1269,44 @@ class Configuration:
                 config_file = os.path.join(target_dir, "config.yaml")
                 
                 # 确保目录存在
-                if not os.path.exists(target_dir):
-                    os.makedirs(target_dir, exist_ok=True)
-                    logger.info(f"Created local directory: {target_dir}")
+                os.makedirs(target_dir, exist_ok=True)
                 
-                with open(config_file, 'w', encoding='utf-8') as f:
-                    yaml.dump(self.config, f, allow_unicode=True, default_flow_style=False)
+                written = self._write_config_file(config_file)
                 
                 self.local_dir = target_dir
                 self.local_config_file = config_file
                 
-                logger.info(f"Configuration saved to local directory: {config_file}")
+                if written:
+                    logger.info(f"Configuration saved to local directory: {config_file}")
+                else:
+                    logger.debug(f"Configuration unchanged, skip saving to local directory: {config_file}")
                 return True
                 
         except Exception as e:
             logger.error(f"Failed to save to local directory: {e}", exc_info=True)
             return False
     
+    def matches_dict(self, config_dict: dict) -> bool:
+        """
+        判断用该字典更新配置是否不会产生任何变化
+        
+        update_from_dict 按顶层键合并，因此只要字典中每个顶层键的值都与当前配置相同，
+        更新就是空操作。逐键比较，遇到第一个不同的键即返回。
+        
+        Args:
+            config_dict: 配置字典
+        
+        Returns:
+            bool: 更新不会改变当前配置时返回True
+        """
+        if not isinstance(config_dict, dict):
+            return False
+        with self._lock:
+            config = self.config
+            if any(key not in config for key in ('models', 'algorithms', 'connections')):
+                return False
+            return all(key in config and config[key] == value for key, value in config_dict.items())
+    
     def update_from_dict(self, config_dict: dict) -> bool:
         """
         从字典更新配置（用于接收配置更新）
@@ -737,6 +1334,9 @@ class Configuration:
                     self.config['algorithms'] = {}
                 if 'connections' not in self.config:
                     self.config['connections'] = []
+                self._reset_instance_copies()
+                self._rematerialize()
+                self._rebuild_snapshot_flat()
                 
                 logger.info("Configuration updated from dictionary")
                 return True
@@ -745,6 +1345,38 @@ class Configuration:
             logger.error(f"Failed to update from dictionary: {e}", exc_info=True)
             return False
     
+    @staticmethod
+    def _flat_key(instance_name: str, param_name: str, is_model: bool) -> str:
+        """
+        快照参数键：模型参数使用大写格式，算法参数保持小写
+        """
+        if is_model:
+            return f"{instance_name}.{param_name.upper()}"
+        return f"{instance_name}.{param_name}"
+    
+    def _flat_put(self, instance_name: str, params: Dict[str, Any], is_model: bool):
+        """将实例参数写入扁平化快照"""
+        for param_name, value in params.items():
+            self._snapshot_flat[self._flat_key(instance_name, param_name, is_model)] = value
+    
+    def _flat_drop(self, instance_name: str, params: Dict[str, Any], is_model: bool):
+        """从扁平化快照中删除实例参数"""
+        for param_name in params:
+            self._snapshot_flat.pop(self._flat_key(instance_name, param_name, is_model), None)
+    
+    def _rebuild_snapshot_flat(self):
+        """
+        全量重建扁平化快照参数（整体替换配置时调用）
+        """
+        self._snapshot_flat = {}
+        config = self.config or {}
+        # 获取模型参数
+        for model_name, model_config in (config.get('models') or {}).items():
+            self._flat_put(model_name, model_config.get('params', {}), is_model=True)
+        # 获取算法参数
+        for algo_name, algo_config in (config.get('algorithms') or {}).items():
+            self._flat_put(algo_name, algo_config.get('params', {}), is_model=False)
+    
     def get_snapshot_data(self) -> Dict[str, Any]:
         """
         获取当前配置的快照数据（用于保存）
@@ -754,28 +1386,8 @@ class Configuration:
         Returns:
             Dict[str, Any]: 快照参数字典
         """
-        snapshot = {}
-        
         with self._lock:
-            # 获取模型参数
-            models_config = self.get_models()
-            for model_name, model_config in models_config.items():
-                params = model_config.get('params', {})
-                for param_name, value in params.items():
-                    # 模型参数使用大写格式
-                    snapshot_key = f"{model_name}.{param_name.upper()}"
-                    snapshot[snapshot_key] = value
-            
-            # 获取算法参数
-            algorithms_config = self.get_algorithms()
-            for algo_name, algo_config in algorithms_config.items():
-                params = algo_config.get('params', {})
-                for param_name, value in params.items():
-                    # 算法参数保持小写
-                    snapshot_key = f"{algo_name}.{param_name}"
-                    snapshot[snapshot_key] = value
-        
-        return snapshot
+            return dict(self._snapshot_flat)
     
     @staticmethod
     def create_example_config() -> dict:
@@ -2,23 +2,65 @@
 PLC运行模块
 每个运行周期执行已组态的控制算法和物理模型的时序计算，并将数据推送到Redis
 """
+import sys
+import inspect
+import logging
 import threading
 import time
 import json
+import queue
+import functools
 import redis
 from datetime import datetime
-from typing import Dict, Any, Optional
+from types import MappingProxyType
+from typing import Dict, Any, Optional, List, Set, Tuple, Callable, Mapping
 from plc.plc_configuration import Configuration
 from plc.clock import Clock
 from plc.snapshot_manager import SnapshotManager
 from module.cylindrical_tank import CylindricalTank
 from module.valve import Valve
 from algorithm.pid import PID
+from algorithm import pid_kernel
 from utils.logger import get_logger
+from utils.redis_pool import get_pool
+from utils.json_codec import dumps as _dumps_payload, loads as _loads_payload
 
 logger = get_logger()
 
 
+# 参数字典查找未命中的哨兵（参数值本身可能为None）
+_MISSING = object()
+
+
+class _ParamKeyTable(dict):
+    """
+    单个实例的参数键表：参数名 -> "实例名.参数名"
+    
+    未命中时生成键并用 sys.intern() 驻留，之后每个周期直接复用同一个字符串对象，
+    不再重复格式化和计算哈希。
+    """
+    
+    __slots__ = ('prefix',)
+    
+    def __init__(self, instance_name: str):
+        super().__init__()
+        self.prefix = instance_name + '.'
+    
+    def __missing__(self, param_name: str) -> str:
+        key = self[param_name] = sys.intern(self.prefix + param_name)
+        return key
+
+
+class _ParamKeyTables(dict):
+    """实例名 -> _ParamKeyTable，未命中时自动创建"""
+    
+    __slots__ = ()
+    
+    def __missing__(self, instance_name: str) -> _ParamKeyTable:
+        table = self[instance_name] = _ParamKeyTable(instance_name)
+        return table
+
+
 class Runner:
     """
     PLC运行模块
@@ -30,12 +72,32 @@ class Runner:
     # Redis键前缀
     REDIS_KEY_PREFIX = "plc:data:"
     
+    # 历史数据流（plc:data:stream）的条目字段名和保留长度
+    # 条目为完整数据帧（字段d，与current相同）或差量帧（字段p，只含变化的参数）
+    HISTORY_STREAM_FIELD = "d"
+    HISTORY_STREAM_DELTA_FIELD = "p"
+    HISTORY_STREAM_MAXLEN = 1000
+    # 条目序号字段（每个条目递增）和差量帧的基准完整数据帧序号字段，
+    # 读取方据此发现流被裁剪或条目丢失，避免把差量叠加到过期的基准上
+    HISTORY_STREAM_SEQ_FIELD = "s"
+    HISTORY_STREAM_BASE_FIELD = "b"
+    
+    # 历史数据流中完整数据帧的间隔（周期数）
+    HISTORY_KEYFRAME_INTERVAL = 50
+    
     # 默认本地目录
     DEFAULT_LOCAL_DIR = "plc/local"
     
     # 快照保存周期（每N个周期保存一次）
     SNAPSHOT_SAVE_INTERVAL = 10
     
+    # I/O队列长度（推送和存储落后超过该数量的周期时丢弃新数据）
+    IO_QUEUE_SIZE = 4
+    
+    # 同一执行阶段内同类型模型达到该数量时使用向量化批量执行
+    # （数量较少时NumPy的调用开销大于收益）
+    VECTORIZE_MIN_BATCH = 32
+    
     def __init__(self, configuration: Configuration = None, redis_config: dict = None,
                  data_storage=None, local_dir: str = None):
         """
@@ -52,7 +114,7 @@ class Runner:
         self.data_storage = data_storage  # 数据存储模块实例
         
         # 初始化快照管理器
-        snapshot_file = f"{self.local_dir}/snapshot.yaml"
+        snapshot_file = f"{self.local_dir}/snapshot.json"
         self.snapshot_manager = SnapshotManager(snapshot_file=snapshot_file)
         
         # 加载配置和快照的优先级：
@@ -70,7 +132,7 @@ class Runner:
             else:
                 self.config = Configuration(local_dir=self.local_dir)
             # 应用快照到配置
-            self._apply_snapshot_to_config(snapshot)
+            self.snapshot_manager.apply_snapshot_to_config(self.config, snapshot)
             logger.info("Configuration initialized from snapshot")
         else:
             # 没有快照，使用本地目录的config.yaml
@@ -84,22 +146,9 @@ class Runner:
                 logger.info(f"Configuration loaded from local directory: {self.local_dir}")
             logger.info("No snapshot found, using configuration file values")
         
-        # 初始化Redis连接（如果提供了redis_config）
-        if self.redis_config:
-            self.redis_client = redis.Redis(
-                host=self.redis_config.get('host', 'localhost'),
-                port=self.redis_config.get('port', 6379),
-                password=self.redis_config.get('password'),
-                db=self.redis_config.get('db', 0),
-                decode_responses=True
-            )
-        else:
-            # 如果没有提供redis_config，创建一个默认连接（用于测试）
-            self.redis_client = redis.Redis(
-                host='localhost',
-                port=6379,
-                decode_responses=True
-            )
+        # 初始化Redis连接（如果没有提供redis_config，连接本地默认端口，用于测试）
+        # 与同一进程内的DataStorage、Communication共用阻塞连接池，复用长连接
+        self.redis_client = redis.Redis(connection_pool=get_pool(self.redis_config))
         
         # 测试Redis连接
         try:
@@ -109,6 +158,23 @@ class Runner:
             logger.error(f"Failed to connect to Redis: {e}")
             raise
         
+        # Redis键（预先拼接，避免每个周期重复格式化）
+        self._current_key = f"{self.REDIS_KEY_PREFIX}current"
+        self._history_key = f"{self.REDIS_KEY_PREFIX}stream"
+        # 最新数据更新通知频道（消息内容为周期时间戳），订阅方收到后再读取最新数据键
+        self._current_updated_channel = f"{self._current_key}:updated"
+        
+        # 历史数据流差量编码状态：上一次推送的参数快照、距上一个完整数据帧的周期数、
+        # 条目序号（每次写入递增）、最近一个完整数据帧的序号
+        self._last_pushed_params: Optional[Dict[str, Any]] = None
+        self._history_since_keyframe = 0
+        self._history_seq = 0
+        self._history_base_seq = 0
+        
+        # 推送时间字符串的分钟缓存（起始值保证第一次调用时重新格式化）
+        self._datetime_minute_start = -60
+        self._datetime_minute_prefix = ""
+        
         # 初始化时钟
         self.clock = Clock(cycle_time=self.config.get_cycle_time())
         
@@ -116,88 +182,95 @@ class Runner:
         self.models: Dict[str, Any] = {}
         self.algorithms: Dict[str, Any] = {}
         
+        # 模型执行函数：{模型名: 无参数执行函数}，在初始化模型时绑定
+        self._model_exec: Dict[str, Callable[[], Any]] = {}
+        
         # 存储参数值（用于连接）
         self.params: Dict[str, Any] = {}
         
+        # 周期跟踪日志开关：开启且logger启用DEBUG时，才输出每个周期的连接传递和推送日志
+        # （这些日志在热路径上，默认关闭，避免每个周期格式化大量字符串）
+        self.trace_cycle = False
+        self._trace_on = False
+        
+        # 参数键表：{实例名: {参数名: "实例名.参数名"}}，键只生成一次并驻留
+        self._param_keys = _ParamKeyTables()
+        
+        # 位号写入表：{"实例名.参数名": (setter, 实例类型)}，在初始化和配置更新时预先构建
+        self._param_setters: Dict[str, Tuple[Callable[[Any], None], str]] = {}
+        
         # 运行控制
-        self._running = False
+        self._stop_event = threading.Event()  # 停止事件：未运行时为已设置状态，stop()设置后各线程立即结束等待
+        self._stop_event.set()
         self._thread: Optional[threading.Thread] = None
         self._command_thread: Optional[threading.Thread] = None
+        self._pubsub = None  # 命令订阅连接（start()中订阅，stop()中取消订阅以唤醒订阅线程）
+        self._io_thread: Optional[threading.Thread] = None
         self._lock = threading.RLock()
         
+        # 快照双缓冲：周期线程发布最新快照到槽位，I/O线程取出后写入文件
+        self._snapshot_slot: Optional[Dict[str, Any]] = None
+        # 槽位锁：保证取出并清空槽位与放入新快照互斥，新快照不会被清空操作丢弃
+        self._snapshot_slot_lock = threading.Lock()
+        
+        # I/O队列：周期线程放入周期数据，I/O线程负责推送到Redis和存储
+        self._io_queue: queue.Queue = queue.Queue(maxsize=self.IO_QUEUE_SIZE)
+        
         # 配置更新标志（用于在周期间隙执行更新）
-        self._config_update_pending = False
-        self._pending_config_update = None  # 存储待应用的配置更新消息
+        # 待应用的配置更新原始消息（JSON），订阅线程按到达顺序追加，运行循环取出后解析、合并并应用
+        self._pending_config_updates: List[Any] = []
+        self._pending_lock = threading.Lock()
+        
+        # 订阅消息分发表：{频道: 处理方法}
+        self._channel_handlers: Dict[str, Callable[[Any], None]] = {
+            "plc:command:write_parameter": self._handle_param_write,
+            "plc:config:update": self._handle_config_update,
+        }
+        # 配置更新分发表：{配置更新类型: 应用方法}，在周期间隙调用，参数为合并后的同类型更新列表
+        self._config_type_handlers: Dict[str, Callable[[List[dict]], None]] = {
+            # 差异化的配置更新（新方式），连续多条依次应用差异后统一更新实例
+            'config_update_diff': self._apply_config_update_diffs,
+            # 完整配置更新（兼容旧方式），只应用最后一条
+            'config_update': lambda updates: self._apply_full_config_update(updates[-1].get('config', {})),
+            # 配置重置，只应用最后一条
+            'config_reset': lambda updates: self._apply_config_reset(updates[-1].get('config', {})),
+        }
+        
+        # 连接关系缓存（与execution_order一样，只在初始化和配置更新时从组态读取）
+        self._connections = ()
+        
+        # 连接计划：{目标实例名: [(源参数键, 目标参数名, setter), ...]}
+        # 连接关系是固定的，在初始化和配置更新时预先解析，运行周期内不再解析字符串
+        self._connection_plan: Dict[str, List[Tuple[str, str, Callable[[Any], None]]]] = {}
         
         # 初始化模型和算法
         self._initialize_models()
         self._initialize_algorithms()
+        self._rebuild_connection_plan()
+        self._rebuild_param_setters()
         
-        # 获取执行顺序（由组态模块计算）
+        # 获取执行顺序（由组态模块计算），使用不可变元组，配置更新时整体替换
         try:
-            self.execution_order = self.config.get_execution_order()
+            self.execution_order = tuple(self.config.get_execution_order())
             logger.info(f"Execution order: {self.execution_order}")
         except ValueError as e:
             logger.error(f"Failed to get execution order: {e}")
             raise
         
+        # 执行步骤：((实例名元组, 实例列表, 批量执行函数或None), ...)，重建时整体替换
+        self._execution_steps: Tuple[Tuple[Tuple[str, ...], List[Any], Optional[Callable]], ...] = ()
+        self._rebuild_execution_steps()
+        
         # 标记是否是第一个周期（用于初始化参数字典）
         self._first_cycle = True
         
         # 快照保存计数器
         self._snapshot_counter = 0
         
-        logger.info("Runner initialized")
-    
-    def _apply_snapshot_to_config(self, snapshot: Dict[str, Any]):
-        """
-        将快照应用到配置（更新初始参数值）
+        # 最近一次发布的参数快照（周期结束或写入参数时整体替换，读取方无锁访问，不得修改）
+        self._published_params: Dict[str, Any] = dict(self.params)
         
-        Args:
-            snapshot: 快照参数字典，格式为 {instance_name.param_name: value}
-        """
-        try:
-            models_config = self.config.get_models()
-            algorithms_config = self.config.get_algorithms()
-            
-            # 更新模型参数
-            for model_name in models_config:
-                model_params = models_config[model_name].get('params', {})
-                for param_name, value in snapshot.items():
-                    if param_name.startswith(f"{model_name}."):
-                        # 提取参数名（去掉实例名前缀和点）
-                        param_key = param_name[len(model_name) + 1:]
-                        # 直接匹配参数名（使用小写格式）
-                        if param_key in model_params:
-                            model_params[param_key] = value
-                            logger.debug(f"Updated {model_name}.{param_key} = {value} from snapshot")
-            
-            # 更新算法参数
-            for algo_name in algorithms_config:
-                algo_params = algorithms_config[algo_name].get('params', {})
-                for param_name, value in snapshot.items():
-                    if param_name.startswith(f"{algo_name}."):
-                        # 提取参数名
-                        param_key = param_name[len(algo_name) + 1:]
-                        # 算法参数可能是嵌套的（如 config.kp, input.pv）
-                        if '.' in param_key:
-                            parts = param_key.split('.', 1)
-                            if len(parts) == 2:
-                                section, key = parts
-                                if section in ['config', 'input', 'output']:
-                                    if section not in algo_params:
-                                        algo_params[section] = {}
-                                    algo_params[section][key] = value
-                                    logger.debug(f"Updated {algo_name}.{section}.{key} = {value} from snapshot")
-                        else:
-                            # 简单参数
-                            algo_params[param_key] = value
-                            logger.debug(f"Updated {algo_name}.{param_key} = {value} from snapshot")
-            
-            logger.info(f"Snapshot applied to configuration")
-            
-        except Exception as e:
-            logger.error(f"Failed to apply snapshot to config: {e}", exc_info=True)
+        logger.info("Runner initialized")
     
     def _initialize_models(self):
         """初始化所有模型实例"""
@@ -205,6 +278,7 @@ class Runner:
         
         with self._lock:
             self.models.clear()
+            self._model_exec.clear()
             for name, model_config in models_config.items():
                 model_type = model_config['type']
                 params = model_config.get('params', {})
@@ -218,8 +292,39 @@ class Runner:
                     continue
                 
                 self.models[name] = model
+                self._model_exec[name] = self._bind_model_execute(model)
                 logger.info(f"Model '{name}' ({model_type}) initialized")
     
+    def _bind_model_execute(self, model) -> Callable[[], Any]:
+        """
+        为模型绑定无参数的执行函数
+        
+        初始化时检查一次 execute() 的签名：接受step参数（或**kwargs）时，
+        每次执行传入当前的周期时间；否则无参数调用。
+        
+        Args:
+            model: 模型实例
+        
+        Returns:
+            执行函数
+        """
+        try:
+            parameters = inspect.signature(model.execute).parameters
+        except (TypeError, ValueError):
+            parameters = {}
+        
+        accepts_step = 'step' in parameters or any(
+            p.kind is inspect.Parameter.VAR_KEYWORD for p in parameters.values()
+        )
+        if accepts_step:
+            return lambda: model.execute(step=self.clock.cycle_time)
+        
+        logger.warning(
+            f"Model {type(model).__name__}.execute() does not accept 'step'. "
+            f"Model should read input parameters from its attributes."
+        )
+        return model.execute
+    
     def _initialize_algorithms(self):
         """初始化所有算法实例"""
         algorithms_config = self.config.get_algorithms()
@@ -243,14 +348,18 @@ class Runner:
                 
                 self.algorithms[name] = algorithm
                 logger.info(f"Algorithm '{name}' ({algo_type}) initialized")
+            
+            # 预热PID计算内核，避免第一个运行周期承担JIT编译耗时
+            if any(isinstance(a, PID) for a in self.algorithms.values()):
+                pid_kernel.warmup()
     
     def _update_params_from_models(self):
         """从模型更新参数值（通用方法，适用于所有模型类型）"""
+        params = self.params
         for name, model in self.models.items():
-            # 使用基类的get_params方法获取所有参数（用于实时数据展示和OPCUA通信）
-            model_params = model.get_params()
-            for param_name, param_value in model_params.items():
-                self.params[f"{name}.{param_name}"] = param_value
+            keys = self._param_keys[name]
+            # 与基类get_params()内容一致，直接写入参数字典（用于实时数据展示和OPCUA通信）
+            model.get_params_into(params, keys)
     
     def _update_all_params(self):
         """
@@ -269,93 +378,62 @@ class Runner:
         self._update_params_from_models()
         self._update_params_from_algorithms()
     
-    def _get_storable_params_from_models(self):
-        """从模型获取需要存储的参数（只包含运行时变化的参数）"""
-        storable_params = {}
+    def _get_storable_params_from_models(self, storable_params: Optional[Dict[str, Any]] = None):
+        """
+        从模型获取需要存储的参数（只包含运行时变化的参数）
+        
+        Args:
+            storable_params: 写入目标字典，None时新建
+        
+        Returns:
+            需要存储的参数字典，键为驻留的"实例名.参数名"
+        """
+        if storable_params is None:
+            storable_params = {}
         for name, model in self.models.items():
             # 使用get_storable_params方法获取需要存储的参数
             if hasattr(model, 'get_storable_params'):
+                keys = self._param_keys[name]
                 model_storable_params = model.get_storable_params()
                 for param_name, param_value in model_storable_params.items():
-                    storable_params[f"{name}.{param_name}"] = param_value
+                    storable_params[keys[param_name]] = param_value
         return storable_params
     
     def _update_params_from_algorithms(self):
         """从算法更新参数值"""
-        for name, algorithm in self.algorithms.items():
-            all_params = algorithm.get_all_params()
-            # 更新配置参数（如kp, ti, td）
-            for param_name, param_value in all_params['config'].items():
-                self.params[f"{name}.{param_name}"] = param_value
-            # 更新输入参数（如pv, sv）
-            for param_name, param_value in all_params['input'].items():
-                self.params[f"{name}.{param_name}"] = param_value
-            # 更新输出参数（如mv, MODE）
-            for param_name, param_value in all_params['output'].items():
-                self.params[f"{name}.{param_name}"] = param_value
-    
-    def _get_storable_params_from_algorithms(self):
-        """从算法获取需要存储的参数（使用算法的get_storable_params方法）"""
-        storable_params = {}
+        for name in self.algorithms:
+            self._update_params_from_single_instance(name)
+    
+    def _get_storable_params_from_algorithms(self, storable_params: Optional[Dict[str, Any]] = None):
+        """
+        从算法获取需要存储的参数（使用算法的get_storable_params方法）
+        
+        Args:
+            storable_params: 写入目标字典，None时新建
+        
+        Returns:
+            需要存储的参数字典，键为驻留的"实例名.参数名"
+        """
+        if storable_params is None:
+            storable_params = {}
         for name, algorithm in self.algorithms.items():
             # 使用算法的get_storable_params方法获取需要存储的参数
             if hasattr(algorithm, 'get_storable_params'):
+                keys = self._param_keys[name]
                 algo_storable_params = algorithm.get_storable_params()
-                for param_name, param_value in algo_storable_params.items():
-                    storable_params[f"{name}.{param_name}"] = param_value
+                storable_params.update(zip(map(keys.__getitem__, algo_storable_params),
+                                           algo_storable_params.values()))
         return storable_params
     
     def _apply_connections(self):
-        """应用连接关系，将输出参数映射到输入参数"""
-        connections = self.config.get_connections()
+        """
+        应用全部连接关系，将输出参数映射到输入参数
         
-        for conn in connections:
-            # 解析连接关系：from和to格式为 "instance.param"
-            from_str = conn.get('from', '')
-            to_str = conn.get('to', '')
-            
-            # 兼容旧格式（from/from_param和to/to_param）
-            if 'from_param' in conn:
-                from_obj = conn['from']
-                from_param = conn['from_param']
-                to_obj = conn['to']
-                to_param = conn['to_param']
-            else:
-                # 新格式：从 "instance.param" 解析
-                from_parts = from_str.split('.', 1)
-                to_parts = to_str.split('.', 1)
-                if len(from_parts) != 2 or len(to_parts) != 2:
-                    logger.warning(f"Invalid connection format: {from_str} -> {to_str}")
-                    continue
-                from_obj, from_param = from_parts
-                to_obj, to_param = to_parts
-            
-            # 获取源参数值
-            source_key = f"{from_obj}.{from_param}"
-            if source_key not in self.params:
-                logger.warning(f"Source parameter not found: {source_key}")
-                continue
-            
-            value = self.params[source_key]
-            
-            # 应用到目标（通用方法，适用于所有模型和算法类型）
-            if to_obj in self.models:
-                # 模型参数：直接使用setattr设置，模型内部会处理
-                model = self.models[to_obj]
-                setattr(model, f'_input_{to_param.lower()}', value)
-            elif to_obj in self.algorithms:
-                # 算法参数：根据参数是否存在于input或config字典中自动判断
-                algorithm = self.algorithms[to_obj]
-                if to_param in algorithm.input:
-                    algorithm.input[to_param] = value
-                elif to_param in algorithm.config:
-                    algorithm.config[to_param] = value
-                else:
-                    # 如果都不存在，默认设置到input（通常连接关系是输入）
-                    algorithm.input[to_param] = value
-                    logger.debug(f"Parameter {to_param} not found in input/config, setting to input")
-            
-            logger.debug(f"Connection: {source_key} -> {to_obj}.{to_param} = {value}")
+        按连接计划逐个目标实例应用，目标参数的设置方式（模型属性、算法input/config）
+        已在构建计划时确定，这里不再做类型和字典成员判断。
+        """
+        for instance_name in self._connection_plan:
+            self._apply_connections_for_instance(instance_name)
     
     def _set_instance_input(self, instance_name: str, param_name: str, value: Any):
         """
@@ -364,7 +442,7 @@ class Runner:
         统一接口，不区分模型和算法。根据连接关系，将上游实例的输出值
         设置到当前实例的参数中。
         
-        设置逻辑：
+        设置逻辑（与连接计划中的setter一致，见 _make_input_setter()）：
         - 模型实例：直接设置到属性（如 model.valve_opening = value）
         - 算法实例：设置到 input 或 config 字典
         
@@ -373,48 +451,51 @@ class Runner:
             param_name: 参数名称（从连接关系中的 to_param 获取）
             value: 参数值（从上游实例的参数字典中读取）
         """
-        instance = self._get_instance(instance_name)
-        if instance is None:
+        setter = self._make_input_setter(instance_name, param_name)
+        if setter is None:
             logger.warning(f"Instance {instance_name} not found when setting input")
             return
         
-        if instance_name in self.models:
-            # 模型参数：直接设置到属性
-            # 参数名保持原样（如 valve_opening），不添加 _input_ 前缀
-            setattr(instance, param_name, value)
-            logger.debug(f"Set model {instance_name}.{param_name} = {value}")
-        elif instance_name in self.algorithms:
-            # 算法参数：设置到 input 或 config 字典
-            algorithm = instance
-            if param_name in algorithm.input:
-                algorithm.input[param_name] = value
-                logger.debug(f"Set algorithm {instance_name}.input[{param_name}] = {value}")
-            elif param_name in algorithm.config:
-                algorithm.config[param_name] = value
-                logger.debug(f"Set algorithm {instance_name}.config[{param_name}] = {value}")
-            else:
-                # 如果都不存在，默认设置到input（通常连接关系是输入）
-                algorithm.input[param_name] = value
-                logger.debug(f"Parameter {param_name} not found in input/config, set to input[{param_name}] = {value}")
+        setter(value)
+        logger.debug(f"Set {instance_name}.{param_name} = {value}")
     
-    def _apply_connections_for_instance(self, instance_name: str):
+    def _make_input_setter(self, instance_name: str, param_name: str) -> Optional[Callable[[Any], None]]:
         """
-        只应用与指定实例相关的连接关系（输入连接）
+        为实例的输入参数绑定setter
         
-        从参数字典读取上游实例的输出值，设置到当前实例的输入参数中。
-        连接关系是固定的，不需要每个周期都全局应用，只需要在实例执行前
-        应用该实例的输入连接即可。
+        在构建连接计划时只判断一次实例类型和参数位置，运行周期内直接调用：
+        - 模型实例：绑定 setattr(model, param_name, ...)
+        - 算法实例：按参数所在位置绑定 input 或 config 字典的 __setitem__，
+          都不存在时默认绑定到 input
         
         Args:
             instance_name: 实例名称
+            param_name: 参数名称
+        
+        Returns:
+            接收参数值的setter，实例不存在时返回None
         """
-        connections = self.config.get_connections()
+        if instance_name in self.models:
+            return functools.partial(setattr, self.models[instance_name], param_name)
+        if instance_name in self.algorithms:
+            algorithm = self.algorithms[instance_name]
+            if param_name not in algorithm.input and param_name in algorithm.config:
+                return functools.partial(algorithm.config.__setitem__, param_name)
+            return functools.partial(algorithm.input.__setitem__, param_name)
+        return None
+    
+    def _rebuild_connection_plan(self):
+        """
+        重建连接计划
         
-        for conn in connections:
-            # 解析连接关系：from和to格式为 "instance.param"
-            from_str = conn.get('from', '')
-            to_str = conn.get('to', '')
-            
+        从组态读取并缓存连接关系到 self._connections，解析一次全部连接关系，
+        按目标实例分组，并为每个连接绑定好setter。
+        在实例创建后以及配置更新后调用，实例或连接变化后必须重建。
+        """
+        self._connections = self.config.get_connections()
+        plan: Dict[str, List[Tuple[str, str, Callable[[Any], None]]]] = {}
+        
+        for conn in self._connections:
             # 兼容旧格式（from/from_param和to/to_param）
             if 'from_param' in conn:
                 from_obj = conn['from']
@@ -423,30 +504,119 @@ class Runner:
                 to_param = conn['to_param']
             else:
                 # 新格式：从 "instance.param" 解析
+                from_str = conn.get('from', '')
+                to_str = conn.get('to', '')
                 from_parts = from_str.split('.', 1)
                 to_parts = to_str.split('.', 1)
                 if len(from_parts) != 2 or len(to_parts) != 2:
+                    logger.warning(f"Invalid connection format: {from_str} -> {to_str}")
                     continue
                 from_obj, from_param = from_parts
                 to_obj, to_param = to_parts
             
-            # 只处理目标为当前实例的连接
-            if to_obj != instance_name:
+            setter = self._make_input_setter(to_obj, to_param)
+            if setter is None:
+                logger.warning(f"Instance {to_obj} not found when building connection plan")
                 continue
             
-            # 从参数字典读取源参数值
-            source_key = f"{from_obj}.{from_param}"
-            if source_key not in self.params:
+            # 源参数键使用参数键表中的驻留字符串，与参数字典中的键是同一个对象
+            source_key = self._param_keys[from_obj][from_param]
+            plan.setdefault(to_obj, []).append((source_key, to_param, setter))
+        
+        self._connection_plan = plan
+        logger.debug(f"Connection plan rebuilt: {sum(len(v) for v in plan.values())} connections")
+    
+    def _apply_connections_for_instance(self, instance_name: str):
+        """
+        只应用与指定实例相关的连接关系（输入连接）
+        
+        从参数字典读取上游实例的输出值，设置到当前实例的输入参数中。
+        连接关系是固定的，不需要每个周期都全局应用，只需要在实例执行前
+        应用该实例的输入连接即可。连接已由 _rebuild_connection_plan() 预先解析。
+        
+        Args:
+            instance_name: 实例名称
+        """
+        params = self.params
+        trace = self._trace_on
+        
+        for source_key, to_param, setter in self._connection_plan.get(instance_name, ()):
+            # 从参数字典读取源参数值（一次查找）
+            value = params.get(source_key, _MISSING)
+            if value is _MISSING:
                 # 如果参数字典中没有值，可能是第一个周期或上游实例还未执行
                 # 跳过，等待上游实例执行后更新参数字典
-                logger.debug(f"Source parameter not found in params dict: {source_key}, skipping")
+                if trace:
+                    logger.debug(f"Source parameter not found in params dict: {source_key}, skipping")
                 continue
             
-            value = self.params[source_key]
-            
             # 设置到当前实例的输入
-            self._set_instance_input(instance_name, to_param, value)
-            logger.debug(f"Connection: {source_key} -> {instance_name}.{to_param} = {value}")
+            setter(value)
+            if trace:
+                logger.debug(f"Connection: {source_key} -> {instance_name}.{to_param} = {value}")
+    
+    def _rebuild_execution_steps(self):
+        """
+        根据执行顺序和连接计划重建执行步骤
+        
+        对执行顺序中存在连接关系的每对实例保持原有先后关系，按最长路径将实例
+        划分为执行阶段：同一阶段内的实例互不连接，执行先后不影响结果。
+        同一阶段内支持 execute_batch() 的同类型模型数量达到 VECTORIZE_MIN_BATCH
+        时合并为一个批量步骤（NumPy向量化执行），其余实例逐个执行。
+        没有可合并的实例时，执行步骤与执行顺序完全一致。
+        """
+        order = self.execution_order
+        position = {name: i for i, name in enumerate(order)}
+        
+        # 每个实例必须在其之后执行的前驱（连接两端中执行顺序靠前的一方）
+        predecessors: Dict[str, Set[str]] = {name: set() for name in order}
+        for target, entries in self._connection_plan.items():
+            if target not in position:
+                continue
+            for source_key, _, _ in entries:
+                source = source_key.split('.', 1)[0]
+                if source == target or source not in position:
+                    continue
+                first, second = sorted((source, target), key=position.__getitem__)
+                predecessors[second].add(first)
+        
+        # 执行阶段 = 前驱中最大阶段 + 1（前驱总在前面，一次遍历即可）
+        stage: Dict[str, int] = {}
+        for name in order:
+            stage[name] = max((stage[p] + 1 for p in predecessors[name]), default=0)
+        
+        # 按 (阶段, 模型类型) 分组，找出可以批量执行的实例
+        groups: Dict[Tuple[int, type], List[str]] = {}
+        for name in order:
+            model = self.models.get(name)
+            if model is not None and hasattr(type(model), 'execute_batch'):
+                groups.setdefault((stage[name], type(model)), []).append(name)
+        batch_of: Dict[str, Tuple[int, type]] = {
+            name: key
+            for key, names in groups.items() if len(names) >= self.VECTORIZE_MIN_BATCH
+            for name in names
+        }
+        
+        if not batch_of:
+            self._execution_steps = tuple(((name,), [], None) for name in order)
+            return
+        
+        steps = []
+        emitted = set()
+        for name in sorted(order, key=lambda n: (stage[n], position[n])):
+            key = batch_of.get(name)
+            if key is None:
+                steps.append(((name,), [], None))
+            elif key not in emitted:
+                emitted.add(key)
+                names = tuple(groups[key])
+                steps.append((names, [self.models[n] for n in names], key[1].execute_batch))
+        
+        self._execution_steps = tuple(steps)
+        logger.info(
+            f"Execution steps rebuilt: {len(steps)} steps, "
+            f"{len(batch_of)} instances in {len(emitted)} vectorized batches"
+        )
     
     def _get_instance(self, instance_name: str):
         """
@@ -473,7 +643,8 @@ class Runner:
         （通过 _apply_connections_for_instance() 设置）。
         
         执行逻辑：
-        - 模型实例：直接调用 execute(step=step_size)
+        - 模型实例：调用初始化时绑定的执行函数（见 _bind_model_execute()）
+          - 接受step参数的模型调用 execute(step=step_size)，否则调用 execute()
           - 模型的 execute() 方法应该自己从属性中读取输入参数
           - 例如：model.execute(step=step_size) 内部读取 model.valve_opening
         - 算法实例：直接调用 execute()
@@ -487,28 +658,19 @@ class Runner:
         Args:
             instance_name: 实例名称
         """
-        instance = self._get_instance(instance_name)
-        if instance is None:
+        # 模型执行：使用预先绑定的执行函数，模型自己从属性读取输入
+        model_execute = self._model_exec.get(instance_name)
+        if model_execute is not None:
+            model_execute()
+            return
+        
+        algorithm = self.algorithms.get(instance_name)
+        if algorithm is None:
             logger.warning(f"Instance {instance_name} not found")
             return
         
-        if instance_name in self.models:
-            # 模型执行：传递 step 参数，模型自己从属性读取输入
-            step_size = self.clock.cycle_time
-            try:
-                instance.execute(step=step_size)
-            except TypeError:
-                # 如果execute不接受step参数，尝试无参数调用
-                try:
-                    instance.execute()
-                except Exception as e:
-                    logger.warning(
-                        f"Model {instance_name} execute() failed: {e}. "
-                        f"Model should read input parameters from its attributes."
-                    )
-        else:
-            # 算法执行：算法从 input/config 字典读取参数，直接调用 execute()
-            instance.execute()
+        # 算法执行：算法从 input/config 字典读取参数，直接调用 execute()
+        algorithm.execute()
     
     def _update_params_from_single_instance(self, instance_name: str):
         """
@@ -517,20 +679,14 @@ class Runner:
         Args:
             instance_name: 实例名称
         """
-        if instance_name in self.models:
-            model = self.models[instance_name]
-            model_params = model.get_params()
-            for param_name, param_value in model_params.items():
-                self.params[f"{instance_name}.{param_name}"] = param_value
-        elif instance_name in self.algorithms:
-            algorithm = self.algorithms[instance_name]
-            all_params = algorithm.get_all_params()
-            for param_name, param_value in all_params['config'].items():
-                self.params[f"{instance_name}.{param_name}"] = param_value
-            for param_name, param_value in all_params['input'].items():
-                self.params[f"{instance_name}.{param_name}"] = param_value
-            for param_name, param_value in all_params['output'].items():
-                self.params[f"{instance_name}.{param_name}"] = param_value
+        # 实例直接把参数写入参数字典（键为驻留的"实例名.参数名"），不创建中间字典
+        instance = self.models.get(instance_name)
+        if instance is None:
+            # 算法：配置参数（如kp, ti, td）、输入参数（如pv, sv）、输出参数（如mv, MODE）
+            instance = self.algorithms.get(instance_name)
+            if instance is None:
+                return
+        instance.get_params_into(self.params, self._param_keys[instance_name])
     
     def execute_one_cycle(self):
         """
@@ -553,9 +709,12 @@ class Runner:
         - 参数字典在实例执行后立即更新，供后续实例使用
         
         Returns:
-            当前周期的所有参数值字典
+            当前周期的所有参数值字典（与推送、快照共享，调用方不得修改）
         """
         with self._lock:
+            # 每个周期判断一次是否输出逐连接/逐周期的跟踪日志
+            self._trace_on = self.trace_cycle and logger.isEnabledFor(logging.DEBUG)
+            
             # 步骤1: 第一个周期初始化参数字典（建立初始快照）
             if self._first_cycle:
                 self._update_all_params()
@@ -563,95 +722,267 @@ class Runner:
                 logger.debug("First cycle: initialized params dictionary")
             
             # 步骤2: 按组态提供的顺序执行所有实例
-            for instance_name in self.execution_order:
-                # 2.1: 应用该实例的输入连接关系（从参数字典读取上游输出）
-                self._apply_connections_for_instance(instance_name)
-                
-                # 2.2: 执行实例
-                self._execute_single_instance(instance_name)
-                
-                # 2.3: 立即更新参数到参数字典，供后续实例使用
-                self._update_params_from_single_instance(instance_name)
+            for names, instances, batch_execute in self._execution_steps:
+                if batch_execute is None:
+                    instance_name = names[0]
+                    
+                    # 2.1: 应用该实例的输入连接关系（从参数字典读取上游输出）
+                    self._apply_connections_for_instance(instance_name)
+                    
+                    # 2.2: 执行实例
+                    self._execute_single_instance(instance_name)
+                    
+                    # 2.3: 立即更新参数到参数字典，供后续实例使用
+                    self._update_params_from_single_instance(instance_name)
+                else:
+                    # 同一执行阶段的同类型模型：批量应用连接、向量化执行、批量更新参数
+                    for instance_name in names:
+                        self._apply_connections_for_instance(instance_name)
+                    batch_execute(instances, self.clock.cycle_time)
+                    for instance_name in names:
+                        self._update_params_from_single_instance(instance_name)
             
-            # 步骤3: 存储和推送数据（所有实例执行完成后）
-            self._store_and_push_data()
+            # 本周期参数快照只复制一次，推送、快照保存和返回值共享同一个字典
+            # 注意：调用方不得修改该字典
+            snapshot = dict(self.params)
             
-            # 步骤4: 定期保存快照
-            self._snapshot_counter += 1
-            if self._snapshot_counter >= self.SNAPSHOT_SAVE_INTERVAL:
-                self._save_snapshot()
-                self._snapshot_counter = 0
+            # 发布本周期快照：单次引用赋值，读取方无需加锁即可拿到完整一致的参数
+            # 在锁内发布，避免覆盖 set_parameter 在复制之后发布的新值
+            self._published_params = snapshot
             
-            # 返回当前周期的所有参数
-            return self.params.copy()
+            # 步骤3: 存储和推送数据（所有实例执行完成后）
+            self._store_and_push_data(snapshot)
+        
+        # 步骤4: 定期保存快照（快照已与运行参数分离，无需持有锁）
+        self._snapshot_counter += 1
+        if self._snapshot_counter >= self.SNAPSHOT_SAVE_INTERVAL:
+            self._save_snapshot(snapshot)
+            self._snapshot_counter = 0
+        
+        # 返回当前周期的所有参数（只读）
+        return snapshot
     
-    def _store_and_push_data(self):
+    def _store_and_push_data(self, snapshot: Dict[str, Any]):
         """
         存储和推送周期数据
         
+        周期线程只负责收集本周期数据（参数快照、需要存储的参数、时间戳），
+        实际的I/O交给I/O线程执行，数据库或Redis的延迟不会拖慢下一个周期：
+        
         1. 推送到Redis：
-           - 更新 plc:data:current 键（最新数据）
-           - 追加到 plc:data:history 列表（历史数据，保留最近1000条）
+           - 更新 plc:data:current 键（最新数据），并在 plc:data:current:updated 频道发布通知
+           - 追加到 plc:data:stream 流（历史数据，保留约最近1000条，
+             定期写入完整数据帧，其余周期只写入变化的参数）
            - 供通信模块（OPCUA）和监控模块（Web）读取
         
         2. 存储到数据库（如果提供了数据存储模块）：
            - 只存储需要存储的参数（使用 get_storable_params()）
-           - 同步存储，避免数据丢失
            - 供历史数据查询使用
+        
+        I/O队列已满（I/O持续落后）时丢弃本周期数据并记录警告；
+        I/O线程未运行时（如直接调用 execute_one_cycle()）同步执行。
+        
+        Args:
+            snapshot: 本周期的参数快照（只读）
+        """
+        # 使用系统时间戳
+        timestamp = time.time()
+        sim_time = self.clock.current_time
+        
+        # 只存储需要存储的参数（运行时变化的参数），必须在周期线程中读取实例状态
+        storable_params = None
+        if self.data_storage:
+            try:
+                # 模型和算法直接写入同一个字典，键复用参数字典的驻留键
+                storable_params = self._get_storable_params_from_models()
+                self._get_storable_params_from_algorithms(storable_params)
+            except Exception as e:
+                logger.error(f"Failed to collect storable params: {e}", exc_info=True)
+                storable_params = None
+        
+        item = (snapshot, storable_params, timestamp, sim_time)
+        
+        if self._io_thread is None or not self._io_thread.is_alive():
+            self._write_cycle_data(*item)
+            return
+        
+        try:
+            self._io_queue.put_nowait(item)
+        except queue.Full:
+            logger.warning("I/O queue is full, dropping data of current cycle")
+    
+    def _write_cycle_data(self, snapshot: Dict[str, Any], storable_params: Optional[Dict[str, Any]],
+                          timestamp: float, sim_time: float):
+        """
+        执行一个周期的数据I/O（推送到Redis并存储到数据库）
+        
+        Args:
+            snapshot: 周期参数快照（只读）
+            storable_params: 需要存储的参数，None表示不存储
+            timestamp: 周期的系统时间戳
+            sim_time: 周期的模拟时间
         """
         # 推送到Redis（用于实时数据展示和OPCUA通信）
-        self._push_to_redis()
+        self._push_to_redis(snapshot, timestamp)
         
         # 如果提供了数据存储模块，直接存储数据（避免Redis历史列表溢出）
-        if self.data_storage:
+        if storable_params is not None:
             try:
-                # 使用系统时间戳
-                timestamp = datetime.now()
-                sim_time = self.clock.current_time
-                
-                # 只存储需要存储的参数（运行时变化的参数）
-                storable_params = {}
-                storable_params.update(self._get_storable_params_from_models())
-                storable_params.update(self._get_storable_params_from_algorithms())
-                
-                # 直接存储数据（同步调用）
                 self.data_storage.store_data_sync(
                     params=storable_params,
-                    timestamp=timestamp,
+                    timestamp=datetime.fromtimestamp(timestamp),
                     sim_time=sim_time
                 )
             except Exception as e:
                 logger.error(f"Failed to store data directly: {e}", exc_info=True)
     
-    def _push_to_redis(self):
-        """将当前参数推送到Redis"""
+    def _io_loop(self):
+        """
+        I/O循环（在独立线程中执行）
+        
+        从I/O队列中取出周期数据执行推送和存储，每处理完一个周期的数据后
+        写入快照槽位中待保存的快照。收到None时保存完待保存的快照后退出。
+        """
+        while True:
+            item = self._io_queue.get()
+            if item is not None:
+                try:
+                    self._write_cycle_data(*item)
+                except Exception as e:
+                    logger.error(f"Error in I/O loop: {e}", exc_info=True)
+            
+            with self._snapshot_slot_lock:
+                snapshot_params, self._snapshot_slot = self._snapshot_slot, None
+            if snapshot_params is not None:
+                self._write_snapshot(snapshot_params)
+            
+            if item is None:
+                break
+        
+        logger.info("I/O loop stopped")
+    
+    def _format_datetime(self, timestamp: float) -> str:
+        """
+        格式化推送数据中的日期时间（本地时间，格式 "%Y-%m-%d %H:%M:%S"）
+        
+        按分钟缓存 "YYYY-MM-DD HH:MM:" 前缀，同一分钟内只拼接秒数，
+        不再每个周期创建datetime对象并调用strftime。
+        
+        Args:
+            timestamp: 系统时间戳
+        
+        Returns:
+            日期时间字符串
+        """
+        whole = int(timestamp)
+        second = whole - self._datetime_minute_start
+        if 0 <= second < 60:
+            return f"{self._datetime_minute_prefix}{second:02d}"
+        
+        dt = datetime.fromtimestamp(whole)
+        self._datetime_minute_start = whole - dt.second
+        self._datetime_minute_prefix = dt.strftime("%Y-%m-%d %H:%M:")
+        return f"{self._datetime_minute_prefix}{dt.second:02d}"
+    
+    def _push_to_redis(self, snapshot: Dict[str, Any], timestamp: float):
+        """
+        将当前参数推送到Redis
+        
+        Args:
+            snapshot: 本周期的参数快照（只读，直接序列化，不再复制）
+            timestamp: 周期的系统时间戳
+        """
         try:
-            # 使用系统时间戳
-            timestamp = time.time()
-            datetime_str = datetime.fromtimestamp(timestamp).strftime("%Y-%m-%d %H:%M:%S")
+            datetime_str = self._format_datetime(timestamp)
             
             data = {
                 'timestamp': timestamp,
                 'datetime': datetime_str,
-                'params': self.params.copy()
+                'params': snapshot
             }
             
-            # 序列化为JSON
-            json_data = json.dumps(data, ensure_ascii=False)
+            # 序列化为JSON（bytes直接写入Redis，无需再解码）
+            json_data = _dumps_payload(data)
             
-            # 推送到Redis（使用当前时间戳作为键的一部分）
-            redis_key = f"{self.REDIS_KEY_PREFIX}current"
-            self.redis_client.set(redis_key, json_data)
+            # 历史数据流条目：完整数据帧直接复用current的JSON，其余周期只写入变化的参数
+            # 每个条目带递增序号，差量帧另带其基准完整数据帧的序号
+            delta = self._history_delta(snapshot)
+            self._history_seq += 1
+            if delta is None:
+                self._history_base_seq = self._history_seq
+                history_fields = {
+                    self.HISTORY_STREAM_FIELD: json_data,
+                    self.HISTORY_STREAM_SEQ_FIELD: self._history_seq
+                }
+            else:
+                history_fields = {
+                    self.HISTORY_STREAM_DELTA_FIELD: _dumps_payload({
+                        'timestamp': timestamp,
+                        'datetime': datetime_str,
+                        'params': delta
+                    }),
+                    self.HISTORY_STREAM_SEQ_FIELD: self._history_seq,
+                    self.HISTORY_STREAM_BASE_FIELD: self._history_base_seq
+                }
             
-            # 同时推送到历史数据列表（保留最近1000条）
-            history_key = f"{self.REDIS_KEY_PREFIX}history"
-            self.redis_client.lpush(history_key, json_data)
-            self.redis_client.ltrim(history_key, 0, 999)  # 只保留最近1000条
+            # 使用非事务pipeline，三条命令合并为一次往返
+            # 1. 更新最新数据键（始终为完整数据）
+            # 2. 追加到历史数据流（近似裁剪到约1000条，O(1)追加，无需LTRIM重写列表）
+            # 3. 发布最新数据更新通知（只发送时间戳，订阅方按需读取最新数据键）
+            pipe = self.redis_client.pipeline(transaction=False)
+            pipe.set(self._current_key, json_data)
+            pipe.xadd(
+                self._history_key,
+                history_fields,
+                maxlen=self.HISTORY_STREAM_MAXLEN,
+                approximate=True
+            )
+            pipe.publish(self._current_updated_channel, repr(timestamp))
+            pipe.execute()
             
-            logger.debug(f"Data pushed to Redis: {len(self.params)} parameters")
+            if self._trace_on:
+                logger.debug(f"Data pushed to Redis: {len(snapshot)} parameters")
         except Exception as e:
+            # 推送失败时下一次写入完整数据帧，避免订阅者基于丢失的条目叠加差量
+            self._last_pushed_params = None
             logger.error(f"Failed to push data to Redis: {e}")
     
+    def _history_delta(self, snapshot: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        计算本周期相对上一次推送变化的参数
+        
+        以下情况返回None，表示本周期应写入完整数据帧：
+        - 第一次推送或上一次推送失败
+        - 距上一个完整数据帧已达到 HISTORY_KEYFRAME_INTERVAL 个周期
+        - 参数集合发生变化（如配置更新后增删了实例），差量无法表示删除
+        
+        参数值逐个比较：值不相等或类型变化（如 1 -> True、0 -> 0.0，二者==相等）都计入差量，
+        保证按差量重建的读取方得到与完整数据帧相同类型的值。
+        
+        Args:
+            snapshot: 本周期的参数快照（只读，会被保留为下一次比较的基准）
+        
+        Returns:
+            {参数名: 新值} 差量字典，或None
+        """
+        last = self._last_pushed_params
+        self._last_pushed_params = snapshot
+        
+        if (last is None
+                or self._history_since_keyframe >= self.HISTORY_KEYFRAME_INTERVAL - 1
+                or snapshot.keys() != last.keys()):
+            self._history_since_keyframe = 0
+            return None
+        
+        delta = {}
+        for name, value in snapshot.items():
+            last_value = last[name]
+            if value is not last_value and (type(value) is not type(last_value) or value != last_value):
+                delta[name] = value
+        
+        self._history_since_keyframe += 1
+        return delta
+    
     def _update_instance_params(self):
         """
         更新已有实例的参数值（不重新创建实例，保留状态）
@@ -740,7 +1071,7 @@ class Runner:
             
             # 重新获取执行顺序（如果连接关系变化了）
             try:
-                new_execution_order = self.config.get_execution_order()
+                new_execution_order = tuple(self.config.get_execution_order())
                 if new_execution_order != self.execution_order:
                     self.execution_order = new_execution_order
                     logger.info(f"Execution order updated: {self.execution_order}")
@@ -751,6 +1082,11 @@ class Runner:
             # 更新时钟周期
             self.clock.cycle_time = self.config.get_cycle_time()
             
+            # 重建连接计划、位号写入表和执行步骤（实例或连接关系可能已变化）
+            self._rebuild_connection_plan()
+            self._rebuild_param_setters()
+            self._rebuild_execution_steps()
+            
             # 如果重新创建了实例，需要重新初始化参数值
             if rebuild_instances:
                 self.params.clear()
@@ -758,17 +1094,38 @@ class Runner:
                 self._update_params_from_algorithms()
                 # 重置第一个周期标志，下次执行时会重新初始化
                 self._first_cycle = True
+                self._published_params = dict(self.params)
             
             logger.info("Configuration updated")
     
-    def _save_snapshot(self):
+    def _save_snapshot(self, snapshot: Optional[Dict[str, Any]] = None):
         """
         保存运行时快照
         
-        将当前所有实例的参数值保存到快照文件。
+        将当前所有实例的参数值保存到快照文件。I/O线程运行时，只把快照
+        放入待保存槽位，由I/O线程在处理下一个周期的数据后写入（槽位中未保存的
+        旧快照直接被新快照替换），文件写入不占用周期线程；否则同步写入。
+        
+        Args:
+            snapshot: 本周期已复制的参数快照（可选，未提供时复制当前参数字典）
+        """
+        snapshot_params = snapshot if snapshot is not None else dict(self.params)
+        
+        if self._io_thread is not None and self._io_thread.is_alive():
+            with self._snapshot_slot_lock:
+                self._snapshot_slot = snapshot_params
+            return
+        
+        self._write_snapshot(snapshot_params)
+    
+    def _write_snapshot(self, snapshot_params: Dict[str, Any]):
+        """
+        将快照写入快照文件
+        
+        Args:
+            snapshot_params: 参数快照（只读）
         """
         try:
-            snapshot_params = self.params.copy()
             success = self.snapshot_manager.save_snapshot(snapshot_params)
             if success:
                 logger.debug(f"Snapshot saved ({len(snapshot_params)} parameters)")
@@ -785,179 +1142,182 @@ class Runner:
         1. plc:command:write_parameter - 参数写入命令
         2. plc:config:update - 配置更新
         """
-        import redis
-        
-        # 创建Redis订阅连接（需要单独的连接）
-        pubsub = self.redis_client.pubsub()
-        pubsub.subscribe(
-            "plc:command:write_parameter",
-            "plc:config:update"
-        )
+        # 订阅连接通常已在start()中创建（保证stop()总能取消订阅）
+        pubsub = self._pubsub
+        if pubsub is None:
+            pubsub = self._pubsub = self._subscribe_commands()
         
         logger.info("Command subscriber started, listening for parameter write commands and config updates")
         
         try:
-            while self._running:
+            while not self._stop_event.is_set():
                 try:
-                    # 非阻塞接收消息
-                    message = pubsub.get_message(timeout=0.1)
-                    if message and message['type'] == 'message':
-                        channel = message['channel']
-                        try:
-                            if channel == "plc:command:write_parameter":
-                                # 参数写入命令
-                                command_data = json.loads(message['data'])
-                                if command_data.get('action') == 'write_parameter':
-                                    param_name = command_data.get('param_name')
-                                    value = command_data.get('value')
-                                    if param_name and value is not None:
-                                        logger.info(f"Received parameter write command from Redis: {param_name} = {value}")
-                                        success = self.set_parameter(param_name, value)
-                                        if success:
-                                            logger.info(f"Parameter {param_name} set to {value} successfully")
-                                        else:
-                                            logger.warning(f"Failed to set parameter {param_name} to {value}")
-                            
-                            elif channel == "plc:config:update":
-                                # 配置更新
-                                config_data = json.loads(message['data'])
-                                config_type = config_data.get('type', 'config_update')
-                                
-                                if config_type == 'config_update_diff':
-                                    # 差异化的配置更新（新方式）
-                                    logger.info("Received configuration update diff from Redis")
-                                    # 设置更新标志，在周期间隙执行
-                                    self._config_update_pending = True
-                                    self._pending_config_update = config_data
-                                    logger.info("Configuration update pending, will be applied at next cycle gap")
-                                
-                                elif config_type == 'config_update':
-                                    # 完整配置更新（兼容旧方式）
-                                    new_config = config_data.get('config', {})
-                                    logger.info("Received full configuration update from Redis")
-                                    # 设置更新标志，在周期间隙执行
-                                    self._config_update_pending = True
-                                    self._pending_config_update = {
-                                        'type': 'config_update',
-                                        'config': new_config
-                                    }
-                                    logger.info("Configuration update pending, will be applied at next cycle gap")
-                                
-                                elif config_type == 'config_reset':
-                                    # 配置重置
-                                    new_config = config_data.get('config', {})
-                                    logger.info("Received configuration reset from Redis")
-                                    # 设置更新标志，在周期间隙执行
-                                    self._config_update_pending = True
-                                    self._pending_config_update = {
-                                        'type': 'config_reset',
-                                        'config': new_config
-                                    }
-                                    logger.info("Configuration reset pending, will be applied at next cycle gap")
-                                
-                        except json.JSONDecodeError as e:
-                            logger.error(f"Failed to parse message: {e}")
-                        except Exception as e:
-                            logger.error(f"Error processing message: {e}", exc_info=True)
+                    # 阻塞等待消息，空闲时不轮询；stop()取消全部订阅后listen()自然结束
+                    for message in pubsub.listen():
+                        if self._stop_event.is_set():
+                            break
+                        if message['type'] == 'message':
+                            self._handle_command_message(message)
+                    break
                 except Exception as e:
+                    if self._stop_event.is_set():
+                        break
                     logger.error(f"Error in command subscriber loop: {e}")
-                    time.sleep(0.1)
+                    self._stop_event.wait(0.1)
         finally:
             pubsub.close()
+            self._pubsub = None
             logger.info("Command subscriber stopped")
     
-    def _apply_pending_config_update(self):
+    def _subscribe_commands(self):
         """
-        应用待处理的配置更新（在周期间隙执行）
+        创建命令订阅连接并订阅命令频道
         
-        此方法在_run_loop()的周期间隙调用，确保线程安全
+        Returns:
+            已订阅的PubSub对象
         """
-        if not self._pending_config_update:
-            return
+        # 创建Redis订阅连接（需要单独的连接）
+        pubsub = self.redis_client.pubsub()
+        pubsub.subscribe(*self._channel_handlers)
+        return pubsub
+    
+    def _handle_command_message(self, message: dict):
+        """
+        处理一条订阅消息（参数写入命令或配置更新）
         
-        update_data = self._pending_config_update
-        config_type = update_data.get('type', 'config_update')
+        按频道查分发表调用对应的处理方法，未知频道的消息直接忽略。
         
-        if config_type == 'config_update_diff':
-            # 差异化的配置更新
-            self._apply_config_update_diff(update_data)
-        elif config_type == 'config_update':
-            # 完整配置更新（兼容旧方式）
-            config_dict = update_data.get('config', {})
-            self._apply_full_config_update(config_dict)
-        elif config_type == 'config_reset':
-            # 配置重置
-            config_dict = update_data.get('config', {})
-            self._apply_config_reset(config_dict)
+        Args:
+            message: pubsub收到的message类型消息
+        """
+        handler = self._channel_handlers.get(message['channel'])
+        if handler is None:
+            return
+        try:
+            handler(message['data'])
+        except json.JSONDecodeError as e:
+            logger.error(f"Failed to parse message: {e}")
+        except Exception as e:
+            logger.error(f"Error processing message: {e}", exc_info=True)
     
-    def _apply_config_update_diff(self, update_data: dict):
+    def _handle_param_write(self, data):
         """
-        应用差异化的配置更新
+        处理参数写入命令（频道 plc:command:write_parameter）
         
         Args:
-            update_data: 包含diff和full_config的更新数据
+            data: 消息内容（JSON）
         """
-        diff = update_data.get('diff', {})
-        full_config = update_data.get('full_config', {})
-        rebuild_instances = update_data.get('rebuild_instances', False)
-        cycle_time_changed = update_data.get('cycle_time_changed', False)
-        new_cycle_time = update_data.get('cycle_time')
+        command_data = _loads_payload(data)
+        if command_data.get('action') == 'write_parameter':
+            param_name = command_data.get('param_name')
+            value = command_data.get('value')
+            if param_name and value is not None:
+                logger.info(f"Received parameter write command from Redis: {param_name} = {value}")
+                success = self.set_parameter(param_name, value)
+                if success:
+                    logger.info(f"Parameter {param_name} set to {value} successfully")
+                else:
+                    logger.warning(f"Failed to set parameter {param_name} to {value}")
+    
+    def _handle_config_update(self, data):
+        """
+        处理配置更新消息（频道 plc:config:update）
         
-        with self._lock:
-            # 1. 应用差异到plc_configuration（使用在线配置API）
-            # 删除已移除的模型
-            for name in diff.get('removed_models', []):
-                self.config.online_remove_model(name)
-                logger.info(f"Removed model: {name}")
-            
-            # 删除已移除的算法
-            for name in diff.get('removed_algorithms', []):
-                self.config.online_remove_algorithm(name)
-                logger.info(f"Removed algorithm: {name}")
-            
-            # 添加新模型
-            for name, model_config in diff.get('added_models', {}).items():
-                model_type = model_config.get('type', 'unknown')
-                params = model_config.get('params', {})
-                self.config.online_add_model(name, model_type, params)
-                logger.info(f"Added model: {name} ({model_type})")
-            
-            # 添加新算法
-            for name, algo_config in diff.get('added_algorithms', {}).items():
-                algo_type = algo_config.get('type', 'unknown')
-                params = algo_config.get('params', {})
-                self.config.online_add_algorithm(name, algo_type, params)
-                logger.info(f"Added algorithm: {name} ({algo_type})")
-            
-            # 更新修改的模型
-            for name, change in diff.get('modified_models', {}).items():
-                new_config = change.get('to', {})
-                params = new_config.get('params', {})
-                self.config.online_update_model(name, params)
-                logger.info(f"Updated model: {name}")
+        订阅线程不解析消息，只按到达顺序保存原始消息，
+        由运行循环在周期间隙解析并应用（见 _apply_pending_config_update()）。
+        
+        Args:
+            data: 消息内容（JSON）
+        """
+        with self._pending_lock:
+            self._pending_config_updates.append(data)
+        logger.info("Received configuration update from Redis, will be applied at next cycle gap")
+    
+    def _apply_pending_config_update(self):
+        """
+        应用待处理的配置更新（在周期间隙执行）
+        
+        此方法在_run_loop()的周期间隙调用，确保线程安全。
+        取出订阅线程保存的全部原始消息，解析后合并（见 _coalesce_config_updates()），
+        再按顺序应用，单组更新失败不影响其余更新。
+        """
+        with self._pending_lock:
+            updates, self._pending_config_updates = self._pending_config_updates, []
+        
+        for config_type, group in self._coalesce_config_updates(updates):
+            try:
+                logger.info(f"Applying pending configuration update at cycle gap: {config_type} "
+                            f"({len(group)} message(s))")
+                self._config_type_handlers[config_type](group)
+                logger.info("Configuration update applied successfully")
+            except Exception as e:
+                logger.error(f"Failed to apply configuration update: {e}", exc_info=True)
+    
+    def _coalesce_config_updates(self, raw_updates: List[Any]) -> List[Tuple[str, List[dict]]]:
+        """
+        解析并合并一个周期内收到的配置更新消息
+        
+        合并规则（合并后的应用结果与逐条应用一致）：
+        - 完整配置更新和配置重置是全量的，覆盖之前的全部更新；被覆盖的更新中有
+          配置重置时，完整配置更新升级为配置重置（仍需清除快照）
+        - 连续的差异更新合并为一组，依次应用差异后只更新一次实例
+        - 无法解析或类型未知的消息记录错误后跳过
+        
+        Args:
+            raw_updates: 按到达顺序排列的原始消息（JSON）
+        
+        Returns:
+            [(配置更新类型, 该组的更新数据列表), ...]，按应用顺序排列
+        """
+        groups: List[Tuple[str, List[dict]]] = []
+        for raw in raw_updates:
+            try:
+                update_data = _loads_payload(raw)
+                config_type = update_data.get('type', 'config_update')
+            except Exception as e:
+                logger.error(f"Failed to parse configuration update: {e}")
+                continue
             
-            # 更新修改的算法
-            for name, change in diff.get('modified_algorithms', {}).items():
-                new_config = change.get('to', {})
-                params = new_config.get('params', {})
-                self.config.online_update_algorithm(name, params)
-                logger.info(f"Updated algorithm: {name}")
+            if config_type not in self._config_type_handlers:
+                logger.error(f"Unknown configuration update type: {config_type}")
+                continue
             
-            # 删除已移除的连接
-            for conn in diff.get('removed_connections', []):
-                from_str = conn.get('from', '')
-                to_str = conn.get('to', '')
-                if from_str and to_str:
-                    self.config.online_remove_connection(from_str=from_str, to_str=to_str)
-                    logger.info(f"Removed connection: {from_str} -> {to_str}")
+            if config_type == 'config_update_diff':
+                if groups and groups[-1][0] == config_type:
+                    groups[-1][1].append(update_data)
+                else:
+                    groups.append((config_type, [update_data]))
+                continue
             
-            # 添加新连接
-            for conn in diff.get('added_connections', []):
-                from_str = conn.get('from', '')
-                to_str = conn.get('to', '')
-                if from_str and to_str:
-                    self.config.online_add_connection(from_str=from_str, to_str=to_str)
-                    logger.info(f"Added connection: {from_str} -> {to_str}")
+            # 全量更新覆盖之前的全部更新
+            if config_type == 'config_update' and any(t == 'config_reset' for t, _ in groups):
+                config_type = 'config_reset'
+            groups = [(config_type, [update_data])]
+        
+        return groups
+    
+    def _apply_config_update_diffs(self, updates: List[dict]):
+        """
+        按顺序应用多条差异化的配置更新
+        
+        各条差异依次应用到plc_configuration后，只保存一次本地配置、更新一次
+        Runner实例和执行顺序：任意一条需要重建实例时重建实例，
+        cycle_time使用最后一条变化的值。
+        
+        Args:
+            updates: 差异更新数据列表，每条包含diff和full_config
+        """
+        rebuild_instances = any(u.get('rebuild_instances', False) for u in updates)
+        new_cycle_time = None
+        for update_data in updates:
+            if update_data.get('cycle_time_changed', False) and update_data.get('cycle_time') is not None:
+                new_cycle_time = update_data['cycle_time']
+        
+        with self._lock:
+            # 1. 依次应用差异到plc_configuration（在线配置API，整批只重建一次组态快照）
+            with self.config.batch_update():
+                for update_data in updates:
+                    self.config.online_apply_diff(update_data.get('diff', {}))
             
             # 2. 保存到本地config.yaml
             self.config.save_to_local(self.local_dir)
@@ -967,14 +1327,15 @@ class Runner:
             
             # 4. 更新执行顺序
             try:
-                self.execution_order = self.config.get_execution_order()
+                self.execution_order = tuple(self.config.get_execution_order())
+                self._rebuild_execution_steps()
                 logger.info(f"Execution order updated: {self.execution_order}")
             except ValueError as e:
                 logger.error(f"Failed to get execution order: {e}")
                 raise
             
             # 5. 更新cycle_time（如果变化）
-            if cycle_time_changed and new_cycle_time is not None:
+            if new_cycle_time is not None:
                 self.clock.cycle_time = new_cycle_time
                 logger.info(f"Cycle time updated to {new_cycle_time}s")
             
@@ -988,6 +1349,11 @@ class Runner:
             config_dict: 新的完整配置字典
         """
         with self._lock:
+            # 0. 与当前配置相同（例如多个监控端重复发布）时，无需重建实例
+            if self.config.matches_dict(config_dict):
+                logger.info("Config update is a no-op, skipping")
+                return
+            
             # 1. 更新Configuration
             success = self.config.update_from_dict(config_dict)
             if not success:
@@ -1002,7 +1368,8 @@ class Runner:
             
             # 4. 重新计算执行顺序
             try:
-                self.execution_order = self.config.get_execution_order()
+                self.execution_order = tuple(self.config.get_execution_order())
+                self._rebuild_execution_steps()
                 logger.info(f"Execution order updated: {self.execution_order}")
             except ValueError as e:
                 logger.error(f"Failed to get execution order: {e}")
@@ -1070,7 +1437,7 @@ class Runner:
         """
         self.clock.start()
         
-        while self._running:
+        while not self._stop_event.is_set():
             try:
                 # 1. 步进模拟时钟（更新模拟时间标签）
                 self.clock.step()
@@ -1079,43 +1446,38 @@ class Runner:
                 self.execute_one_cycle()
                 
                 # 3. 在周期间隙检查并应用配置更新
-                if self._config_update_pending and self._pending_config_update:
-                    try:
-                        logger.info("Applying pending configuration update at cycle gap")
-                        self._apply_pending_config_update()
-                        self._config_update_pending = False
-                        self._pending_config_update = None
-                        logger.info("Configuration update applied successfully")
-                    except Exception as e:
-                        logger.error(f"Failed to apply configuration update: {e}", exc_info=True)
-                        # 清除标志，避免重复尝试
-                        self._config_update_pending = False
-                        self._pending_config_update = None
+                if self._pending_config_updates:
+                    self._apply_pending_config_update()
                 
-                # 4. 等待到下一个周期（控制真实时间）
-                self.clock.sleep_to_next_cycle()
+                # 4. 等待到下一个周期（控制真实时间），stop()时立即结束等待
+                self.clock.sleep_to_next_cycle(self._stop_event)
                 
             except Exception as e:
                 logger.error(f"Error in run loop: {e}", exc_info=True)
                 # 即使出错也要等待，避免CPU占用过高
-                time.sleep(self.clock.cycle_time)
+                self._stop_event.wait(self.clock.cycle_time)
         
         self.clock.stop()
         logger.info("Run loop stopped")
     
     def start(self):
         """启动运行模块"""
-        if self._running:
+        if not self._stop_event.is_set():
             logger.warning("Runner is already running")
             return
         
-        self._running = True
+        self._stop_event.clear()
+        
+        # 启动I/O线程（推送到Redis、存储数据和保存快照），需先于运行循环启动
+        self._io_thread = threading.Thread(target=self._io_loop, daemon=True)
+        self._io_thread.start()
         
         # 启动运行循环线程
         self._thread = threading.Thread(target=self._run_loop, daemon=True)
         self._thread.start()
         
-        # 启动命令订阅线程（监听Redis中的参数写入命令）
+        # 启动命令订阅线程（监听Redis中的参数写入命令），订阅在启动线程前完成
+        self._pubsub = self._subscribe_commands()
         self._command_thread = threading.Thread(target=self._command_subscriber_loop, daemon=True)
         self._command_thread.start()
         
@@ -1123,38 +1485,54 @@ class Runner:
     
     def stop(self):
         """停止运行模块"""
-        if not self._running:
+        if self._stop_event.is_set():
             logger.warning("Runner is not running")
             return
         
-        self._running = False
-        
-        # 保存最后一次快照
-        try:
-            self._save_snapshot()
-            logger.info("Final snapshot saved before stop")
-        except Exception as e:
-            logger.error(f"Failed to save final snapshot: {e}")
+        # 设置停止事件，唤醒等待中的运行循环
+        self._stop_event.set()
         
         # 等待运行循环线程结束
         if self._thread:
             self._thread.join(timeout=5.0)
         
-        # 等待命令订阅线程结束
+        # 取消命令订阅，唤醒阻塞在listen()中的订阅线程，等待其结束
+        if self._pubsub is not None:
+            try:
+                self._pubsub.unsubscribe()
+            except Exception as e:
+                logger.debug(f"Failed to unsubscribe command channels: {e}")
         if self._command_thread:
             self._command_thread.join(timeout=2.0)
         
+        # 通知I/O线程处理完剩余数据、保存完待保存的快照后退出
+        if self._io_thread:
+            try:
+                self._io_queue.put(None, timeout=5.0)
+                self._io_thread.join(timeout=5.0)
+            except queue.Full:
+                logger.warning("I/O thread did not drain its queue in time")
+        
+        # 保存最后一次快照（运行循环已结束，同步写入）
+        try:
+            self._save_snapshot()
+            logger.info("Final snapshot saved before stop")
+        except Exception as e:
+            logger.error(f"Failed to save final snapshot: {e}")
+        
         logger.info("Runner stopped")
     
-    def get_all_params(self) -> Dict[str, Any]:
+    def get_all_params(self) -> Mapping[str, Any]:
         """
         获取所有参数值
         
+        读取最近发布的参数快照（周期结束或写入参数时整体替换，发布后不再修改），
+        不持有运行锁，不复制参数。
+        
         Returns:
-            所有参数值字典
+            所有参数值的只读映射
         """
-        with self._lock:
-            return self.params.copy()
+        return MappingProxyType(self._published_params)
     
     def get_model(self, name: str):
         """
@@ -1182,6 +1560,65 @@ class Runner:
         with self._lock:
             return self.algorithms.get(name)
     
+    def _rebuild_param_setters(self):
+        """
+        重建位号写入表
+        
+        为每个模型参数和算法参数（config、input、output）预先绑定写入方法，
+        set_parameter() 对这些位号只需一次字典查找。写入方式见 _make_param_setter()。
+        """
+        setters = {}
+        for name, model in self.models.items():
+            keys = self._param_keys[name]
+            for param in model.get_params():
+                setters[keys[param]] = (
+                    functools.partial(setattr, model, f'_input_{param.lower()}'), 'model')
+        for name, algorithm in self.algorithms.items():
+            keys = self._param_keys[name]
+            for param in algorithm.get_flat_params():
+                if param not in algorithm.input and param in algorithm.config:
+                    setter = functools.partial(algorithm.config.__setitem__, param)
+                else:
+                    setter = functools.partial(algorithm.input.__setitem__, param)
+                setters[keys[param]] = (setter, 'algorithm')
+        self._param_setters = setters
+    
+    def _make_param_setter(self, param_name: str) -> Optional[Tuple[Callable[[Any], None], str]]:
+        """
+        解析参数名并绑定写入方法（用于位号写入表之外的参数名）
+        
+        - 模型参数：通过 _input_xxx 属性设置（参数名转换为小写并添加 _input_ 前缀）
+        - 算法参数：参数在input中时写入input，只在config中时写入config，
+          都不存在时默认写入input（通常连接关系是输入）
+        
+        Args:
+            param_name: 参数名，格式为 "{instance_name}.{param_name}"
+        
+        Returns:
+            (setter, 实例类型)，参数名格式错误或实例不存在时返回None
+        """
+        if '.' not in param_name:
+            logger.warning(f"Invalid parameter name format: {param_name}")
+            return None
+        
+        instance_name, _, param = param_name.partition('.')
+        
+        # 查找对应的模型或算法实例
+        if instance_name in self.models:
+            return functools.partial(setattr, self.models[instance_name], f'_input_{param.lower()}'), 'model'
+        
+        if instance_name in self.algorithms:
+            algorithm = self.algorithms[instance_name]
+            if param in algorithm.input:
+                return functools.partial(algorithm.input.__setitem__, param), 'algorithm'
+            if param in algorithm.config:
+                return functools.partial(algorithm.config.__setitem__, param), 'algorithm'
+            logger.debug(f"Parameter {param} not found in input/config, setting to input")
+            return functools.partial(algorithm.input.__setitem__, param), 'algorithm'
+        
+        logger.warning(f"Instance {instance_name} not found")
+        return None
+    
     def set_parameter(self, param_name: str, value: Any) -> bool:
         """
         设置参数值（用于位号写入）
@@ -1195,43 +1632,25 @@ class Runner:
         """
         with self._lock:
             try:
-                # 解析参数名
-                if '.' not in param_name:
-                    logger.warning(f"Invalid parameter name format: {param_name}")
-                    return False
+                # 已知位号直接使用预先构建的setter，其他参数名按实例类型解析
+                entry = self._param_setters.get(param_name)
+                if entry is None:
+                    entry = self._make_param_setter(param_name)
+                    if entry is None:
+                        return False
                 
-                instance_name, param = param_name.split('.', 1)
-                
-                # 查找对应的模型或算法实例
-                if instance_name in self.models:
-                    # 模型参数
-                    model = self.models[instance_name]
-                    # 模型参数通过 _input_xxx 属性设置
-                    # 参数名需要转换为小写并添加 _input_ 前缀
-                    attr_name = f'_input_{param.lower()}'
-                    setattr(model, attr_name, value)
-                    logger.info(f"Set model parameter {param_name} = {value}")
-                    
-                elif instance_name in self.algorithms:
-                    # 算法参数
-                    algorithm = self.algorithms[instance_name]
-                    # 根据参数是否存在于input或config字典中自动判断
-                    if param in algorithm.input:
-                        algorithm.input[param] = value
-                    elif param in algorithm.config:
-                        algorithm.config[param] = value
-                    else:
-                        # 如果都不存在，默认设置到input（通常连接关系是输入）
-                        algorithm.input[param] = value
-                        logger.debug(f"Parameter {param} not found in input/config, setting to input")
-                    logger.info(f"Set algorithm parameter {param_name} = {value}")
-                else:
-                    logger.warning(f"Instance {instance_name} not found")
-                    return False
+                setter, kind = entry
+                setter(value)
+                logger.info(f"Set {kind} parameter {param_name} = {value}")
                 
                 # 更新params字典（立即生效，下个周期会使用新值）
                 self.params[param_name] = value
                 
+                # 写时复制：发布包含新值的快照，已发布的快照保持不变
+                published = dict(self._published_params)
+                published[param_name] = value
+                self._published_params = published
+                
                 return True
             except Exception as e:
                 logger.error(f"Failed to set parameter {param_name}: {e}", exc_info=True)
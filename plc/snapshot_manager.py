@@ -3,14 +3,21 @@ PLC运行时快照管理模块
 负责保存和加载运行时数据快照，支持异常恢复
 """
 import os
+import json
 import yaml
 import threading
 from datetime import datetime
 from typing import Dict, Any, Optional
 from utils.logger import get_logger
+from utils.json_codec import orjson
 
 logger = get_logger()
 
+# 快照序列化/反序列化使用libyaml的C实现（可用时），否则回退到纯Python实现
+# 快照只包含基本类型，使用Safe系列即可
+_SnapshotDumper = getattr(yaml, 'CSafeDumper', yaml.SafeDumper)
+_SnapshotLoader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
 
 class SnapshotManager:
     """
@@ -21,17 +28,28 @@ class SnapshotManager:
     """
     
     # 默认快照文件名
-    DEFAULT_SNAPSHOT_FILE = "plc/local/snapshot.yaml"
+    DEFAULT_SNAPSHOT_FILE = "plc/local/snapshot.json"
     
     def __init__(self, snapshot_file: str = DEFAULT_SNAPSHOT_FILE):
         """
         初始化快照管理器
         
+        快照格式由文件扩展名决定：.json 使用JSON（安装了orjson时使用orjson），
+        其他扩展名使用YAML。JSON快照文件不存在时，加载同名的旧版 .yaml 快照。
+        
         Args:
-            snapshot_file: 快照文件路径，默认 "plc/local/snapshot.yaml"
+            snapshot_file: 快照文件路径，默认 "plc/local/snapshot.json"
         """
         self.snapshot_file = snapshot_file
-        self._lock = threading.RLock()
+        self._lock = threading.Lock()  # 各方法互不嵌套调用，无需可重入锁
+        
+        # 快照格式与旧版YAML快照文件（仅JSON格式有）
+        root, ext = os.path.splitext(snapshot_file)
+        self._use_json = ext.lower() == '.json'
+        self._legacy_file: Optional[str] = f"{root}.yaml" if self._use_json else None
+        
+        # 上次写入文件的参数（参数未变化时跳过写入）
+        self._last_saved_params: Optional[Dict[str, Any]] = None
         
         # 确保目录存在
         snapshot_dir = os.path.dirname(self.snapshot_file)
@@ -45,7 +63,9 @@ class SnapshotManager:
         """
         保存运行时快照
         
-        将当前所有实例的参数值保存到快照文件。
+        将当前所有实例的参数值保存到快照文件。参数与上次保存的完全相同时
+        不重复写入文件。先写入临时文件（快照文件名加 .tmp）再替换快照文件，
+        快照文件始终是完整的。
         
         Args:
             params: 参数字典，格式为 {instance_name.param_name: value}
@@ -56,16 +76,29 @@ class SnapshotManager:
         """
         try:
             with self._lock:
+                # 参数未变化，文件内容已是最新
+                if params == self._last_saved_params:
+                    logger.debug("Snapshot unchanged, skip writing")
+                    return True
+                
                 # 组织快照数据结构
                 snapshot = {
                     'timestamp': datetime.now().isoformat(),
                     'params': params.copy()
                 }
                 
-                # 保存到文件
-                with open(self.snapshot_file, 'w', encoding='utf-8') as f:
-                    yaml.dump(snapshot, f, allow_unicode=True, default_flow_style=False)
+                # 先写入临时文件再原子替换，写入中途异常不会破坏已有快照
+                tmp_file = self.snapshot_file + '.tmp'
+                if self._use_json:
+                    with open(tmp_file, 'wb') as f:
+                        f.write(self._dumps_json(snapshot))
+                else:
+                    with open(tmp_file, 'w', encoding='utf-8') as f:
+                        yaml.dump(snapshot, f, Dumper=_SnapshotDumper,
+                                  allow_unicode=True, default_flow_style=False)
+                os.replace(tmp_file, self.snapshot_file)
                 
+                self._last_saved_params = snapshot['params']
                 logger.debug(f"Snapshot saved to {self.snapshot_file}")
                 return True
                 
@@ -85,21 +118,27 @@ class SnapshotManager:
         """
         try:
             with self._lock:
-                if not os.path.exists(self.snapshot_file):
+                snapshot_file = self._existing_snapshot_file()
+                if snapshot_file is None:
                     logger.debug(f"Snapshot file not found: {self.snapshot_file}")
                     return None
                 
-                with open(self.snapshot_file, 'r', encoding='utf-8') as f:
-                    snapshot = yaml.safe_load(f)
+                if snapshot_file == self.snapshot_file and self._use_json:
+                    with open(snapshot_file, 'rb') as f:
+                        data = f.read()
+                    snapshot = orjson.loads(data) if orjson is not None else json.loads(data)
+                else:
+                    with open(snapshot_file, 'r', encoding='utf-8') as f:
+                        snapshot = yaml.load(f, Loader=_SnapshotLoader)
                 
                 if not snapshot or 'params' not in snapshot:
-                    logger.warning(f"Invalid snapshot file format: {self.snapshot_file}")
+                    logger.warning(f"Invalid snapshot file format: {snapshot_file}")
                     return None
                 
                 params = snapshot.get('params', {})
                 timestamp = snapshot.get('timestamp', 'unknown')
                 
-                logger.info(f"Snapshot loaded from {self.snapshot_file} (timestamp: {timestamp})")
+                logger.info(f"Snapshot loaded from {snapshot_file} (timestamp: {timestamp})")
                 logger.debug(f"Loaded {len(params)} parameters from snapshot")
                 
                 return params
@@ -115,6 +154,8 @@ class SnapshotManager:
         将快照中的参数值更新到配置中，用于重启后恢复运行状态。
         快照参数格式：{instance_name.param_name: value}
         
+        模型只更新配置中已有的参数；算法的嵌套参数只接受 config/input/output 分组。
+        
         Args:
             config: Configuration实例
             snapshot: 快照参数字典
@@ -127,38 +168,27 @@ class SnapshotManager:
                 models_config = config.get_models()
                 algorithms_config = config.get_algorithms()
                 
-                # 更新模型参数
-                for model_name in models_config:
-                    model_params = models_config[model_name].get('params', {})
-                    for param_name, value in snapshot.items():
-                        if param_name.startswith(f"{model_name}."):
-                            # 提取参数名（去掉实例名前缀）
-                            param_key = param_name[len(model_name) + 1:]
-                            model_params[param_key] = value
-                            logger.debug(f"Updated {model_name}.{param_key} = {value} from snapshot")
-                
-                # 更新算法参数
-                for algo_name in algorithms_config:
-                    algo_params = algorithms_config[algo_name].get('params', {})
-                    for param_name, value in snapshot.items():
-                        if param_name.startswith(f"{algo_name}."):
-                            # 算法参数可能是 config.input.output 格式
-                            param_key = param_name[len(algo_name) + 1:]
-                            # 检查是否是嵌套参数（如 pid1.config.kp）
-                            if '.' in param_key:
-                                # 嵌套参数，需要特殊处理
-                                parts = param_key.split('.')
-                                if len(parts) == 2:
-                                    # 例如：pid1.config.kp -> config['kp'] = value
-                                    section, key = parts
-                                    if section not in algo_params:
-                                        algo_params[section] = {}
-                                    algo_params[section][key] = value
-                                    logger.debug(f"Updated {algo_name}.{param_key} = {value} from snapshot")
-                            else:
-                                # 简单参数
-                                algo_params[param_key] = value
-                                logger.debug(f"Updated {algo_name}.{param_key} = {value} from snapshot")
+                # 按实例名对快照参数分桶（只遍历一次快照）：{实例名: {参数名: 值}}
+                buckets: Dict[str, Dict[str, Any]] = {}
+                for param_name, value in snapshot.items():
+                    instance_name, _, param_key = param_name.partition('.')
+                    if param_key:
+                        buckets.setdefault(instance_name, {})[param_key] = value
+                
+                # 实例名 -> (类型, 实例配置)，只遍历一次分桶结果
+                targets = {name: ('model', cfg) for name, cfg in models_config.items()}
+                targets.update({name: ('algorithm', cfg) for name, cfg in algorithms_config.items()})
+                
+                # 通过组态的在线更新方法写入（组态的快照参数和版本号随之更新），只重建一次组态快照
+                with config.batch_update():
+                    for instance_name, instance_params in buckets.items():
+                        kind, instance_config = targets.get(instance_name, (None, None))
+                        if kind == 'model':
+                            self._apply_model_updates(config, instance_name,
+                                                      instance_config.get('params', {}), instance_params)
+                        elif kind == 'algorithm':
+                            self._apply_algo_updates(config, instance_name,
+                                                     instance_config.get('params', {}), instance_params)
                 
                 logger.info(f"Applied snapshot to configuration ({len(snapshot)} parameters)")
                 return True
@@ -167,6 +197,60 @@ class SnapshotManager:
             logger.error(f"Failed to apply snapshot to config: {e}", exc_info=True)
             return False
     
+    @staticmethod
+    def _apply_model_updates(config: 'Configuration', model_name: str, model_params: Dict[str, Any],
+                             updates: Dict[str, Any]):
+        """
+        将快照参数更新到模型参数
+        
+        只更新模型配置中已有的参数，快照中多余的参数忽略。
+        
+        Args:
+            config: Configuration实例（通过online_update_model写入）
+            model_name: 模型实例名
+            model_params: 模型配置中当前的params字典（只读，用于过滤参数名）
+            updates: 快照参数 {参数名: 值}
+        """
+        new_params: Dict[str, Any] = {}
+        for param_key, value in updates.items():
+            if param_key in model_params:
+                new_params[param_key] = value
+                logger.debug(f"Updated {model_name}.{param_key} = {value} from snapshot")
+        if new_params:
+            config.online_update_model(model_name, new_params, quiet=True)
+    
+    @staticmethod
+    def _apply_algo_updates(config: 'Configuration', algo_name: str, algo_params: Dict[str, Any],
+                            updates: Dict[str, Any]):
+        """
+        将快照参数更新到算法参数
+        
+        算法参数可能是 section.key 格式（如 pid1.config.kp），合并到对应分组的副本中后整体更新；
+        只接受 config/input/output 分组，其他嵌套参数忽略。
+        
+        Args:
+            config: Configuration实例（通过online_update_algorithm写入）
+            algo_name: 算法实例名
+            algo_params: 算法配置中当前的params字典（只读，用于合并嵌套分组）
+            updates: 快照参数 {参数名: 值}
+        """
+        new_params: Dict[str, Any] = {}
+        for param_key, value in updates.items():
+            if '.' in param_key:
+                # 嵌套参数，例如：pid1.config.kp -> config['kp'] = value
+                section, key = param_key.split('.', 1)
+                if section in ('config', 'input', 'output'):
+                    if section not in new_params:
+                        new_params[section] = dict(algo_params.get(section) or {})
+                    new_params[section][key] = value
+                    logger.debug(f"Updated {algo_name}.{param_key} = {value} from snapshot")
+            else:
+                # 简单参数
+                new_params[param_key] = value
+                logger.debug(f"Updated {algo_name}.{param_key} = {value} from snapshot")
+        if new_params:
+            config.online_update_algorithm(algo_name, new_params, quiet=True)
+    
     def clear_snapshot(self) -> bool:
         """
         清除快照文件
@@ -178,9 +262,12 @@ class SnapshotManager:
         """
         try:
             with self._lock:
-                if os.path.exists(self.snapshot_file):
-                    os.remove(self.snapshot_file)
-                    logger.info(f"Snapshot file cleared: {self.snapshot_file}")
+                self._last_saved_params = None
+                # 旧版YAML快照一并清除，避免下次启动时被加载
+                for snapshot_file in (self.snapshot_file, self._legacy_file):
+                    if snapshot_file and os.path.exists(snapshot_file):
+                        os.remove(snapshot_file)
+                        logger.info(f"Snapshot file cleared: {snapshot_file}")
                 return True
                 
         except Exception as e:
@@ -192,7 +279,42 @@ class SnapshotManager:
         检查快照文件是否存在
         
         Returns:
-            bool: 快照文件是否存在
+            bool: 快照文件（或旧版YAML快照文件）是否存在
+        """
+        return self._existing_snapshot_file() is not None
+    
+    def _existing_snapshot_file(self) -> Optional[str]:
+        """
+        获取实际存在的快照文件路径
+        
+        Returns:
+            Optional[str]: 快照文件存在时返回其路径，否则返回存在的旧版YAML快照
+                           文件路径，都不存在时返回None
+        """
+        if os.path.exists(self.snapshot_file):
+            return self.snapshot_file
+        if self._legacy_file and os.path.exists(self._legacy_file):
+            return self._legacy_file
+        return None
+    
+    @staticmethod
+    def _dumps_json(snapshot: Dict[str, Any]) -> bytes:
+        """
+        将快照序列化为JSON字节串
+        
+        优先使用orjson，未安装或遇到orjson不支持的值时回退到标准库json。
+        
+        Args:
+            snapshot: 快照数据
+        
+        Returns:
+            UTF-8编码的JSON字节串
         """
-        return os.path.exists(self.snapshot_file)
+        if orjson is not None:
+            try:
+                return orjson.dumps(snapshot, option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY
+                                    | orjson.OPT_NON_STR_KEYS)
+            except TypeError:
+                pass
+        return json.dumps(snapshot, ensure_ascii=False, indent=2).encode('utf-8')
 
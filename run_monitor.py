@@ -12,6 +12,9 @@ from utils.logger import get_logger
 
 logger = get_logger()
 
+# 优先使用libyaml的C实现加载配置文件，未编译libyaml时回退到纯Python实现
+_YamlLoader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
 
 class MonitorRunner:
     """
@@ -31,7 +34,7 @@ class MonitorRunner:
         """
         # 加载系统配置
         with open(config_file, 'r', encoding='utf-8') as f:
-            self.config = yaml.safe_load(f)
+            self.config = yaml.load(f, Loader=_YamlLoader)
         
         # 加载组态配置
         self.group_config = Configuration(config_file=group_config_file)
@@ -128,7 +131,8 @@ def main(config_file: str = "config/config.yaml",
     try:
         monitor.start()
     except Exception as e:
-        logger.error(f"Monitor error: {e}", exc_info=True)
+        # start()中已记录完整堆栈，这里不再重复格式化
+        logger.error(f"Monitor error: {e}")
         monitor.stop()
         sys.exit(1)
 
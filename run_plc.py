@@ -5,15 +5,16 @@ PLC Mock Server - PLC运行模块独立启动脚本
 PLC模块从本地目录（plc/local/）加载组态配置和运行时快照，完全独立于组态模块。
 支持通过Redis接收配置更新，支持异常恢复。
 """
-import yaml
 import signal
 import sys
 import os
-from plc.runner import Runner
-from plc.communication import Communication
-from plc.data_storage import DataStorage
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from utils.logger import get_logger
 
+# 注意：yaml及各PLC模块（redis、opcua等依赖）在PLCRunner.__init__中延迟导入，
+# --status 查询状态时不需要加载这些模块
+
 logger = get_logger()
 
 
@@ -44,21 +45,33 @@ class PLCRunner:
             local_dir: 本地配置目录路径，默认"plc/local"
                       PLC模块从该目录加载组态配置和快照
         """
+        from plc.runner import Runner
+        from plc.communication import Communication
+        from plc.data_storage import DataStorage
+        from utils.yaml_cache import load_yaml, stat_or_none, LIBYAML_AVAILABLE
+        
+        # 停止事件：信号处理函数设置，start()中的主线程等待该事件后执行stop()
+        self._stop_event = threading.Event()
+        
         # 加载系统配置
+        # 存在性检查和YAML缓存校验共用同一次stat结果
         self.config_file = config_file or self.DEFAULT_CONFIG_FILE
-        if not os.path.exists(self.config_file):
+        config_stat = stat_or_none(self.config_file)
+        if config_stat is None:
             logger.error(f"System config file not found: {self.config_file}")
             raise FileNotFoundError(f"System config file not found: {self.config_file}")
         
-        with open(self.config_file, 'r', encoding='utf-8') as f:
-            self.config = yaml.safe_load(f)
+        self.config = load_yaml(self.config_file, json_shadow=True, st=config_stat)
+        
+        # Runner启动后是否并行启动/停止其余模块（各模块的启动/停止互不依赖）
+        self.startup_parallel = bool(self.config.get('startup_parallel', False))
         
         # 本地配置目录
         self.local_dir = local_dir or self.DEFAULT_LOCAL_DIR
         
         # 检查本地配置目录是否存在
         local_config_file = os.path.join(self.local_dir, "config.yaml")
-        if not os.path.exists(local_config_file):
+        if stat_or_none(local_config_file) is None:
             logger.warning(f"Local config file not found: {local_config_file}")
             logger.warning("PLC module will use default empty configuration")
             logger.info("You can copy a config file to plc/local/config.yaml")
@@ -102,6 +115,9 @@ class PLCRunner:
         logger.info(f"  - Redis: {redis_config.get('host', 'localhost')}:{redis_config.get('port', 6379)}")
         logger.info(f"  - OPCUA Server: {server_url}")
         logger.info(f"  - Database: {db_path}")
+        logger.info(f"  - YAML loader: {'libyaml (CSafeLoader)' if LIBYAML_AVAILABLE else 'pure Python (SafeLoader)'}")
+        if not LIBYAML_AVAILABLE:
+            logger.warning("PyYAML is built without libyaml, config files are parsed by the slower pure Python loader")
     
     def start(self):
         """
@@ -111,6 +127,8 @@ class PLCRunner:
         1. Runner模块（运行循环和配置更新订阅）
         2. DataStorage模块（历史数据存储）
         3. Communication模块（OPCUA Server）
+        
+        startup_parallel为True时，Runner启动后并行启动DataStorage和Communication。
         """
         try:
             # 启动运行模块
@@ -120,19 +138,32 @@ class PLCRunner:
             self.runner.start()
             logger.info("✓ Runner module started")
             
-            # 启动数据存储模块
-            logger.info("=" * 60)
-            logger.info("Starting DataStorage module...")
-            logger.info("=" * 60)
-            self.data_storage.start()
-            logger.info("✓ DataStorage module started")
-            
-            # 启动通信模块
-            logger.info("=" * 60)
-            logger.info("Starting Communication module (OPCUA Server)...")
-            logger.info("=" * 60)
-            self.communication.start()
-            logger.info("✓ Communication module started")
+            if self.startup_parallel:
+                # 并行启动数据存储模块和通信模块
+                logger.info("=" * 60)
+                logger.info("Starting DataStorage and Communication modules in parallel...")
+                logger.info("=" * 60)
+                with ThreadPoolExecutor(max_workers=2) as executor:
+                    futures = [executor.submit(self.data_storage.start),
+                               executor.submit(self.communication.start)]
+                for future in futures:
+                    future.result()  # 任一模块启动失败时抛出其异常
+                logger.info("✓ DataStorage module started")
+                logger.info("✓ Communication module started")
+            else:
+                # 启动数据存储模块
+                logger.info("=" * 60)
+                logger.info("Starting DataStorage module...")
+                logger.info("=" * 60)
+                self.data_storage.start()
+                logger.info("✓ DataStorage module started")
+                
+                # 启动通信模块
+                logger.info("=" * 60)
+                logger.info("Starting Communication module (OPCUA Server)...")
+                logger.info("=" * 60)
+                self.communication.start()
+                logger.info("✓ Communication module started")
             
             # 显示运行状态
             logger.info("=" * 60)
@@ -141,17 +172,15 @@ class PLCRunner:
             logger.info("PLC Mock Server is running...")
             logger.info("  - Press Ctrl+C to stop")
             logger.info("  - Configuration updates: Subscribe to Redis channel 'plc:config:update'")
-            logger.info("  - Runtime snapshot: Saved to plc/local/snapshot.yaml (every 10 cycles)")
+            logger.info("  - Runtime snapshot: Saved to plc/local/snapshot.json (every 10 cycles)")
             logger.info("=" * 60)
             
-            # 保持运行（等待信号）
+            # 保持运行（等待停止请求）
             try:
-                import time
-                while True:
-                    time.sleep(1)  # 等待信号（Windows兼容）
+                self._wait_for_stop()
             except KeyboardInterrupt:
                 logger.info("Received interrupt signal (Ctrl+C)")
-                self.stop()
+            self.stop()
             
         except KeyboardInterrupt:
             logger.info("Received interrupt signal (Ctrl+C)")
@@ -161,6 +190,27 @@ class PLCRunner:
             self.stop()
             raise
     
+    def request_stop(self):
+        """
+        请求停止（可在信号处理函数中调用）
+        
+        只设置停止事件，由start()中等待的主线程执行stop()。
+        """
+        self._stop_event.set()
+    
+    def _wait_for_stop(self):
+        """
+        阻塞等待停止请求
+        
+        POSIX下直接阻塞等待停止事件，收到信号前不再唤醒；Windows下无超时的等待
+        不能被Ctrl+C中断，按1秒超时分段等待。
+        """
+        if os.name == 'nt':
+            while not self._stop_event.wait(1.0):
+                pass
+        else:
+            self._stop_event.wait()
+    
     def stop(self):
         """
         停止所有PLC运行模块
@@ -169,20 +219,48 @@ class PLCRunner:
         1. Communication模块
         2. DataStorage模块
         3. Runner模块（会保存最后一次快照）
+        
+        startup_parallel为True时，先并行停止Communication和Runner，再停止DataStorage
+        （Runner的I/O线程在停止完成前仍会写入DataStorage）。
         """
         logger.info("=" * 60)
         logger.info("Stopping all PLC modules...")
         logger.info("=" * 60)
         
-        # 停止通信模块
+        if self.startup_parallel:
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                executor.submit(self._stop_communication)
+                executor.submit(self._stop_runner)
+            self._stop_data_storage()
+        else:
+            self._stop_communication()
+            self._stop_data_storage()
+            self._stop_runner()
+        
+        # 关闭日志处理器（关闭时会先刷新），确保日志文件被正确关闭（避免Windows上的文件占用问题）
+        # 注意：关闭日志处理器后，不能再使用logger记录日志
+        try:
+            from utils.logger import close_logger
+            close_logger()
+        except Exception:
+            pass  # 忽略关闭日志时的错误
+        
+        # 使用print输出最后的状态信息（因为日志处理器已关闭）
+        print("=" * 60)
+        print("All PLC modules stopped")
+        print("=" * 60)
+    
+    def _stop_communication(self):
+        """停止通信模块（异常只记录日志）"""
         try:
             logger.info("Stopping Communication module...")
             self.communication.stop()
             logger.info("✓ Communication module stopped")
         except Exception as e:
             logger.error(f"Error stopping Communication: {e}")
-        
-        # 停止数据存储模块
+    
+    def _stop_data_storage(self):
+        """停止数据存储模块并关闭数据库（异常只记录日志）"""
         try:
             logger.info("Stopping DataStorage module...")
             self.data_storage.stop()
@@ -190,34 +268,35 @@ class PLCRunner:
             logger.info("✓ DataStorage module stopped")
         except Exception as e:
             logger.error(f"Error stopping DataStorage: {e}")
-        
-        # 停止运行模块（会保存最后一次快照）
+    
+    def _stop_runner(self):
+        """停止运行模块，会保存最后一次快照（异常只记录日志）"""
         try:
             logger.info("Stopping Runner module (saving final snapshot)...")
             self.runner.stop()
             logger.info("✓ Runner module stopped")
         except Exception as e:
             logger.error(f"Error stopping Runner: {e}")
+    
+    @classmethod
+    def for_status(cls, config_file: str = None, local_dir: str = None) -> 'PLCRunner':
+        """
+        创建只用于查询状态的实例（不执行__init__，不加载配置和各PLC模块）
         
-        # 先刷新所有日志，确保所有日志都被写入
-        try:
-            for handler in logger.handlers[:]:
-                handler.flush()
-        except Exception:
-            pass
-        
-        # 关闭日志处理器，确保日志文件被正确关闭（避免Windows上的文件占用问题）
-        # 注意：关闭日志处理器后，不能再使用logger记录日志
-        try:
-            from utils.logger import close_logger
-            close_logger()
-        except Exception:
-            pass  # 忽略关闭日志时的错误
+        Args:
+            config_file: 系统配置文件路径，默认"config/config.yaml"
+            local_dir: 本地配置目录路径，默认"plc/local"
         
-        # 使用print输出最后的状态信息（因为日志处理器已关闭）
-        print("=" * 60)
-        print("All PLC modules stopped")
-        print("=" * 60)
+        Returns:
+            PLCRunner: 各模块均为None的实例，get_status()中模块运行状态均为False
+        """
+        instance = cls.__new__(cls)
+        instance.config_file = config_file or cls.DEFAULT_CONFIG_FILE
+        instance.local_dir = local_dir or cls.DEFAULT_LOCAL_DIR
+        instance.runner = None
+        instance.data_storage = None
+        instance.communication = None
+        return instance
     
     def get_status(self) -> dict:
         """
@@ -226,13 +305,22 @@ class PLCRunner:
         Returns:
             dict: 状态信息字典
         """
+        if hasattr(self.runner, 'snapshot_manager'):
+            snapshot_exists = self.runner.snapshot_manager.snapshot_exists()
+        else:
+            # 未初始化Runner（如 --status 查询）时直接检查本地目录下的快照文件（含旧版YAML快照）
+            snapshot_exists = any(
+                os.path.exists(os.path.join(self.local_dir, name))
+                for name in ("snapshot.json", "snapshot.yaml")
+            )
+        
         return {
             'runner_running': self.runner._running if hasattr(self.runner, '_running') else False,
             'data_storage_running': self.data_storage._running if hasattr(self.data_storage, '_running') else False,
             'communication_running': self.communication._running if hasattr(self.communication, '_running') else False,
             'local_dir': self.local_dir,
             'config_file': self.config_file,
-            'snapshot_exists': self.runner.snapshot_manager.snapshot_exists() if hasattr(self.runner, 'snapshot_manager') else False
+            'snapshot_exists': snapshot_exists
         }
 
 
@@ -251,29 +339,13 @@ def main(config_file: str = None, local_dir: str = None):
         logger.error(f"Failed to initialize PLC Runner: {e}", exc_info=True)
         sys.exit(1)
     
-    # 注册信号处理
+    # 注册信号处理（只请求停止，由主线程在start()中执行stop()）
     def signal_handler(sig, frame):
         try:
             logger.info("Received signal, shutting down...")
-            # 刷新所有日志，确保日志被写入
-            try:
-                for handler in logger.handlers[:]:
-                    handler.flush()
-            except Exception:
-                pass
         except Exception:
             pass
-        
-        try:
-            server.stop()
-        finally:
-            # 确保日志被关闭（stop()中已经关闭，这里再次确保）
-            try:
-                from utils.logger import close_logger
-                close_logger()
-            except Exception:
-                pass
-            sys.exit(0)
+        server.request_stop()
     
     # Windows下SIGTERM可能不可用，只注册SIGINT
     signal.signal(signal.SIGINT, signal_handler)
@@ -287,7 +359,8 @@ def main(config_file: str = None, local_dir: str = None):
     try:
         server.start()
     except Exception as e:
-        logger.error(f"PLC Server error: {e}", exc_info=True)
+        # start()中已记录完整堆栈，这里不再重复格式化
+        logger.error(f"PLC Server error: {e}")
         server.stop()
         sys.exit(1)
 
@@ -311,11 +384,14 @@ if __name__ == '__main__':
   
   # 同时指定系统配置和本地目录
   python run_plc.py --config config/my_config.yaml --local-dir plc/custom_local
+  
+  # 只查询状态（不启动模块）
+  python run_plc.py --status
 
 说明:
   - PLC模块从本地目录（plc/local/）加载组态配置和运行时快照
   - 组态配置：plc/local/config.yaml
-  - 运行时快照：plc/local/snapshot.yaml（自动生成）
+  - 运行时快照：plc/local/snapshot.json（自动生成）
   - 支持通过Redis接收配置更新（频道：plc:config:update）
   - 支持异常恢复（重启后自动加载快照）
         """
@@ -332,6 +408,16 @@ if __name__ == '__main__':
         default=None,
         help='本地配置目录路径（默认：plc/local）'
     )
+    parser.add_argument(
+        '--status',
+        action='store_true',
+        help='只输出状态信息（JSON）后退出，不加载配置和PLC模块'
+    )
     
     args = parser.parse_args()
-    main(config_file=args.config, local_dir=args.local_dir)
+    if args.status:
+        import json
+        status = PLCRunner.for_status(config_file=args.config, local_dir=args.local_dir).get_status()
+        print(json.dumps(status, ensure_ascii=False, indent=2))
+    else:
+        main(config_file=args.config, local_dir=args.local_dir)
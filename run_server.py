@@ -2,14 +2,17 @@
 PLC Mock Server - 运行模块独立启动脚本
 启动运行模块（Runner、DataStorage、Communication），不启动监控Web服务器
 """
-import yaml
+import os
 import signal
 import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from plc.plc_configuration import Configuration
 from plc.runner import Runner
 from plc.communication import Communication
 from plc.data_storage import DataStorage
 from utils.logger import get_logger
+from utils.yaml_cache import load_yaml, LIBYAML_AVAILABLE
 
 logger = get_logger()
 
@@ -31,9 +34,14 @@ class ServerRunner:
             config_file: 系统配置文件路径
             group_config_file: 组态配置文件路径
         """
+        # 停止事件：信号处理函数设置，start()中的主线程等待该事件后执行stop()
+        self._stop_event = threading.Event()
+        
         # 加载系统配置
-        with open(config_file, 'r', encoding='utf-8') as f:
-            self.config = yaml.safe_load(f)
+        self.config = load_yaml(config_file, json_shadow=True)
+        
+        # Runner启动后是否并行启动/停止其余模块（各模块的启动/停止互不依赖）
+        self.startup_parallel = bool(self.config.get('startup_parallel', False))
         
         # 初始化各个模块
         redis_config = self.config.get('redis', {})
@@ -64,6 +72,9 @@ class ServerRunner:
         self.communication = Communication(self.group_config, redis_config, server_url, opcua_config)
         
         logger.info("ServerRunner initialized")
+        logger.info(f"YAML loader: {'libyaml (CSafeLoader)' if LIBYAML_AVAILABLE else 'pure Python (SafeLoader)'}")
+        if not LIBYAML_AVAILABLE:
+            logger.warning("PyYAML is built without libyaml, config files are parsed by the slower pure Python loader")
     
     def start(self):
         """启动所有运行模块"""
@@ -72,23 +83,30 @@ class ServerRunner:
             logger.info("Starting Runner module...")
             self.runner.start()
             
-            # 启动数据存储模块
-            logger.info("Starting DataStorage module...")
-            self.data_storage.start()
+            if self.startup_parallel:
+                # 并行启动数据存储模块和通信模块
+                logger.info("Starting DataStorage and Communication modules in parallel...")
+                with ThreadPoolExecutor(max_workers=2) as executor:
+                    futures = [executor.submit(self.data_storage.start),
+                               executor.submit(self.communication.start)]
+                for future in futures:
+                    future.result()  # 任一模块启动失败时抛出其异常
+            else:
+                # 启动数据存储模块
+                logger.info("Starting DataStorage module...")
+                self.data_storage.start()
+                
+                # 启动通信模块
+                logger.info("Starting Communication module...")
+                self.communication.start()
             
-            # 启动通信模块
-            logger.info("Starting Communication module...")
-            self.communication.start()
-            
-            # 保持运行（等待信号）
+            # 保持运行（等待停止请求）
             logger.info("All running modules started. Press Ctrl+C to stop.")
             try:
-                import time
-                while True:
-                    time.sleep(1)  # 等待信号（Windows兼容）
+                self._wait_for_stop()
             except KeyboardInterrupt:
                 logger.info("Received interrupt signal")
-                self.stop()
+            self.stop()
             
         except KeyboardInterrupt:
             logger.info("Received interrupt signal")
@@ -98,27 +116,69 @@ class ServerRunner:
             self.stop()
             raise
     
+    def request_stop(self):
+        """
+        请求停止（可在信号处理函数中调用）
+        
+        只设置停止事件，由start()中等待的主线程执行stop()。
+        """
+        self._stop_event.set()
+    
+    def _wait_for_stop(self):
+        """
+        阻塞等待停止请求
+        
+        POSIX下直接阻塞等待停止事件，收到信号前不再唤醒；Windows下无超时的等待
+        不能被Ctrl+C中断，按1秒超时分段等待。
+        """
+        if os.name == 'nt':
+            while not self._stop_event.wait(1.0):
+                pass
+        else:
+            self._stop_event.wait()
+    
     def stop(self):
-        """停止所有运行模块"""
+        """
+        停止所有运行模块
+        
+        startup_parallel为True时，Runner和Communication并行停止，
+        DataStorage在Runner停止后停止（Runner的I/O线程在停止完成前仍会写入DataStorage）。
+        """
         logger.info("Stopping all running modules...")
         
+        if self.startup_parallel:
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                executor.submit(self._stop_runner)
+                executor.submit(self._stop_communication)
+            self._stop_data_storage()
+        else:
+            self._stop_runner()
+            self._stop_data_storage()
+            self._stop_communication()
+        
+        logger.info("All running modules stopped")
+    
+    def _stop_runner(self):
+        """停止运行模块（异常只记录日志）"""
         try:
             self.runner.stop()
         except Exception as e:
             logger.error(f"Error stopping Runner: {e}")
-        
+    
+    def _stop_data_storage(self):
+        """停止数据存储模块并关闭数据库（异常只记录日志）"""
         try:
             self.data_storage.stop()
             self.data_storage.close()
         except Exception as e:
             logger.error(f"Error stopping DataStorage: {e}")
-        
+    
+    def _stop_communication(self):
+        """停止通信模块（异常只记录日志）"""
         try:
             self.communication.stop()
         except Exception as e:
             logger.error(f"Error stopping Communication: {e}")
-        
-        logger.info("All running modules stopped")
     
     def update_configuration(self, new_group_config: Configuration):
         """
@@ -129,15 +189,10 @@ class ServerRunner:
         """
         self.group_config = new_group_config
         
-        # 更新各个模块的配置
-        self.runner.config = new_group_config
-        self.runner.update_configuration()
-        
-        self.communication.config = new_group_config
-        self.communication.update_configuration()
-        
-        self.data_storage.config = new_group_config
-        self.data_storage.update_configuration()
+        # 各个模块共享同一个组态实例（按引用持有，不复制），替换后通知各模块刷新
+        for module in (self.runner, self.communication, self.data_storage):
+            module.config = new_group_config
+            module.update_configuration()
         
         logger.info("Configuration updated")
 
@@ -154,11 +209,10 @@ def main(config_file: str = "config/config.yaml",
     # 创建服务器实例
     server = ServerRunner(config_file, group_config_file)
     
-    # 注册信号处理
+    # 注册信号处理（只请求停止，由主线程在start()中执行stop()）
     def signal_handler(sig, frame):
         logger.info("Received signal, shutting down...")
-        server.stop()
-        sys.exit(0)
+        server.request_stop()
     
     signal.signal(signal.SIGINT, signal_handler)
     signal.signal(signal.SIGTERM, signal_handler)
@@ -167,7 +221,8 @@ def main(config_file: str = "config/config.yaml",
     try:
         server.start()
     except Exception as e:
-        logger.error(f"Server error: {e}", exc_info=True)
+        # start()中已记录完整堆栈，这里不再重复格式化
+        logger.error(f"Server error: {e}")
         server.stop()
         sys.exit(1)
 
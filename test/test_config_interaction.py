@@ -4,6 +4,7 @@
 测试config/configuration与plc/plc_configuration的交互
 """
 import sys
+from itertools import islice
 from pathlib import Path
 
 # 添加项目根目录到Python路径
@@ -13,6 +14,18 @@ sys.path.insert(0, str(PROJECT_ROOT))
 from config.configuration import ConfigurationManager
 from plc.plc_configuration import Configuration
 
+# 差异详情的输出顺序：(差异键, 标签, 是否为以实例名为键的字典)，连接差异为列表
+DIFF_SECTIONS = (
+    ('added_models', '✓ 新增模型', True),
+    ('removed_models', '✗ 删除模型', True),
+    ('modified_models', '~ 修改模型', True),
+    ('added_algorithms', '✓ 新增算法', True),
+    ('removed_algorithms', '✗ 删除算法', True),
+    ('modified_algorithms', '~ 修改算法', True),
+    ('added_connections', '✓ 新增连接', False),
+    ('removed_connections', '✗ 删除连接', False),
+)
+
 def main():
     print("=" * 60)
     print("config/configuration 与 PLC组态交互测试")
@@ -74,37 +87,19 @@ def main():
     
     print("\n差异详情:")
     has_diff = False
-    if diff['added_models']:
-        print(f"  ✓ 新增模型: {list(diff['added_models'].keys())}")
-        has_diff = True
-    if diff['removed_models']:
-        print(f"  ✗ 删除模型: {list(diff['removed_models'].keys())}")
-        has_diff = True
-    if diff['modified_models']:
-        print(f"  ~ 修改模型: {list(diff['modified_models'].keys())}")
-        has_diff = True
-    if diff['added_algorithms']:
-        print(f"  ✓ 新增算法: {list(diff['added_algorithms'].keys())}")
-        has_diff = True
-    if diff['removed_algorithms']:
-        print(f"  ✗ 删除算法: {list(diff['removed_algorithms'].keys())}")
-        has_diff = True
-    if diff['modified_algorithms']:
-        print(f"  ~ 修改算法: {list(diff['modified_algorithms'].keys())}")
-        has_diff = True
-    if diff['added_connections']:
-        print(f"  ✓ 新增连接: {len(diff['added_connections'])}个")
-        for conn in diff['added_connections'][:5]:  # 只显示前5个
-            print(f"    - {conn.get('from')} -> {conn.get('to')}")
-        if len(diff['added_connections']) > 5:
-            print(f"    ... 还有 {len(diff['added_connections']) - 5} 个")
-        has_diff = True
-    if diff['removed_connections']:
-        print(f"  ✗ 删除连接: {len(diff['removed_connections'])}个")
-        for conn in diff['removed_connections'][:5]:  # 只显示前5个
-            print(f"    - {conn.get('from')} -> {conn.get('to')}")
-        if len(diff['removed_connections']) > 5:
-            print(f"    ... 还有 {len(diff['removed_connections']) - 5} 个")
+    for key, label, is_dict in DIFF_SECTIONS:
+        items = diff[key]
+        if not items:
+            continue
+        if is_dict:
+            print(f"  {label}: {list(items)}")
+        else:
+            count = len(items)
+            print(f"  {label}: {count}个")
+            for conn in islice(items, 5):  # 只显示前5个
+                print(f"    - {conn.get('from')} -> {conn.get('to')}")
+            if count > 5:
+                print(f"    ... 还有 {count - 5} 个")
         has_diff = True
     if diff['cycle_time_changed']:
         print(f"  ~ cycle_time变更: {diff['cycle_time']['from']} -> {diff['cycle_time']['to']}")
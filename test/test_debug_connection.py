@@ -2,14 +2,35 @@
 调试脚本：检查连接关系是否正确应用
 """
 import redis
-import json
-import time
 import sys
 from pathlib import Path
 
 sys.path.insert(0, str(Path(__file__).parent))
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from utils.redis_pool import get_pool
+from utils.json_codec import loads as _loads
+from utils.current_data import fetch_current, wait_for_update, CURRENT_UPDATED_CHANNEL, UPDATE_TIMEOUT
+
+# 不解码响应，JSON直接从bytes解析
+redis_client = redis.Redis(connection_pool=get_pool({'host': 'localhost', 'port': 6379}, decode_responses=False))
+
+# 监控的关键参数（固定顺序，每个周期一次取出）
+KEYS = ('tank1.level', 'pid1.pv', 'pid1.sv', 'pid1.mv',
+        'valve1.target_opening', 'valve1.current_opening', 'tank1.valve_opening')
+
+# 每个周期的输出模板（整体格式化后一次写入）
+TEMPLATE = (
+    "\n周期 #%d（数据延迟 %.3fs）\n"
+    "  tank1.level: %s\n"
+    "  pid1.pv: %s %s\n"
+    "  pid1.sv: %s\n"
+    "  pid1.mv: %s\n"
+    "  valve1.target_opening: %s\n"
+    "  valve1.current_opening: %s\n"
+    "  tank1.valve_opening: %s\n"
+)
 
-redis_client = redis.Redis(host='localhost', port=6379, decode_responses=True)
 
 print("="*60)
 print("连接关系检查")
@@ -19,42 +40,44 @@ print("连接关系：tank1.level -> pid1.pv")
 print("按Ctrl+C停止\n")
 
 try:
+    # 订阅最新数据更新通知，每收到一次通知读取一次最新数据（不再按固定间隔轮询）
+    pubsub = redis_client.pubsub(ignore_subscribe_messages=True)
+    pubsub.subscribe(CURRENT_UPDATED_CHANNEL)
+    
     for i in range(20):
-        current_data = redis_client.get("plc:data:current")
+        if not wait_for_update(pubsub):
+            print(f"\n{UPDATE_TIMEOUT:.0f}秒内未收到数据更新通知，运行模块是否已启动？")
+            continue
+        
+        current_data, server_time = fetch_current(redis_client)
         if current_data:
-            data = json.loads(current_data)
+            data = _loads(current_data)
             params = data.get('params', {})
+            data_age = server_time - data.get('timestamp', server_time)
             
-            # 获取关键参数
-            tank1_level = params.get('tank1.level', None)
-            pid1_pv = params.get('pid1.pv', None)
-            pid1_sv = params.get('pid1.sv', None)
-            pid1_mv = params.get('pid1.mv', None)
-            valve1_target = params.get('valve1.target_opening', None)
-            valve1_current = params.get('valve1.current_opening', None)
-            tank1_valve_opening = params.get('tank1.valve_opening', None)
+            # 获取关键参数（缺失的参数为None）
+            (tank1_level, pid1_pv, pid1_sv, pid1_mv,
+             valve1_target, valve1_current, tank1_valve_opening) = map(params.get, KEYS)
             
-            print(f"\n周期 #{i+1}")
-            print(f"  tank1.level: {tank1_level}")
-            print(f"  pid1.pv: {pid1_pv} {'⚠ 应该等于 tank1.level' if pid1_pv != tank1_level else '✓'}")
-            print(f"  pid1.sv: {pid1_sv}")
-            print(f"  pid1.mv: {pid1_mv}")
-            print(f"  valve1.target_opening: {valve1_target}")
-            print(f"  valve1.current_opening: {valve1_current}")
-            print(f"  tank1.valve_opening: {tank1_valve_opening}")
+            out = [TEMPLATE % (
+                i + 1, data_age,
+                tank1_level,
+                pid1_pv, '⚠ 应该等于 tank1.level' if pid1_pv != tank1_level else '✓',
+                pid1_sv, pid1_mv, valve1_target, valve1_current, tank1_valve_opening
+            )]
             
             # 检查连接关系
             if pid1_pv is not None and tank1_level is not None:
                 if abs(pid1_pv - tank1_level) > 0.0001:
-                    print(f"  ⚠ 警告：pid1.pv ({pid1_pv}) != tank1.level ({tank1_level})")
-                    print(f"     连接关系可能未正确应用！")
+                    out.append(f"  ⚠ 警告：pid1.pv ({pid1_pv}) != tank1.level ({tank1_level})\n"
+                               f"     连接关系可能未正确应用！\n")
             
             if valve1_target is not None and pid1_mv is not None:
                 if abs(valve1_target - pid1_mv) > 0.0001:
-                    print(f"  ⚠ 警告：valve1.target_opening ({valve1_target}) != pid1.mv ({pid1_mv})")
-                    print(f"     连接关系可能未正确应用！")
-        
-        time.sleep(0.6)  # 等待一个周期多一点
+                    out.append(f"  ⚠ 警告：valve1.target_opening ({valve1_target}) != pid1.mv ({pid1_mv})\n"
+                               f"     连接关系可能未正确应用！\n")
+            
+            sys.stdout.write(''.join(out))
         
 except KeyboardInterrupt:
     print("\n\n监控已停止")
@@ -2,14 +2,31 @@
 调试脚本：检查PID算法执行情况
 """
 import redis
-import json
-import time
 import sys
 from pathlib import Path
 
 sys.path.insert(0, str(Path(__file__).parent))
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from utils.redis_pool import get_pool
+from utils.json_codec import loads as _loads
+from utils.current_data import fetch_current, wait_for_update, CURRENT_UPDATED_CHANNEL, UPDATE_TIMEOUT
+
+# 不解码响应，JSON直接从bytes解析
+redis_client = redis.Redis(connection_pool=get_pool({'host': 'localhost', 'port': 6379}, decode_responses=False))
+
+# 监控的PID1关键参数（固定顺序，每个周期一次取出）
+KEYS = ('pid1.pv', 'pid1.sv', 'pid1.mv', 'tank1.LEVEL')
+
+# 每个周期的输出模板（整体格式化后一次写入）
+TEMPLATE = (
+    "\n周期 #%d（数据延迟 %.3fs）\n"
+    "  pid1.pv: %s %s\n"
+    "  pid1.sv: %s %s\n"
+    "  pid1.mv: %s %s\n"
+    "  tank1.LEVEL: %s %s\n"
+)
 
-redis_client = redis.Redis(host='localhost', port=6379, decode_responses=True)
 
 print("="*60)
 print("PID算法执行情况检查")
@@ -18,48 +35,45 @@ print("监控PID1的关键参数变化...")
 print("按Ctrl+C停止\n")
 
 try:
-    last_pv = None
-    last_sv = None
-    last_mv = None
-    last_level = None
+    # 上一周期的关键参数（与KEYS顺序一致，None表示尚无记录，不标记变化）
+    last_values = (None,) * len(KEYS)
+    
+    # 订阅最新数据更新通知，每收到一次通知读取一次最新数据（不再按固定间隔轮询）
+    pubsub = redis_client.pubsub(ignore_subscribe_messages=True)
+    pubsub.subscribe(CURRENT_UPDATED_CHANNEL)
     
     for i in range(20):
-        current_data = redis_client.get("plc:data:current")
+        if not wait_for_update(pubsub):
+            print(f"\n{UPDATE_TIMEOUT:.0f}秒内未收到数据更新通知，运行模块是否已启动？")
+            continue
+        
+        current_data, server_time = fetch_current(redis_client)
         if current_data:
-            data = json.loads(current_data)
+            data = _loads(current_data)
             params = data.get('params', {})
+            data_age = server_time - data.get('timestamp', server_time)
             
-            # 获取PID1的关键参数
-            pv = params.get('pid1.pv', None)
-            sv = params.get('pid1.sv', None)
-            mv = params.get('pid1.mv', None)
-            level = params.get('tank1.LEVEL', None)
+            # 获取PID1的关键参数（缺失的参数为None）
+            values = tuple(map(params.get, KEYS))
+            pv, sv, mv, level = values
             
-            # 检查是否有变化
-            pv_changed = pv != last_pv if last_pv is not None else False
-            sv_changed = sv != last_sv if last_sv is not None else False
-            mv_changed = mv != last_mv if last_mv is not None else False
-            level_changed = level != last_level if last_level is not None else False
+            # 与上一周期逐项比较，参数值后依次跟变化标记
+            fields = []
+            for value, last in zip(values, last_values):
+                fields += (value, '(变化)' if last is not None and value != last else '')
             
-            print(f"\n周期 #{i+1}")
-            print(f"  pid1.pv: {pv} {'(变化)' if pv_changed else ''}")
-            print(f"  pid1.sv: {sv} {'(变化)' if sv_changed else ''}")
-            print(f"  pid1.mv: {mv} {'(变化)' if mv_changed else ''}")
-            print(f"  tank1.LEVEL: {level} {'(变化)' if level_changed else ''}")
+            out = [TEMPLATE % (i + 1, data_age, *fields)]
             
             if pv is not None and sv is not None:
                 error = sv - pv
-                print(f"  误差 (sv-pv): {error:.4f}")
+                out.append(f"  误差 (sv-pv): {error:.4f}\n")
             
             if mv is not None and mv != 0:
-                print(f"  ⚠ PID输出不为0，但level未变化，可能存在问题")
+                out.append("  ⚠ PID输出不为0，但level未变化，可能存在问题\n")
             
-            last_pv = pv
-            last_sv = sv
-            last_mv = mv
-            last_level = level
-        
-        time.sleep(0.6)  # 等待一个周期多一点
+            sys.stdout.write(''.join(out))
+            
+            last_values = values
         
 except KeyboardInterrupt:
     print("\n\n监控已停止")
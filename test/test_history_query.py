@@ -4,9 +4,9 @@
 """
 import yaml
 from datetime import datetime, timedelta
-from plc.configuration import Configuration
-from plc.data_storage import DataStorage, DataRecord
-from sqlalchemy import func
+from plc.plc_configuration import Configuration
+from plc.data_storage import DataStorage
+from utils.raw_sql import raw_rows, raw_scalar
 from utils.logger import get_logger
 
 logger = get_logger()
@@ -84,31 +84,21 @@ def test_history_query(
     print(f"   结束时间: {end_time.strftime('%Y-%m-%d %H:%M:%S')}")
     
     try:
-        # 执行查询
-        records = data_storage.query_history(
+        # 执行查询（总记录数和时间范围内记录数与采样查询一并取得）
+        diagnostic = data_storage.query_history_diagnostic(
             param_name=param_name,
             start_time=start_time,
             end_time=end_time,
             limit=1000,
             sample_interval=sample_interval
         )
+        records = diagnostic['records']
         
-        # 先检查数据库中该参数的总记录数（不限制时间范围）
-        print(f"\n   检查数据库中该参数的总记录数...")
-        total_count = data_storage.session.query(func.count(DataRecord.id)).filter(
-            DataRecord.param_name == param_name
-        ).scalar()
-        print(f"   数据库中 {param_name} 的总记录数: {total_count}")
+        # 数据库中该参数的总记录数（不限制时间范围）
+        print(f"\n   数据库中 {param_name} 的总记录数: {diagnostic['total_count']}")
         
-        # 检查时间范围内的总记录数（不采样）
-        records_no_sample = data_storage.query_history(
-            param_name=param_name,
-            start_time=start_time,
-            end_time=end_time,
-            limit=10000,
-            sample_interval=None  # 不采样
-        )
-        print(f"   时间范围内（不采样）的记录数: {len(records_no_sample)}")
+        # 时间范围内的总记录数（不采样）
+        print(f"   时间范围内（不采样）的记录数: {diagnostic['range_count']}")
         
         print(f"\n4. 查询结果（采样后）:")
         print(f"   返回记录数: {len(records)}")
@@ -134,13 +124,14 @@ def test_history_query(
             else:
                 # 检查是否有其他参数的数据
                 print("   检查数据库中是否有其他参数的数据...")
-                total_count = data_storage.session.query(func.count(DataRecord.id)).scalar()
+                total_count = raw_scalar(data_storage.session, "SELECT COUNT(id) FROM data_records")
                 print(f"   数据库总记录数: {total_count}")
                 
                 if total_count > 0:
                     # 查询所有不同的参数名
-                    param_names = data_storage.session.query(DataRecord.param_name).distinct().all()
-                    param_names = [p[0] for p in param_names]
+                    param_names = [row[0] for row in raw_rows(
+                        data_storage.session, "SELECT DISTINCT param_name FROM data_records"
+                    )]
                     print(f"   数据库中的参数名列表（共 {len(param_names)} 个）:")
                     for pn in sorted(param_names)[:20]:  # 只显示前20个
                         print(f"     - {pn}")
@@ -3,9 +3,10 @@ import sys
 import yaml
 import time
 from datetime import datetime, timedelta
-from plc.configuration import Configuration
-from plc.data_storage import DataStorage, DataRecord
-from sqlalchemy import func
+from plc.plc_configuration import Configuration
+from plc.data_storage import DataStorage
+from utils.raw_sql import raw_rows, raw_scalar
+
 
 # 强制刷新输出
 sys.stdout.reconfigure(encoding='utf-8')
@@ -32,7 +33,7 @@ try:
     
     # 获取数据库统计
     print("3. 获取数据库统计信息...", flush=True)
-    total_count = data_storage.session.query(func.count(DataRecord.id)).scalar()
+    total_count = raw_scalar(data_storage.session, "SELECT COUNT(id) FROM data_records")
     print(f"   总记录数: {total_count:,}", flush=True)
     
     if total_count == 0:
@@ -41,8 +42,9 @@ try:
         sys.exit(0)
     
     # 获取参数列表
-    param_names = data_storage.session.query(DataRecord.param_name).distinct().limit(5).all()
-    param_names = [p[0] for p in param_names]
+    param_names = [row[0] for row in raw_rows(
+        data_storage.session, "SELECT DISTINCT param_name FROM data_records LIMIT 5"
+    )]
     print(f"   测试参数: {param_names[:3]}", flush=True)
     
     # 测试1: 基础查询
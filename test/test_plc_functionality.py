@@ -5,7 +5,6 @@ PLC功能验证测试脚本
 import os
 import sys
 import time
-import json
 import redis
 import sqlite3
 from datetime import datetime
@@ -16,6 +15,8 @@ sys.path.insert(0, str(Path(__file__).parent))
 
 from plc.plc_configuration import Configuration
 from plc.snapshot_manager import SnapshotManager
+from utils.redis_pool import get_pool
+from utils.json_codec import dumps as _dumps, loads as _loads
 
 
 class PLCFunctionalityTester:
@@ -68,7 +69,7 @@ class PLCFunctionalityTester:
         print("="*60)
         
         try:
-            snapshot_mgr = SnapshotManager("plc/local/test_snapshot.yaml")
+            snapshot_mgr = SnapshotManager("plc/local/test_snapshot.json")
             
             # 测试保存快照
             test_params = {
@@ -90,8 +91,8 @@ class PLCFunctionalityTester:
             self.log_test("快照加载", True, f"加载了 {len(loaded)} 个参数")
             
             # 清理测试文件
-            if os.path.exists("plc/local/test_snapshot.yaml"):
-                os.remove("plc/local/test_snapshot.yaml")
+            if os.path.exists("plc/local/test_snapshot.json"):
+                os.remove("plc/local/test_snapshot.json")
             
             return True
         except Exception as e:
@@ -105,11 +106,8 @@ class PLCFunctionalityTester:
         print("="*60)
         
         try:
-            self.redis_client = redis.Redis(
-                host='localhost',
-                port=6379,
-                decode_responses=True
-            )
+            # 与PLC模块相同，从进程内共享的连接池获取连接
+            self.redis_client = redis.Redis(connection_pool=get_pool({'host': 'localhost', 'port': 6379}))
             result = self.redis_client.ping()
             assert result == True, "Redis ping failed"
             self.log_test("Redis连接", True, "连接成功")
@@ -136,7 +134,7 @@ class PLCFunctionalityTester:
             # 检查当前数据
             current_data = self.redis_client.get("plc:data:current")
             if current_data:
-                data = json.loads(current_data)
+                data = _loads(current_data)
                 # 数据格式：{'timestamp': ..., 'datetime': ..., 'params': {...}}
                 params = data.get('params', {})
                 param_count = len(params)
@@ -166,7 +164,7 @@ class PLCFunctionalityTester:
         print("测试5：快照文件存在性")
         print("="*60)
         
-        snapshot_file = "plc/local/snapshot.yaml"
+        snapshot_file = "plc/local/snapshot.json"
         if os.path.exists(snapshot_file):
             # 检查文件修改时间
             mtime = os.path.getmtime(snapshot_file)
@@ -272,7 +270,7 @@ class PLCFunctionalityTester:
             }
             
             # 发送消息
-            result = self.redis_client.publish("plc:config:update", json.dumps(test_config))
+            result = self.redis_client.publish("plc:config:update", _dumps(test_config))
             self.log_test("消息发送", True, f"消息已发送（{result} 个订阅者）")
             
             print("   注意：请检查PLC日志，确认配置更新是否被接收")
@@ -300,7 +298,7 @@ class PLCFunctionalityTester:
             }
             
             # 发送命令
-            result = self.redis_client.publish("plc:command:write_parameter", json.dumps(command))
+            result = self.redis_client.publish("plc:command:write_parameter", _dumps(command))
             self.log_test("命令发送", True, f"命令已发送（{result} 个订阅者）")
             
             print("   注意：请检查PLC日志和Redis数据，确认参数是否在下个周期更新")
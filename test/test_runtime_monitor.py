@@ -3,7 +3,6 @@ PLC运行时监控脚本
 实时监控PLC运行状态和数据更新
 """
 import redis
-import json
 import time
 import sys
 from datetime import datetime
@@ -11,69 +10,138 @@ from pathlib import Path
 
 # 添加项目根目录到路径
 sys.path.insert(0, str(Path(__file__).parent))
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from utils.redis_pool import get_pool
+from utils.json_codec import loads as _loads
+from utils.current_data import CURRENT_UPDATED_CHANNEL
 
 
 class PLCRuntimeMonitor:
     """PLC运行时监控器"""
     
     def __init__(self):
+        # 上一次解析的当前数据：(原始JSON字符串, 解析结果)
+        self._last_current = (None, None)
+        
+        # 显示用参数名分组缓存：(参数名集合, PID参数名列表, 模型参数名列表)
+        self._display_keys = (frozenset(), [], [])
+        
         try:
-            self.redis_client = redis.Redis(
-                host='localhost',
-                port=6379,
-                decode_responses=True
-            )
+            # 与PLC模块相同，从进程内共享的连接池获取连接
+            self.redis_client = redis.Redis(connection_pool=get_pool({'host': 'localhost', 'port': 6379}))
             self.redis_client.ping()
             print("✓ Redis连接成功")
         except Exception as e:
             print(f"✗ Redis连接失败: {e}")
             sys.exit(1)
     
+    def _decode_current(self, current_data: str) -> dict:
+        """
+        解析当前数据JSON，与上一次读取的内容相同时直接复用上次的解析结果
+        
+        原始字符串的比较在C层完成，远比重新解析参数很多的JSON便宜。
+        
+        Args:
+            current_data: plc:data:current 的原始JSON字符串
+        
+        Returns:
+            dict: 解析结果（调用方不得修改）
+        """
+        last_raw, last_data = self._last_current
+        if current_data == last_raw:
+            return last_data
+        data = _loads(current_data)
+        self._last_current = (current_data, data)
+        return data
+    
+    def _group_display_keys(self, params: dict):
+        """
+        将参数名按显示分组（PID参数、模型参数），各组按名称排序
+        
+        参数名集合与上次相同时直接复用上次的分组，不再重复排序和匹配。
+        
+        Args:
+            params: 当前参数字典
+        
+        Returns:
+            (PID参数名列表, 模型参数名列表)
+        """
+        cached_keys, pid_keys, model_keys = self._display_keys
+        if params.keys() != cached_keys:
+            pid_keys, model_keys = [], []
+            for key in sorted(params):
+                key_lower = key.lower()
+                if 'pid' in key_lower:
+                    pid_keys.append(key)
+                if 'tank' in key_lower or 'valve' in key_lower:
+                    model_keys.append(key)
+            self._display_keys = (frozenset(params), pid_keys, model_keys)
+        return pid_keys, model_keys
+    
     def monitor_current_data(self, interval: float = 1.0, duration: int = 30):
         """
         监控当前数据
         
+        订阅运行模块的数据更新通知，收到通知时读取最新数据（不再按固定间隔轮询）。
+        
         Args:
-            interval: 更新间隔（秒）
+            interval: 最短显示间隔（秒），间隔内的其余更新通知被跳过
             duration: 监控时长（秒），0表示无限监控
         """
         print("\n" + "="*60)
         print("监控当前数据（按Ctrl+C停止）")
         print("="*60)
         
-        start_time = time.time()
+        pubsub = self.redis_client.pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe(CURRENT_UPDATED_CHANNEL)
+        
+        start_time = time.monotonic()
+        next_display = start_time
         count = 0
         
         try:
             while True:
+                # 按1秒分段等待通知，以便检查监控时长（Windows下也能及时响应Ctrl+C）
+                timeout = 1.0
+                if duration > 0:
+                    remaining = start_time + duration - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    timeout = min(timeout, remaining)
+                
+                message = pubsub.get_message(timeout=timeout)
+                if message is None or message['type'] != 'message':
+                    continue
+                
+                now = time.monotonic()
+                if now < next_display:
+                    continue
+                next_display = now + interval
+                
                 current_data = self.redis_client.get("plc:data:current")
                 if current_data:
-                    data = json.loads(current_data)
+                    data = self._decode_current(current_data)
                     # 数据格式：{'timestamp': ..., 'datetime': ..., 'params': {...}}
                     params = data.get('params', {})
                     count += 1
                     
-                    # 显示关键参数
-                    print(f"\n[{datetime.now().strftime('%H:%M:%S')}] 更新 #{count}")
-                    print("-" * 60)
+                    # 显示关键参数（整个更新的输出拼接后一次写入）
+                    lines = [f"\n[{datetime.now().strftime('%H:%M:%S')}] 更新 #{count}", "-" * 60]
+                    pid_keys, model_keys = self._group_display_keys(params)
                     
                     # 显示PID参数
-                    for key in sorted(params.keys()):
-                        if 'pid' in key.lower():
-                            print(f"  {key}: {params[key]}")
+                    lines += [f"  {key}: {params[key]}" for key in pid_keys]
                     
                     # 显示模型参数
-                    for key in sorted(params.keys()):
-                        if 'tank' in key.lower() or 'valve' in key.lower():
-                            print(f"  {key}: {params[key]}")
-                
-                if duration > 0 and (time.time() - start_time) >= duration:
-                    break
-                
-                time.sleep(interval)
+                    lines += [f"  {key}: {params[key]}" for key in model_keys]
+                    
+                    sys.stdout.write("\n".join(lines) + "\n")
                 
         except KeyboardInterrupt:
             print("\n\n监控已停止")
+        finally:
+            pubsub.close()
     
     def check_snapshot_status(self):
         """检查快照状态"""
@@ -83,7 +151,7 @@ class PLCRuntimeMonitor:
         print("快照状态检查")
         print("="*60)
         
-        snapshot_file = "plc/local/snapshot.yaml"
+        snapshot_file = "plc/local/snapshot.json"
         if os.path.exists(snapshot_file):
             mtime = os.path.getmtime(snapshot_file)
             mtime_str = datetime.fromtimestamp(mtime).strftime("%Y-%m-%d %H:%M:%S")
@@ -113,10 +181,15 @@ class PLCRuntimeMonitor:
         print("="*60)
         
         try:
+            # 当前数据和历史数据流长度一次往返读取
+            pipe = self.redis_client.pipeline(transaction=False)
+            pipe.get("plc:data:current")
+            pipe.xlen("plc:data:stream")
+            current_data, history_len = pipe.execute()
+            
             # 检查当前数据
-            current_data = self.redis_client.get("plc:data:current")
             if current_data:
-                data = json.loads(current_data)
+                data = self._decode_current(current_data)
                 # 数据格式：{'timestamp': ..., 'datetime': ..., 'params': {...}}
                 params = data.get('params', {})
                 print(f"✓ 当前数据存在")
@@ -128,8 +201,7 @@ class PLCRuntimeMonitor:
                 print("✗ 当前数据不存在")
             
             # 检查历史数据
-            history_len = self.redis_client.llen("plc:data:history")
-            print(f"✓ 历史数据列表长度: {history_len}")
+            print(f"✓ 历史数据流长度: {history_len}")
             
         except Exception as e:
             print(f"✗ 检查失败: {e}")
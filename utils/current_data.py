@@ -0,0 +1,53 @@
+"""
+最新数据读取模块
+调试和监控脚本共用：等待运行模块的数据更新通知，读取最新数据
+"""
+import time
+from typing import Any, Optional, Tuple
+
+# 最新数据键
+CURRENT_KEY = "plc:data:current"
+
+# 运行模块每个周期推送最新数据后在该频道发布通知
+CURRENT_UPDATED_CHANNEL = "plc:data:current:updated"
+
+# 等待数据更新通知的超时时间（秒）
+UPDATE_TIMEOUT = 5.0
+
+
+def fetch_current(redis_client) -> Tuple[Optional[Any], float]:
+    """
+    一次往返读取当前数据和Redis服务器时间
+    
+    Args:
+        redis_client: Redis客户端
+    
+    Returns:
+        (当前数据JSON或None, 服务器时间戳)
+    """
+    pipe = redis_client.pipeline(transaction=False)
+    pipe.get(CURRENT_KEY)
+    pipe.time()
+    current_data, (seconds, microseconds) = pipe.execute()
+    return current_data, seconds + microseconds / 1e6
+
+
+def wait_for_update(pubsub, timeout: float = UPDATE_TIMEOUT) -> bool:
+    """
+    等待下一条数据更新通知
+    
+    Args:
+        pubsub: 已订阅数据更新通知频道的PubSub对象
+        timeout: 超时时间（秒）
+    
+    Returns:
+        在超时时间内收到通知时返回True，否则返回False
+    """
+    deadline = time.monotonic() + timeout
+    while True:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return False
+        message = pubsub.get_message(timeout=remaining)
+        if message is not None and message['type'] == 'message':
+            return True
@@ -0,0 +1,57 @@
+"""
+JSON编解码模块
+优先使用orjson（C实现），未安装或遇到orjson不支持的内容时回退到标准库json；
+需要orjson专有选项的模块直接使用这里导出的orjson（未安装时为None）
+"""
+import json
+from typing import Any
+
+try:
+    import orjson
+except ImportError:  # orjson为可选依赖，未安装时回退到标准库json
+    orjson = None
+
+
+def dumps(data: Any):
+    """
+    序列化为JSON
+    
+    优先使用orjson（C实现，直接输出UTF-8字节），未安装或遇到orjson
+    不支持的值（如超出64位的整数）时回退到标准库json。
+    
+    Args:
+        data: 待序列化的数据
+    
+    Returns:
+        JSON字节串（orjson）或字符串（json），均可直接写入Redis
+    """
+    if orjson is not None:
+        try:
+            return orjson.dumps(data, option=orjson.OPT_SERIALIZE_NUMPY)
+        except TypeError:
+            pass
+    return json.dumps(data, ensure_ascii=False)
+
+
+def loads(data):
+    """
+    解析JSON
+    
+    优先使用orjson（C实现，直接接受bytes/str），未安装或遇到orjson
+    不接受的内容（如标准库json输出的NaN/Infinity）时回退到标准库json。
+    
+    Args:
+        data: JSON字节串或字符串
+    
+    Returns:
+        解析后的对象
+    
+    Raises:
+        json.JSONDecodeError: 内容不是合法的JSON
+    """
+    if orjson is not None:
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            pass
+    return json.loads(data)
@@ -130,32 +130,19 @@ class Logger:
         
         在程序退出前调用，确保日志文件被正确关闭，避免Windows上的文件占用问题
         """
-        # 先刷新所有日志，确保所有日志都被写入
-        for handler in self.logger.handlers[:]:
-            try:
-                handler.flush()
-            except Exception:
-                pass
-        
-        # 然后关闭所有处理器
+        # 逐个关闭处理器：handler.close()在处理器锁内先刷新再关闭文件，
+        # 只需遍历一次处理器列表
         # 注意：关闭处理器时，如果文件正在被其他进程占用，可能会失败
         # 但这是正常的，我们忽略这些错误，确保程序能正常退出
         handlers_to_close = list(self.logger.handlers)  # 创建副本，避免迭代时修改列表
         for handler in handlers_to_close:
             try:
-                # 先尝试关闭流（这会释放文件句柄）
-                if hasattr(handler, 'stream') and handler.stream:
-                    try:
-                        handler.stream.close()
-                    except Exception:
-                        pass
-                # 然后关闭处理器
                 handler.close()
-                self.logger.removeHandler(handler)
             except Exception:
                 # 忽略关闭时的错误，避免影响程序退出
                 # 在Windows上，如果文件被其他进程占用，关闭可能会失败
                 pass
+            self.logger.removeHandler(handler)
 
 
 # 全局日志实例
@@ -0,0 +1,36 @@
+"""
+原生SQL查询模块
+绕过ORM，在SQLAlchemy会话的当前连接上直接执行只读SQL（如COUNT、DISTINCT），
+省去ORM逐行构造对象的开销
+"""
+from typing import Any, List, Sequence
+
+
+def raw_rows(session, sql: str, params=None) -> List[Sequence[Any]]:
+    """
+    绕过ORM，在会话的当前连接上直接执行只读SQL
+    
+    Args:
+        session: SQLAlchemy会话（使用其当前连接和事务）
+        sql: SQL语句（参数占位符遵循数据库驱动的paramstyle）
+        params: SQL参数（可选）
+    
+    Returns:
+        list: 结果行列表（Row对象，可按元组使用）
+    """
+    return session.connection().exec_driver_sql(sql, params).fetchall()
+
+
+def raw_scalar(session, sql: str, params=None) -> Any:
+    """
+    绕过ORM执行只返回单个值的SQL（如COUNT），返回第一行第一列
+    
+    Args:
+        session: SQLAlchemy会话
+        sql: SQL语句
+        params: SQL参数（可选）
+    
+    Returns:
+        第一行第一列的值，没有结果时返回None
+    """
+    return session.connection().exec_driver_sql(sql, params).scalar()
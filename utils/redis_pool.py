@@ -0,0 +1,63 @@
+"""
+Redis连接池模块
+同一进程内连接同一个Redis的模块共享一个阻塞连接池，复用长连接
+"""
+import socket
+import threading
+from typing import Any, Dict, Tuple
+
+import redis
+
+# 连接池大小（Runner的命令订阅、周期推送和I/O线程，以及DataStorage、Communication共用）
+MAX_CONNECTIONS = 16
+
+# 连接健康检查间隔（秒）
+HEALTH_CHECK_INTERVAL = 30
+
+# 已创建的连接池：{(host, port, password, db, decode_responses): 连接池}
+_pools: Dict[Tuple[Any, ...], redis.BlockingConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(redis_config: dict, decode_responses: bool = True) -> redis.BlockingConnectionPool:
+    """
+    获取Redis连接池（同一连接参数只创建一次）
+    
+    连接池启用TCP keepalive和定期健康检查，避免空闲断连后在运行周期内重连
+    （redis-py 默认已为连接设置 TCP_NODELAY）。
+    
+    Args:
+        redis_config: Redis配置字典（host, port, password, db），为None时连接本地默认端口
+        decode_responses: 是否将响应解码为字符串
+    
+    Returns:
+        redis.BlockingConnectionPool: 共享的连接池
+    """
+    redis_config = redis_config or {}
+    key = (
+        redis_config.get('host', 'localhost'),
+        redis_config.get('port', 6379),
+        redis_config.get('password'),
+        redis_config.get('db', 0),
+        decode_responses
+    )
+    
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            keepalive_options = {}
+            if hasattr(socket, 'TCP_KEEPIDLE'):  # Windows/macOS 不支持该选项
+                keepalive_options[socket.TCP_KEEPIDLE] = 30
+            host, port, password, db, _ = key
+            pool = _pools[key] = redis.BlockingConnectionPool(
+                host=host,
+                port=port,
+                password=password,
+                db=db,
+                decode_responses=decode_responses,
+                max_connections=MAX_CONNECTIONS,
+                socket_keepalive=True,
+                socket_keepalive_options=keepalive_options,
+                health_check_interval=HEALTH_CHECK_INTERVAL
+            )
+        return pool
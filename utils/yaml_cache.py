@@ -0,0 +1,177 @@
+"""
+YAML文件加载缓存模块
+进程内按文件路径缓存YAML解析结果，文件未变化时不再重复解析；
+可选在YAML文件旁写入JSON影子缓存，重启后文件未变化时直接读取JSON
+"""
+import copy
+import json
+import mmap
+import os
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Optional, Tuple
+
+import yaml
+
+from utils.logger import get_logger
+from utils.json_codec import orjson
+
+logger = get_logger()
+
+# 优先使用libyaml的C实现，未编译libyaml时回退到纯Python实现
+_Loader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+LIBYAML_AVAILABLE = _Loader is not yaml.SafeLoader
+
+# 最多缓存的文件数量，超出时淘汰最久未使用的文件
+MAX_ENTRIES = 100
+
+# JSON影子缓存文件后缀（写在YAML文件旁：config.yaml -> config.yaml.cache.json）
+SHADOW_SUFFIX = '.cache.json'
+
+# 解析结果缓存：{绝对路径: (st_mtime_ns, st_size, 解析结果)}，按最近使用顺序排列
+_cache: "OrderedDict[str, Tuple[int, int, Any]]" = OrderedDict()
+
+
+def stat_or_none(path: str) -> Optional[os.stat_result]:
+    """
+    获取文件状态，文件不存在时返回None（一次系统调用同时完成存在性检查）
+    
+    Args:
+        path: 文件路径
+    
+    Returns:
+        os.stat_result，文件不存在时返回None
+    """
+    try:
+        return os.stat(path)
+    except FileNotFoundError:
+        return None
+
+
+@contextmanager
+def open_mapped(path: str):
+    """
+    以只读内存映射方式打开文件，供YAML解析器直接读取
+    
+    解析器按块从映射中读取字节（UTF-8由解析器自行解码），不再先把整个文件
+    读入Python字符串；退出上下文时关闭映射和文件。空文件无法映射，返回空字节串。
+    
+    Args:
+        path: 文件路径
+    
+    Yields:
+        只读mmap对象（空文件时为b''）
+    """
+    with open(path, 'rb') as f:
+        try:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # 空文件
+            yield b''
+            return
+        try:
+            yield mapped
+        finally:
+            mapped.close()
+
+
+def load_yaml(path: str, json_shadow: bool = False, st: Optional[os.stat_result] = None) -> Any:
+    """
+    读取并解析YAML文件，文件未变化时复用上次的解析结果
+    
+    以 (mtime, size) 判断文件是否变化；返回深拷贝，调用方修改不会污染缓存。
+    json_shadow为True时，进程内缓存未命中会先尝试读取YAML文件旁的JSON影子缓存
+    （记录了生成时YAML文件的 (mtime, size)，不一致时视为过期），
+    需要解析YAML时解析后重新生成影子缓存。
+    
+    Args:
+        path: YAML文件路径
+        json_shadow: 是否使用JSON影子缓存（适用于很少修改、每次启动都要读取的配置文件）
+        st: 调用方刚获取的文件状态（可选，提供时不再重复stat）
+    
+    Returns:
+        解析后的数据
+    
+    Raises:
+        FileNotFoundError: 文件不存在
+        yaml.YAMLError: YAML解析错误
+    """
+    abspath = os.path.abspath(path)
+    if st is None:
+        st = os.stat(abspath)
+    
+    hit = _cache.get(abspath)
+    if hit is not None and hit[0] == st.st_mtime_ns and hit[1] == st.st_size:
+        _cache.move_to_end(abspath)
+        return copy.deepcopy(hit[2])
+    
+    data = _read_shadow(abspath, st) if json_shadow else None
+    if data is None:
+        with open_mapped(abspath) as stream:
+            data = yaml.load(stream, Loader=_Loader)
+        if json_shadow:
+            _write_shadow(abspath, st, data)
+    
+    _cache[abspath] = (st.st_mtime_ns, st.st_size, data)
+    _cache.move_to_end(abspath)
+    while len(_cache) > MAX_ENTRIES:
+        _cache.popitem(last=False)
+    
+    return copy.deepcopy(data)
+
+
+def clear_cache():
+    """清空YAML解析结果缓存（不删除JSON影子缓存文件）"""
+    _cache.clear()
+
+
+def _read_shadow(abspath: str, st: os.stat_result) -> Optional[Any]:
+    """
+    读取JSON影子缓存
+    
+    Args:
+        abspath: YAML文件绝对路径
+        st: YAML文件当前的stat结果
+    
+    Returns:
+        影子缓存有效时返回解析结果，不存在、已过期或无法读取时返回None
+    """
+    shadow_file = abspath + SHADOW_SUFFIX
+    try:
+        with open(shadow_file, 'rb') as f:
+            raw = f.read()
+        shadow = orjson.loads(raw) if orjson is not None else json.loads(raw)
+        if shadow.get('source') != [st.st_mtime_ns, st.st_size]:
+            return None
+        return shadow['data']
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        logger.debug(f"Ignoring unreadable YAML shadow cache {shadow_file}: {e}")
+        return None
+
+
+def _write_shadow(abspath: str, st: os.stat_result, data: Any):
+    """
+    写入JSON影子缓存
+    
+    只有JSON能原样还原解析结果时才写入（例如YAML中有非字符串键或日期时不写入）。
+    写入失败（如目录只读）不影响配置加载。
+    
+    Args:
+        abspath: YAML文件绝对路径
+        st: 解析时YAML文件的stat结果
+        data: YAML解析结果
+    """
+    shadow_file = abspath + SHADOW_SUFFIX
+    try:
+        raw = json.dumps({'source': [st.st_mtime_ns, st.st_size], 'data': data},
+                         ensure_ascii=False).encode('utf-8')
+        if json.loads(raw)['data'] != data:
+            return
+        
+        tmp_file = shadow_file + '.tmp'
+        with open(tmp_file, 'wb') as f:
+            f.write(raw)
+        os.replace(tmp_file, shadow_file)
+    except Exception as e:
+        logger.debug(f"Failed to write YAML shadow cache {shadow_file}: {e}")